@@ -65,3 +65,7 @@ class FilterPilgram2Config(BaseConfig):
         default=[f for f in get_args(available_filter)],
         description="Select filter, the user can choose from. Even if unselected here, the filter is still available in the admin configuration.",
     )
+    use_lut_engine: bool = Field(
+        default=True,
+        description="Apply filters using precompiled color lookup tables. Much faster and visually the same, minor rounding differences to the original pilgram2 implementation.",
+    )
@@ -7,6 +7,7 @@ from PIL import Image
 from .. import hookimpl
 from ..base_plugin import BaseFilter
 from .config import FilterPilgram2Config, available_filter
+from .lut import get_lut, install_gradient_cache
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,8 @@ class FilterPilgram2(BaseFilter[FilterPilgram2Config]):
 
         self._config: FilterPilgram2Config = FilterPilgram2Config()
 
+        install_gradient_cache()
+
     @hookimpl
     def mp_avail_filter(self) -> list[str]:
         return [self.unify(f) for f in get_args(available_filter)]
@@ -43,6 +46,14 @@ class FilterPilgram2(BaseFilter[FilterPilgram2Config]):
         except Exception as exc:
             raise ValueError(f"pilgram2 filter {filter} does not exist") from exc
 
+        if self._config.use_lut_engine:
+            lut = get_lut(filter)
+
+            if lut:
+                # the lut keeps the alpha channel of RGBA images, so no need to split and merge again
+                return (image if image.mode in ("RGB", "RGBA") else image.convert("RGB")).filter(lut)
+
+        # filters with spatial parts are not compiled, they run the pilgram2 chain with cached gradient masks
         # apply filter
         filtered_image: Image.Image = pilgram2_filter_fun(image.copy())
 
@@ -0,0 +1,112 @@
+"""
+Compiled engine for pilgram2 filters.
+
+Most filters are pure per-pixel colour transforms made of a chain of blend and composite operations on the full image.
+These are compiled once into a 3D lookup table by filtering an image that contains every grid colour, afterwards
+the filter is applied in a single interpolated pass.
+Filters with spatial parts (vignettes, gradients) cannot be expressed as a colour table. They keep running the pilgram2
+chain, but the gradient masks are cached per size instead of being computed on every call.
+"""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+import pilgram2
+import pilgram2.util
+import pilgram2.util.linear_gradient
+import pilgram2.util.radial_gradient
+from PIL import Image, ImageFilter
+
+logger = logging.getLogger(__name__)
+
+LUT_SIZE = 33
+
+LUT_CACHE: dict[str, ImageFilter.Color3DLUT | None] = {}  # None for filters with spatial parts
+LOCK_LUT = Lock()
+
+GRADIENT_CACHE: OrderedDict[tuple, Image.Image] = OrderedDict()
+MAX_GRADIENT_CACHE = 8  # few MB each for full size images
+LOCK_GRADIENT = Lock()
+
+_gradient_calls = threading.local()  # counts gradient calls per thread to detect spatial filters
+
+# the util package exports functions named like their modules, so the modules are taken from sys.modules
+_gradient_functions = [
+    (pilgram2.util, "radial_gradient_mask"),
+    (sys.modules["pilgram2.util.radial_gradient"], "radial_gradient_mask"),  # used by radial_gradient()
+    (pilgram2.util, "linear_gradient_mask"),
+    (sys.modules["pilgram2.util.linear_gradient"], "linear_gradient_mask"),  # used by linear_gradient()
+]
+
+
+def _cached_gradient(name: str, fn):
+    def wrapper(size, *args, **kwargs):
+        _gradient_calls.count = getattr(_gradient_calls, "count", 0) + 1
+
+        try:
+            key = (name, tuple(size), args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return fn(size, *args, **kwargs)
+
+        with LOCK_GRADIENT:
+            if key in GRADIENT_CACHE:
+                GRADIENT_CACHE.move_to_end(key)
+                return GRADIENT_CACHE[key]
+
+        mask = fn(size, *args, **kwargs)
+
+        with LOCK_GRADIENT:
+            GRADIENT_CACHE[key] = mask
+            if len(GRADIENT_CACHE) > MAX_GRADIENT_CACHE:
+                GRADIENT_CACHE.popitem(last=False)
+
+        return mask
+
+    wrapper.__wrapped__ = fn  # type: ignore[attr-defined]
+    return wrapper
+
+
+def install_gradient_cache():
+    """Cache the gradient masks of pilgram2, they are only read by the filters. Safe to call multiple times."""
+    for module, name in _gradient_functions:
+        fn = getattr(module, name)
+        if not hasattr(fn, "__wrapped__"):
+            setattr(module, name, _cached_gradient(name, fn))
+
+
+def identity_image(size: int = LUT_SIZE) -> Image.Image:
+    """image containing every colour of the lut grid once, in the order of the Color3DLUT table (red changes fastest)"""
+    steps = np.linspace(0, 255, size).round().astype(np.uint8)
+    b, g, r = np.meshgrid(steps, steps, steps, indexing="ij")
+
+    return Image.fromarray(np.stack([r, g, b], axis=-1).reshape(size * size, size, 3), mode="RGB")
+
+
+def compile_lut(filter: str) -> ImageFilter.Color3DLUT | None:
+    """filter compiled to a lut, None if the filter has spatial parts."""
+    pilgram2_filter_fun = getattr(pilgram2, filter)
+
+    calls_before = getattr(_gradient_calls, "count", 0)
+    filtered = pilgram2_filter_fun(identity_image())
+    if getattr(_gradient_calls, "count", 0) != calls_before:
+        return None
+
+    table = np.asarray(filtered.convert("RGB"), dtype=np.float32).reshape(-1, 3) / 255.0
+
+    return ImageFilter.Color3DLUT(LUT_SIZE, table.flatten())
+
+
+def get_lut(filter: str) -> ImageFilter.Color3DLUT | None:
+    """compiled lut of the filter, compiled on first use only. None if the filter has spatial parts."""
+    with LOCK_LUT:
+        if filter not in LUT_CACHE:
+            install_gradient_cache()  # needed to detect spatial filters
+            LUT_CACHE[filter] = compile_lut(filter)
+            logger.debug(f"compiled pilgram2 filter {filter}, {'lut' if LUT_CACHE[filter] else 'spatial, not compiled'}")
+
+        return LUT_CACHE[filter]
@@ -9,6 +9,7 @@ from starlette.websockets import WebSocketDisconnect
 
 from ...appconfig import appconfig
 from ...container import container
+from ...services.backends.abstractbackend import LoresConsumer
 from ...services.sse import sse_service
 from ...services.sse.sse_ import SseEventTranslateableFrontendNotification
 from ...utils.exceptions import BackendNotRunning
@@ -26,6 +27,7 @@ async def websocket_endpoint(websocket: WebSocket, index_device: int | None = No
     await websocket.accept()
 
     retries = 3
+    consumer = LoresConsumer("websocket")
 
     while True:
         try:
@@ -46,7 +48,7 @@ async def websocket_endpoint(websocket: WebSocket, index_device: int | None = No
 
         for attempt in range(retries):
             try:
-                jpeg_bytes = await asyncio.to_thread(container.acquisition_service.wait_for_lores_image, index_device, index_subdevice)
+                jpeg_bytes = await asyncio.to_thread(container.acquisition_service.wait_for_lores_image, index_device, index_subdevice, consumer)
                 break  # success, don't execute for...else:
 
             except TimeoutError:  # backend timeout (mode switching, ...)
@@ -93,10 +95,11 @@ def video_stream(index_device: int = 0, index_subdevice: int = 0):
         raise HTTPException(status.HTTP_405_METHOD_NOT_ALLOWED, "preview not enabled")
 
     def gen_multipart():
+        consumer = LoresConsumer("mjpeg")
 
         while True:
             try:
-                jpeg_bytes = container.acquisition_service.wait_for_lores_image(index_device, index_subdevice)
+                jpeg_bytes = container.acquisition_service.wait_for_lores_image(index_device, index_subdevice, consumer)
                 yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg_bytes + b"\r\n\r\n")
             except TimeoutError:
                 # a timeouterror can occur during mode switches of the backend - the frontend will just wait for another frame
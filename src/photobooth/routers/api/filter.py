@@ -1,13 +1,19 @@
-import io
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Response, status
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from PIL import Image
 
 from ...container import container
-from ...database.models import DimensionTypes
+from ...database.models import DimensionTypes, Mediaitem
 from ...services.config.groups.actions import SingleImageProcessing
 from ...services.config.models.models import PluginFilters
+from ...services.mediaprocessing.previewcache import filter_preview_cache
 from ...services.mediaprocessing.processes import process_image_inner, process_phase1images
 from ...services.mediaprocessing.steps.image import get_plugin_userselectable_filters
 from ...utils.exceptions import PipelineError
@@ -16,6 +22,43 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/filter", tags=["filter"])
 
 
+@dataclass
+class FilterPreview:
+    filter: str
+    url: str
+
+
+def _preview_version(mediaitem: Mediaitem) -> int:
+    # previews are rendered from the unprocessed thumbnail, so they are outdated only if the unprocessed file is written again.
+    # updated_at has a resolution of seconds only, too coarse for updates in quick succession.
+    return mediaitem.unprocessed.stat().st_mtime_ns
+
+
+def _load_thumbnail(mediaitem: Mediaitem) -> Image.Image:
+    thumbnail = container.mediacollection_service.cache.get_cached_repr(item=mediaitem, dimension=DimensionTypes.thumbnail, processed=False)
+
+    with Image.open(thumbnail.filepath) as image:
+        image.load()
+        return image.copy()
+
+
+def _render_preview(mediaitem: Mediaitem, plugin_filter: PluginFilters, thumbnail: Image.Image | None = None) -> Path:
+    """filepath of the preview, rendered only if not in the cache already. thumbnail can be given if loaded already, it's not modified."""
+    version = _preview_version(mediaitem)
+
+    filepath = filter_preview_cache.get(mediaitem.id, plugin_filter.value, version)
+    if filepath:
+        return filepath
+
+    image = thumbnail.copy() if thumbnail else _load_thumbnail(mediaitem)
+
+    # all other pipeline-steps need to be disabled here for fast preview. false is default so no need to set here.
+    config = SingleImageProcessing(image_filter=plugin_filter)
+    manipulated_image = process_image_inner(file_in=image, config=config, preview=True)
+
+    return filter_preview_cache.store(mediaitem.id, plugin_filter.value, version, manipulated_image)
+
+
 @router.get("/")
 def api_get_userselectable_filters():
     try:
@@ -27,7 +70,7 @@ def api_get_userselectable_filters():
     return plugin_results
 
 
-@router.get("/{mediaitem_id}", response_class=Response)
+@router.get("/{mediaitem_id}", response_class=FileResponse)
 def api_get_preview_image_filtered(mediaitem_id: UUID, filter: str):
     try:
         plugin_filter = PluginFilters(filter)
@@ -36,19 +79,9 @@ def api_get_preview_image_filtered(mediaitem_id: UUID, filter: str):
 
     try:
         mediaitem = container.mediacollection_service.get_item(item_id=mediaitem_id)
-        thumbnail = container.mediacollection_service.cache.get_cached_repr(item=mediaitem, dimension=DimensionTypes.thumbnail, processed=False)
 
-        # along with mediaitem the config was stored. cast it back to original pydantic type, update filter and forward to processing
-        # all other pipeline-steps need to be disabled here for fast preview. false is default so no need to set here.
-        config = SingleImageProcessing(image_filter=plugin_filter)
-
-        manipulated_image = process_image_inner(file_in=thumbnail.filepath, config=config, preview=True)
-
-        buffer_preview_pipeline_applied = io.BytesIO()
-        manipulated_image.save(buffer_preview_pipeline_applied, format="jpeg", quality=80, optimize=False)
-
-        return Response(
-            content=buffer_preview_pipeline_applied.getvalue(),
+        return FileResponse(
+            _render_preview(mediaitem, plugin_filter),
             media_type="image/jpeg",
             headers={"Cache-Control": "max-age=3600"},  # cache for 60mins in browser to avoid recomputing every time
         )
@@ -63,6 +96,39 @@ def api_get_preview_image_filtered(mediaitem_id: UUID, filter: str):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error creating filtered preview: {exc}") from exc
 
 
+@router.get("/{mediaitem_id}/previews", response_model=list[FilterPreview])
+def api_get_preview_images_filtered(mediaitem_id: UUID, request: Request):
+    """Render the previews of all user selectable filters in parallel. The returned urls are served from the cache."""
+    try:
+        mediaitem = container.mediacollection_service.get_item(item_id=mediaitem_id)
+        plugin_filters = [PluginFilters(e[0]) for e in get_plugin_userselectable_filters()]
+        version = _preview_version(mediaitem)
+
+        missing = [f for f in plugin_filters if not filter_preview_cache.get(mediaitem.id, f.value, version)]
+        if missing:
+            # decode once for all filters, the filters release the GIL mostly so threads compute in parallel
+            thumbnail = _load_thumbnail(mediaitem)
+            with ThreadPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 1)) as executor:
+                list(executor.map(lambda f: _render_preview(mediaitem, f, thumbnail), missing))
+
+        return [
+            FilterPreview(
+                filter=f.value,
+                # version to bust browser caches if the mediaitem is updated
+                url=str(request.url_for("api_get_preview_image_filtered", mediaitem_id=mediaitem.id).include_query_params(filter=f.value, v=version)),
+            )
+            for f in plugin_filters
+        ]
+
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{mediaitem_id=} cannot be found. {exc}") from exc
+    except PipelineError as exc:
+        logger.error(f"apply pilgram_stage failed, reason: {exc}.")
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"filter preview failed. {exc}") from exc
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error creating filtered previews: {exc}") from exc
+
+
 @router.patch("/{mediaitem_id}")
 def api_applyfilter(mediaitem_id: UUID, filter: str):
     try:
@@ -80,10 +146,10 @@ def api_applyfilter(mediaitem_id: UUID, filter: str):
             processed=False,
         )
 
-        process_phase1images(mediaitem_cached_repr_full.filepath, mediaitem)
+        renditions = process_phase1images(mediaitem_cached_repr_full.filepath, mediaitem)
 
         # update at last in db after processing is finished because in that moment the clients get their sseUpdate notification and cache is busted
-        container.mediacollection_service.update_item(mediaitem)
+        container.mediacollection_service.update_item(mediaitem, renditions)
     except Exception as exc:
         logger.exception(exc)
         logger.error(f"apply pipeline failed, reason: {exc}.")
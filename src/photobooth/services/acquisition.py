@@ -11,7 +11,7 @@ from typing import Literal
 from ..appconfig import appconfig
 from ..plugins import pm as pluggy_pm
 from ..utils.exceptions import BackendNotRunning
-from .backends.abstractbackend import AbstractBackend
+from .backends.abstractbackend import AbstractBackend, LoresConsumer
 from .backends.encoder.video import SoftwareVideoRecorder
 from .base import BaseService
 
@@ -63,6 +63,9 @@ class AcquisitionService(BaseService):
         """stop backends"""
         super().stop()
 
+        if self._recorder:
+            self._recorder.abort_transcodes()
+
         if not self._backends:
             return
 
@@ -94,37 +97,49 @@ class AcquisitionService(BaseService):
 
         return acquisition_stats
 
-    def thrill_still(self):
-        """called by job processor when a countdown for stills is started"""
+    def thrill_still(self, countdown: float | None = None):
+        """called by job processor when a countdown for stills is started. If the countdown (seconds) is given,
+        the backend switches to still mode ahead of time to be ready when the countdown ends"""
         pluggy_pm.hook.acq_thrill()
         pluggy_pm.hook.acq_thrill_still()
 
+        if countdown is not None and appconfig.backends.preswitch_still_mode:
+            self._stills_backend.schedule_still_mode(countdown)
+
     def thrill_video(self):
         """called by job processor when a countdown for video is started"""
         pluggy_pm.hook.acq_thrill()
         pluggy_pm.hook.acq_thrill_video()
 
-    def thrill_multicam(self):
-        """called by job processor when a countdown for multicam is started"""
+    def thrill_multicam(self, countdown: float | None = None):
+        """called by job processor when a countdown for multicam is started, see thrill_still"""
         pluggy_pm.hook.acq_thrill()
         pluggy_pm.hook.acq_thrill_multicam()
 
-    def wait_for_lores_image(self, index_device: int | None = 0, index_subdevice: int = 0):
+        if countdown is not None and appconfig.backends.preswitch_still_mode:
+            self._multicam_backend.schedule_still_mode(countdown)
+
+    def signal_postprocessing(self, active: bool):
+        """called by job processor when a job is postprocessing, so the backends throttle the livestream"""
+        for backend in self._backends:
+            backend.signal_postprocessing(active)
+
+    def wait_for_lores_image(self, index_device: int | None = 0, index_subdevice: int = 0, consumer: LoresConsumer | None = None):
 
         if not self.is_running():
             raise BackendNotRunning
 
         backend = self._video_backend if index_device is None else self._backends[index_device]
 
-        return backend.wait_for_lores_image(index_subdevice=index_subdevice)
+        return backend.wait_for_lores_image(index_subdevice=index_subdevice, consumer=consumer)
 
-    def wait_for_still_file(self, index_device: int | None = 0, index_subdevice: int = 0):
+    def wait_for_still_file(self, index_device: int | None = 0, index_subdevice: int = 0, destination: Path | str = "tmp"):
         backend = self._stills_backend if index_device is None else self._backends[index_device]
 
         pluggy_pm.hook.acq_before_shot()
         pluggy_pm.hook.acq_before_get_still()
         try:
-            return backend.wait_for_still_file(index_subdevice=index_subdevice)
+            return backend.wait_for_still_file(index_subdevice=index_subdevice, destination=destination)
         except Exception as exc:
             # self._stills_backend.recover()  # TODO: verify
             raise exc
@@ -132,6 +147,20 @@ class AcquisitionService(BaseService):
             # ensure even if failed, the wled is set to standby again
             pluggy_pm.hook.acq_after_shot()
 
+    def wait_for_burst_files(
+        self, number_captures: int, interval: float = 0.0, index_device: int | None = 0, index_subdevice: int = 0, destination: Path | str = "tmp"
+    ):
+        """capture several stills in one request, the files are yielded as soon as they are captured so processing can start early"""
+        backend = self._stills_backend if index_device is None else self._backends[index_device]
+
+        pluggy_pm.hook.acq_before_shot()
+        pluggy_pm.hook.acq_before_get_still()
+        try:
+            yield from backend.wait_for_burst_files(number_captures, interval=interval, index_subdevice=index_subdevice, destination=destination)
+        finally:
+            # ensure even if failed, the wled is set to standby again
+            pluggy_pm.hook.acq_after_shot()
+
     def wait_for_multicam_files(self, index_device: int | None = 0):
         backend = self._multicam_backend if index_device is None else self._backends[index_device]
 
@@ -163,6 +192,18 @@ class AcquisitionService(BaseService):
 
         self._recorder.stop_recording()
 
+    def wait_for_video_file(self, filepath: Path) -> Path:
+        """blocks until a recorded video is ready to be processed, recordings in passthrough mode are transcoded in background"""
+        assert self._recorder, "service needs to be started before using the recorder"
+
+        return self._recorder.wait_for_video_file(filepath)
+
+    def discard_video_file(self, filepath: Path):
+        """the recorded video is not processed, background transcodes are stopped"""
+        assert self._recorder, "service needs to be started before using the recorder"
+
+        self._recorder.discard_video_file(filepath)
+
     @staticmethod
     def _import_backend(backend: str):
         # dynamic import of backend
@@ -3,17 +3,26 @@ abstract for the photobooth-app backends
 """
 
 import logging
+import queue
 import threading
 import time
 import uuid
+import weakref
 from abc import ABC, abstractmethod
 from collections import deque
+from collections.abc import Generator
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
+from tempfile import NamedTemporaryFile
 from typing import Literal
 
+import psutil
+
 from photobooth.utils.stoppablethread import StoppableThread
 
+from ...appconfig import appconfig
+from ...utils.helper import filename_str_time
 from ...utils.resilientservice import ResilientService
 from ..config.groups.cameras import Orientation
 from .utils.rotate_exif import set_exif_orientation
@@ -23,6 +32,29 @@ logger = logging.getLogger(__name__)
 Modes = Literal["still", "video", "standby"]
 
 
+@dataclass
+class LoresConsumerStats:
+    fps: int
+    dropped_frames: int
+
+
+@dataclass
+class LoresControllerStats:
+    fps: int | None
+    quality: int
+    downscale: int
+    cpu_percent: float
+    reason: str
+
+
+@dataclass
+class LatencyStats:
+    count: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+
 @dataclass
 class BackendStats:
     """
@@ -33,23 +65,195 @@ class BackendStats:
     backend_name: str
     mode: str
     device_fps: int
+    lores_consumers: dict[str, LoresConsumerStats] = field(default_factory=dict)
+    lores_controller: LoresControllerStats | None = None
+    latencies: dict[str, LatencyStats] = field(default_factory=dict)
 
 
-@dataclass
-class LoresBroadcastRes:
-    # jpeg data as bytes
+class LatencySpans:
+    """Thread-safe rolling window of durations per stage (mode switch, capture, notify, ...) to find out which part is slow."""
+
+    def __init__(self, maxlen: int = 50):
+        self._maxlen = maxlen
+        self._spans: dict[str, deque[int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, start_ns: int, end_ns: int | None = None):
+        duration_ns = (end_ns or time.monotonic_ns()) - start_ns
+
+        with self._lock:
+            self._spans.setdefault(stage, deque(maxlen=self._maxlen)).append(duration_ns)
+
+    @contextmanager
+    def span(self, stage: str):
+        start_ns = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, start_ns)
+
+    def percentile(self, stage: str, q: float) -> float | None:
+        """seconds, None if the stage was not recorded yet"""
+        with self._lock:
+            durations = sorted(self._spans.get(stage, ()))
+
+        return durations[int(q * (len(durations) - 1))] * 1e-9 if durations else None
+
+    def get_stats(self) -> dict[str, LatencyStats]:
+        with self._lock:
+            spans = {stage: sorted(durations) for stage, durations in self._spans.items()}
+
+        def ms(duration_ns: int) -> float:
+            return round(duration_ns * 1e-6, 1)
+
+        return {
+            stage: LatencyStats(
+                count=len(durations),
+                p50_ms=ms(durations[int(0.50 * (len(durations) - 1))]),
+                p95_ms=ms(durations[int(0.95 * (len(durations) - 1))]),
+                max_ms=ms(durations[-1]),
+            )
+            for stage, durations in spans.items()
+        }
+
+
+@dataclass(frozen=True)
+class LoresFrame:
+    # monotonically increasing per subdevice, first frame is 1
+    seq: int
+    # time.monotonic_ns() when the frame was received from the camera
+    timestamp_ns: int
+    # jpeg data as bytes, orientation already applied
     data: bytes
-    # condition when frame is avail
-    condition: threading.Condition
+
+
+class LoresBroadcastRes:
+    """Small ring buffer per subdevice holding the latest lores frames.
+    Consumers remember the seq of the last frame they got and ask for a newer one, so they can
+    detect dropped frames and never receive the same frame twice."""
+
+    def __init__(self, orientation: Orientation | None = None, maxlen: int = 4, latencies: LatencySpans | None = None):
+        # orientation tagged once per frame on publish, so consumers share the same bytes
+        self.orientation = orientation
+        self._latencies = latencies
+
+        self._frames: deque[LoresFrame] = deque(maxlen=maxlen)
+        self._seq: int = 0
+        # condition when frame is avail
+        self.condition = threading.Condition()
+
+    @property
+    def seq(self) -> int:
+        """seq of the latest published frame, 0 if no frame published yet"""
+        with self.condition:
+            return self._seq
+
+    @property
+    def data(self) -> bytes:
+        """jpeg data of the latest frame, empty if no frame published yet"""
+        with self.condition:
+            return self._frames[-1].data if self._frames else b""
+
+    def publish(self, data: bytes):
+        """called by the backends producing thread for every new frame. The orientation is applied
+        once here instead of per consumer (every stream client, recorder, ...) in wait_for_lores_image"""
+        timestamp_ns = time.monotonic_ns()
+
+        if self.orientation:
+            try:
+                data = set_exif_orientation(data, self.orientation)
+            except Exception as exc:
+                logger.debug(f"could not set orientation on lores frame, publishing untagged: {exc}")
+
+            if self._latencies:
+                self._latencies.record("lores_orientation", timestamp_ns)
+
+        with self.condition:
+            self._seq += 1
+            self._frames.append(LoresFrame(seq=self._seq, timestamp_ns=timestamp_ns, data=data))
+            self.condition.notify_all()
+
+    def wait_for_frame(self, newer_than: int, timeout: float, latest: bool = False) -> LoresFrame:
+        """Return a frame with seq > newer_than. Does not block if such a frame is in the buffer already.
+
+        Args:
+            newer_than (int): seq of the last frame the consumer received
+            timeout (float): seconds to wait for a new frame before TimeoutError is raised
+            latest (bool): if True return the most recent frame (low latency, e.g. livestream),
+                otherwise the oldest frame in the buffer newer than newer_than (as few drops as possible, e.g. recorder)
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self._seq > newer_than, timeout=timeout):
+                raise TimeoutError("timeout receiving frames")
+
+            if latest:
+                return self._frames[-1]
+
+            return next(frame for frame in self._frames if frame.seq > newer_than)
 
 
 @dataclass
 class StillRequest:
     id: uuid.UUID
     subdevice_index: int
+    # backends deliver either the jpeg in memory (preferred) or a file they had to write anyway
+    result_bytes: bytes | None = None
     result_file: Path | None = None
     error: Exception | None = None
     condition: threading.Condition = threading.Condition()
+    # time.monotonic_ns() when requested, picked up by the backend and the result delivered
+    requested_ns: int = field(default_factory=time.monotonic_ns)
+    picked_ns: int | None = None
+    delivered_ns: int | None = None
+
+    def deliver(self, result_bytes: bytes | None = None, result_file: Path | None = None):
+        with self.condition:
+            self.result_bytes = result_bytes
+            self.result_file = result_file
+            self.delivered_ns = time.monotonic_ns()
+            self.condition.notify_all()
+
+
+@dataclass
+class BurstRequest:
+    """Capture number_captures stills back to back without returning to the queue in between.
+    Every jpeg is put into results as soon as it is captured, so the requester can process it while the next is captured."""
+
+    id: uuid.UUID
+    subdevice_index: int
+    number_captures: int
+    # seconds between the captures, 0 captures as fast as the camera delivers frames
+    interval: float = 0.0
+    # jpeg bytes for every capture, an exception if the burst failed
+    results: queue.Queue[bytes | Exception] = field(default_factory=queue.Queue)
+    captured: int = 0  # only changed by the backend's thread
+    cancelled: threading.Event = field(default_factory=threading.Event)  # set by the requester or on failure
+    requested_ns: int = field(default_factory=time.monotonic_ns)
+    picked_ns: int | None = None
+    _first_capture: float | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.cancelled.is_set() or self.captured >= self.number_captures
+
+    @property
+    def due(self) -> bool:
+        """True if the next capture should be taken now. Relative to the first capture, so the interval does not drift."""
+        if self._first_capture is None:
+            return True
+
+        return time.monotonic() >= self._first_capture + self.captured * self.interval
+
+    def deliver(self, jpeg_bytes: bytes):
+        if self._first_capture is None:
+            self._first_capture = time.monotonic()
+
+        self.captured += 1
+        self.results.put(jpeg_bytes)
+
+    def fail(self, exc: Exception):
+        self.cancelled.set()
+        self.results.put(exc)
 
 
 @dataclass
@@ -58,6 +262,15 @@ class MulticamRequest:
     result_files: list[Path] | None = None
     error: Exception | None = None
     condition: threading.Condition = threading.Condition()
+    requested_ns: int = field(default_factory=time.monotonic_ns)
+    picked_ns: int | None = None
+    delivered_ns: int | None = None
+
+    def deliver(self, result_files: list[Path]):
+        with self.condition:
+            self.result_files = result_files
+            self.delivered_ns = time.monotonic_ns()
+            self.condition.notify_all()
 
 
 @dataclass
@@ -122,6 +335,153 @@ class Framerate:
         return self._remaining_ns(target_fps) <= int(0.5e9 / target_fps)
 
 
+class LoresConsumer:
+    """Tracks the last frame a single consumer (stream client, recorder, ...) received
+    to request only newer frames and calculate the actual delivery rate to this consumer."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.last_seq: int = 0
+        self.dropped_frames: int = 0
+        self._framerate = Framerate()
+
+    def __str__(self):
+        return self.name
+
+    def delivered(self, frame: LoresFrame):
+        if self.last_seq and frame.seq > self.last_seq + 1:
+            self.dropped_frames += frame.seq - self.last_seq - 1
+
+        self.last_seq = frame.seq
+        self._framerate.add_frame()
+
+    def get_stats(self) -> LoresConsumerStats:
+        return LoresConsumerStats(fps=self._framerate.fps, dropped_frames=self.dropped_frames)
+
+
+class LoresController:
+    """
+    Adapts the lores framerate, jpeg quality and downscale factor of a backend to the demand and the cpu load.
+    The producing thread calls update() on every frame, the settings are reevaluated once per second and
+    changed by one step at a time. While a job is postprocessing, the lores is throttled to the floors.
+    Backends apply what they are able to, passthrough backends usually the framerate only.
+    If disabled, the lores runs at the framerate and the quality the backend used before adaptive control.
+    """
+
+    EVALUATE_INTERVAL = 1.0
+    DEMAND_TIMEOUT = 2.0
+
+    def __init__(self, default_quality: int = 85):
+        self._process = psutil.Process()
+        self._process.cpu_percent(None)  # first call returns 0.0 always, it's the reference for the next calls
+
+        self._lock = threading.Lock()
+        self._default_quality = default_quality
+        self._postprocessing: bool = False
+        self._last_evaluated: float = 0.0
+        self._last_demand: float | None = None
+        self._last_dropped_frames: int = 0
+
+        self._fps: int = appconfig.backends.livestream_framerate_max
+        self.quality: int = appconfig.backends.livestream_quality_max
+        self.downscale: int = 1
+        self.cpu_percent: float = 0.0
+        self.reason: str = "initial"
+
+        self._set_ceilings("initial")
+
+    @property
+    def fps(self) -> int | None:
+        """the adapted framerate, None if not adaptive so the backend keeps its own framerate"""
+        return self._fps if appconfig.backends.livestream_adaptive else None
+
+    def demand(self):
+        """called on every frame request, so the controller knows the livestream is actually consumed"""
+        now = time.monotonic()
+
+        if self._last_demand is None or now - self._last_demand > self.DEMAND_TIMEOUT:
+            with self._lock:
+                if self.reason == "no demand":
+                    # restore immediately, otherwise the first client sees the reduced framerate for several seconds
+                    self._fps = appconfig.backends.livestream_framerate_max
+                    self.reason = "demand returned"
+
+        self._last_demand = now
+
+    def set_postprocessing(self, active: bool):
+        with self._lock:
+            self._postprocessing = active
+            self._last_evaluated = 0.0  # reevaluate on next frame
+
+            if not active:
+                # restore immediately, otherwise stepping up from the floors takes several seconds
+                self._set_ceilings("postprocessing finished")
+
+    def update(self, consumers: list[LoresConsumer]):
+        now = time.monotonic()
+
+        with self._lock:
+            if now - self._last_evaluated < self.EVALUATE_INTERVAL:
+                return
+
+            self._last_evaluated = now
+            self._evaluate(now, consumers)
+
+    def get_stats(self) -> LoresControllerStats:
+        return LoresControllerStats(fps=self.fps, quality=self.quality, downscale=self.downscale, cpu_percent=self.cpu_percent, reason=self.reason)
+
+    def _set_ceilings(self, reason: str):
+        cfg = appconfig.backends
+        quality = cfg.livestream_quality_max if cfg.livestream_adaptive else self._default_quality
+        self._fps, self.quality, self.downscale, self.reason = cfg.livestream_framerate_max, quality, 1, reason
+
+    def _evaluate(self, now: float, consumers: list[LoresConsumer]):
+        cfg = appconfig.backends
+        # cpu of the whole app normalized to all cores, so it's comparable to the target
+        self.cpu_percent = round(self._process.cpu_percent(None) / (psutil.cpu_count() or 1), 1)
+
+        dropped_frames = sum(consumer.dropped_frames for consumer in consumers)
+        consumers_behind = dropped_frames > self._last_dropped_frames
+        self._last_dropped_frames = dropped_frames
+
+        if not cfg.livestream_adaptive:
+            self._set_ceilings("adaptive disabled")
+            return
+
+        if self._postprocessing:
+            self._fps, self.quality, self.downscale = cfg.livestream_framerate_min, cfg.livestream_quality_min, cfg.livestream_downscale_max
+            self.reason = "postprocessing"
+        elif self._last_demand is None or now - self._last_demand > self.DEMAND_TIMEOUT:
+            self._fps = cfg.livestream_framerate_min
+            self.reason = "no demand"
+        elif self.cpu_percent > cfg.livestream_cpu_target:
+            # reduce quality first, it's least visible, the framerate last.
+            if self.quality > cfg.livestream_quality_min:
+                self.quality = max(self.quality - 10, cfg.livestream_quality_min)
+            elif self.downscale < cfg.livestream_downscale_max:
+                self.downscale += 1
+            else:
+                self._fps = max(self._fps - 2, cfg.livestream_framerate_min)
+            self.reason = "cpu load"
+        elif consumers_behind:
+            self._fps = max(self._fps - 1, cfg.livestream_framerate_min)
+            self.reason = "consumers behind"
+        elif self.cpu_percent < cfg.livestream_cpu_target * 0.8:
+            # some hysteresis to the target to avoid oscillation. raise in reverse order of reduction
+            if self._fps < cfg.livestream_framerate_max:
+                self._fps = min(self._fps + 2, cfg.livestream_framerate_max)
+            elif self.downscale > 1:
+                self.downscale -= 1
+            else:
+                self.quality = min(self.quality + 10, cfg.livestream_quality_max)
+            self.reason = "headroom"
+
+        # config might have been changed in the meantime
+        self._fps = min(max(self._fps, cfg.livestream_framerate_min), cfg.livestream_framerate_max)
+        self.quality = min(max(self.quality, cfg.livestream_quality_min), cfg.livestream_quality_max)
+        self.downscale = min(max(self.downscale, 1), cfg.livestream_downscale_max)
+
+
 class ModeController:
     """
     Einfacher Mode-Controller mit:
@@ -139,6 +499,9 @@ class ModeController:
         self.active_mode: Modes | None = None
         self._last_live_request: float | None = time.monotonic()
         self._monitor_thread: StoppableThread | None = None
+        # a scheduled still mode is held against livestream video requests until the capture or the hold expired
+        self._still_hold_until: float | None = None
+        self._still_timer: threading.Timer | None = None
 
     def start(self):
         if self.idle_timeout:
@@ -152,6 +515,8 @@ class ModeController:
             self._monitor_thread.stop()
             self._monitor_thread.join()
 
+        self.cancel_scheduled_still()
+
     # ---------------------------------------------------------
     # Öffentliche API (kann aus jedem Thread aufgerufen werden)
     # ---------------------------------------------------------
@@ -164,6 +529,11 @@ class ModeController:
         """usually requested when creating a video but also for livestream. livestream request video on every frame to reset the timer.
         the stream thread needs to ensure a still capture is not interupted by another request to video!"""
         self.reset_standby_timer()  # on mode request always reset the timer, to avoid going to standby accidentally in race conditions
+
+        with self._lock:
+            if self._still_hold_until and time.monotonic() < self._still_hold_until:
+                return
+
         self.request_mode("video")
 
     def request_still(self):
@@ -173,6 +543,30 @@ class ModeController:
     def request_standby(self):
         self.request_mode("standby")
 
+    def schedule_still(self, delay: float, hold: float):
+        """switch to still mode in delay seconds and keep it for hold seconds, unless released earlier by the capture"""
+        self.cancel_scheduled_still()
+
+        def prearm():
+            with self._lock:
+                self._still_hold_until = time.monotonic() + hold
+            self.request_still()
+
+        self._still_timer = threading.Timer(delay, prearm)
+        self._still_timer.daemon = True
+        self._still_timer.start()
+
+    def cancel_scheduled_still(self):
+        if self._still_timer:
+            self._still_timer.cancel()
+            self._still_timer = None
+
+        self.release_still()
+
+    def release_still(self):
+        with self._lock:
+            self._still_hold_until = None
+
     def reset_standby_timer(self):
         with self._lock:
             self._last_live_request = time.monotonic()
@@ -223,12 +617,13 @@ class ModeController:
         logger.info(f"changing mode from {act} to {req} on backend {self.backend}")
 
         # Modewechsel durchführen
-        if req == "video":
-            self.backend._handle_switchmode_video_mode()
-        elif req == "still":
-            self.backend._handle_switchmode_still_mode()
-        elif req == "standby":
-            self.backend._handle_switchmode_standby()
+        with self.backend._latencies.span(f"switchmode_{req}"):
+            if req == "video":
+                self.backend._handle_switchmode_video_mode()
+            elif req == "still":
+                self.backend._handle_switchmode_still_mode()
+            elif req == "standby":
+                self.backend._handle_switchmode_standby()
 
         # Mode ist jetzt aktiv
         with self._lock:
@@ -236,6 +631,15 @@ class ModeController:
 
 
 class AbstractBackend(ResilientService, ABC):
+    # backends handling BurstRequests in their run_service set this, others fall back to sequential still captures
+    supports_burst: bool = False
+    # assumed still mode switch time until it was measured once
+    DEFAULT_SWITCH_ESTIMATE = 0.5
+    # keep still mode after the countdown if the capture is late, afterwards the livestream may take over again
+    PRESWITCH_HOLD_AFTER = 5.0
+    # jpeg quality of the livestream encoded by the backend, if the livestream is not adaptive
+    LORES_QUALITY = 85
+
     @abstractmethod
     def _handle_switchmode_standby(self):
         """called internally by supervising if liveview frames are requested"""
@@ -257,13 +661,16 @@ class AbstractBackend(ResilientService, ABC):
 
         # statisitics attributes
         self._framerate: Framerate = Framerate()
+        self._latencies = LatencySpans()
 
         self._mode_machine = ModeController(self, idle_timeout=self._idle_timeout)
 
         # lores broadcast and ...
-        self._lores_data = [LoresBroadcastRes(data=b"", condition=threading.Condition()) for _ in range(self._num_subdevices)]
+        self._lores_data = [LoresBroadcastRes(orientation=self._orientation, latencies=self._latencies) for _ in range(self._num_subdevices)]
+        self._lores_consumers: weakref.WeakSet[LoresConsumer] = weakref.WeakSet()
+        self._lores_controller = LoresController(self.LORES_QUALITY)
         # ... hires queue
-        self._hires_queue: deque[StillRequest | MulticamRequest] = deque(maxlen=1)
+        self._hires_queue: deque[StillRequest | MulticamRequest | BurstRequest] = deque(maxlen=1)
         self._hires_lock = threading.Lock()
 
         super().__init__()
@@ -279,6 +686,9 @@ class AbstractBackend(ResilientService, ABC):
             backend_name=self.__class__.__name__,
             mode=self._mode_machine.active_mode or "unknown",
             device_fps=self._framerate.fps,
+            lores_consumers={f"{consumer.name}#{id(consumer):x}": consumer.get_stats() for consumer in list(self._lores_consumers)},
+            lores_controller=self._lores_controller.get_stats(),
+            latencies=self._latencies.get_stats(),
         )
 
         return self._extend_stats(base)
@@ -289,6 +699,36 @@ class AbstractBackend(ResilientService, ABC):
     def _frame_tick(self):
         """call by backends implementation when frame is delivered, so the fps can be calculated..."""
         self._framerate.add_frame()
+        self._lores_controller.update(list(self._lores_consumers))
+
+    def _pop_hires_request(self) -> StillRequest | MulticamRequest | BurstRequest | None:
+        """called by the backends implementation to get the next hires request to process"""
+        with self._hires_lock:
+            req = self._hires_queue.popleft() if self._hires_queue else None
+
+        if req:
+            req.picked_ns = time.monotonic_ns()
+            self._latencies.record(f"{self._request_stage(req)}_queue", req.requested_ns, req.picked_ns)
+
+        return req
+
+    @staticmethod
+    def _request_stage(req: StillRequest | MulticamRequest | BurstRequest) -> str:
+        return {StillRequest: "still", MulticamRequest: "multicam", BurstRequest: "burst"}[type(req)]
+
+    def _record_request_latencies(self, req: StillRequest | MulticamRequest):
+        """on the requesting thread, once the result was received"""
+        stage = self._request_stage(req)
+        woken_ns = time.monotonic_ns()
+
+        if req.picked_ns and req.delivered_ns:
+            # mode switch, exposure and download
+            self._latencies.record(f"{stage}_capture", req.picked_ns, req.delivered_ns)
+            self._latencies.record(f"{stage}_notify", req.delivered_ns, woken_ns)
+
+    def signal_postprocessing(self, active: bool):
+        """a job is postprocessing, lores is throttled to leave the cpu to the processing"""
+        self._lores_controller.set_postprocessing(active)
 
     @abstractmethod
     def start(self):
@@ -302,6 +742,16 @@ class AbstractBackend(ResilientService, ABC):
         self._mode_machine.stop()
         super().stop()
 
+    def schedule_still_mode(self, countdown: float):
+        """Switch to still mode ahead of time, so the camera is ready when the countdown of the given seconds ends.
+        The switch is started the measured switch time (p95, with some margin) before the end."""
+        estimate = self._latencies.percentile("switchmode_still", 0.95)
+        lead = (estimate if estimate is not None else self.DEFAULT_SWITCH_ESTIMATE) * 1.2 + 0.1
+        delay = max(0.0, countdown - lead)
+
+        logger.info(f"scheduled switch to still mode in {delay:.2f}s, countdown {countdown:.2f}s, estimated switch time {estimate}s")
+        self._mode_machine.schedule_still(delay, hold=countdown - delay + self.PRESWITCH_HOLD_AFTER)
+
     def wait_for_multicam_files(self) -> list[Path]:
         if self._num_subdevices < 2:
             raise RuntimeError(f"cannot get multicam files as {self} has only {self._num_subdevices} subdevices but needs at least 2.")
@@ -310,64 +760,147 @@ class AbstractBackend(ResilientService, ABC):
 
         self._mode_machine.request_still()
 
-        with self._hires_lock:
-            self._hires_queue.append(req)
+        try:
+            with self._hires_lock:
+                self._hires_queue.append(req)
+
+            with req.condition:
+                ok = req.condition.wait_for(lambda: req.delivered_ns is not None or req.error is not None, timeout=8)
 
-        with req.condition:
-            ok = req.condition.wait(timeout=8)
+                if not ok:
+                    raise TimeoutError("timeout waiting for hires frame")
+                if req.error:
+                    raise req.error
 
-            if not ok:
-                raise TimeoutError("timeout waiting for hires frame")
-            if req.error:
-                raise req.error
+                self._record_request_latencies(req)
 
-            filepaths = req.result_files
-            assert filepaths
+                filepaths = req.result_files
+                assert filepaths
 
-            for filepath in filepaths:
-                set_exif_orientation(filepath, self._orientation)
+                with self._latencies.span("multicam_orientation"):
+                    for filepath in filepaths:
+                        set_exif_orientation(filepath, self._orientation)
 
-            return filepaths
+                self._latencies.record("multicam_total", req.requested_ns)
 
-    def wait_for_still_file(self, index_subdevice: int = 0) -> Path:
+                return filepaths
+        finally:
+            self._mode_machine.cancel_scheduled_still()
+
+    def wait_for_still_file(self, index_subdevice: int = 0, destination: Path | str = "tmp") -> Path:
+        """Capture a still. Stills handed over in memory are written to destination, jobs write directly into the originals."""
         req = StillRequest(uuid.uuid4(), subdevice_index=index_subdevice)
 
         self._mode_machine.request_still()
 
+        try:
+            with self._hires_lock:
+                self._hires_queue.append(req)
+
+            with req.condition:
+                ok = req.condition.wait_for(lambda: req.delivered_ns is not None or req.error is not None, timeout=8)
+
+                if not ok:
+                    raise TimeoutError("timeout waiting for hires frame")
+                if req.error:
+                    raise req.error
+
+                self._record_request_latencies(req)
+
+                with self._latencies.span("still_orientation"):
+                    if req.result_bytes is not None:
+                        filepath = self._write_still(req.result_bytes, destination)
+                    else:
+                        filepath = req.result_file
+                        assert filepath
+
+                        set_exif_orientation(filepath, self._orientation)
+
+                self._latencies.record("still_total", req.requested_ns)
+
+                return filepath
+        finally:
+            self._mode_machine.cancel_scheduled_still()
+
+    def wait_for_burst_files(
+        self, number_captures: int, interval: float = 0.0, index_subdevice: int = 0, destination: Path | str = "tmp"
+    ) -> Generator[Path, None, None]:
+        """Capture number_captures stills in one request. Yields the filepath of every still as soon as it is captured.
+
+        Args:
+            number_captures (int): number of stills to capture
+            interval (float): seconds between two captures, 0 to capture as fast as possible
+            index_subdevice (int): the subdevice to capture from
+            destination (Path | str): folder the stills are written to
+        """
+        if not self.supports_burst:
+            for i in range(number_captures):
+                if i > 0:
+                    time.sleep(interval)
+
+                yield self.wait_for_still_file(index_subdevice, destination)
+
+            return
+
+        req = BurstRequest(uuid.uuid4(), subdevice_index=index_subdevice, number_captures=number_captures, interval=interval)
+
+        self._mode_machine.request_still()
+
         with self._hires_lock:
             self._hires_queue.append(req)
 
-        with req.condition:
-            ok = req.condition.wait(timeout=8)
+        try:
+            for _ in range(number_captures):
+                try:
+                    result = req.results.get(timeout=8 + interval)
+                except queue.Empty:
+                    raise TimeoutError("timeout waiting for burst frame") from None
 
-            if not ok:
-                raise TimeoutError("timeout waiting for hires frame")
-            if req.error:
-                raise req.error
+                if isinstance(result, Exception):
+                    raise result
 
-            filepath = req.result_file
-            assert filepath
+                yield self._write_still(result, destination)
+        finally:
+            # if the requester stops early (error, generator closed), the backend stops capturing also.
+            req.cancelled.set()
+            self._mode_machine.cancel_scheduled_still()
 
-            set_exif_orientation(filepath, self._orientation)
+    def _write_still(self, jpeg_bytes: bytes, destination: Path | str) -> Path:
+        # in-memory handoff: splice the orientation into the exif segment and write the file once directly to its final place.
+        # stills of a burst can have the same timestamp, the random part keeps them from overwriting each other.
+        with NamedTemporaryFile(mode="wb", delete=False, dir=destination, prefix=f"{filename_str_time()}_", suffix=".jpg") as f:
+            f.write(set_exif_orientation(jpeg_bytes, self._orientation))
 
-            return filepath
+            return Path(f.name)
 
-    def wait_for_lores_image(self, index_subdevice: int = 0) -> bytes:
+    def wait_for_lores_frame(self, index_subdevice: int = 0, consumer: LoresConsumer | None = None, latest: bool = True) -> LoresFrame:
+        """Wait for a frame newer than the last one the consumer received. Without consumer, wait for the next frame published."""
 
-        if index_subdevice > len(self._lores_data):
+        if index_subdevice >= len(self._lores_data):
             raise RuntimeError(f"streaming from subdevice={index_subdevice} not possible because there are only {len(self._lores_data)} available.")
 
         self._mode_machine.request_video()
+        self._lores_controller.demand()
 
-        with self._lores_data[index_subdevice].condition:
-            if not self._lores_data[index_subdevice].condition.wait(timeout=2.0):
-                raise TimeoutError("timeout receiving frames")
+        lores_data = self._lores_data[index_subdevice]
+
+        if consumer is None:
+            frame = lores_data.wait_for_frame(newer_than=lores_data.seq, timeout=2.0, latest=latest)
+        else:
+            self._lores_consumers.add(consumer)
+
+            # a new consumer starts with the most recent frame rather than old ones in the buffer
+            frame = lores_data.wait_for_frame(newer_than=consumer.last_seq, timeout=2.0, latest=latest or not consumer.last_seq)
+            consumer.delivered(frame)
 
-            img = self._lores_data[index_subdevice].data
+        # age of the frame when handed to the consumer, from received by the backend
+        self._latencies.record("lores_delivery", frame.timestamp_ns)
 
-            img = set_exif_orientation(img, self._orientation)
+        return frame
 
-            return img
+    def wait_for_lores_image(self, index_subdevice: int = 0, consumer: LoresConsumer | None = None) -> bytes:
+        # orientation is already applied when the frame was published
+        return self.wait_for_lores_frame(index_subdevice, consumer).data
 
     @abstractmethod
     def setup_resource(self):
@@ -107,10 +107,10 @@ class DigicamcontrolBackend(AbstractBackend):
 
         session = requests.Session()
         preview_failcounter = 0
+        last_frame = b""  # published frames carry the orientation, so compare against the raw last one
 
         while not self._stop_event.is_set():  # repeat until stopped
-            with self._hires_lock:
-                req = self._hires_queue.popleft() if self._hires_queue else None
+            req = self._pop_hires_request()
 
             if req:
                 if isinstance(req, StillRequest):
@@ -158,9 +158,7 @@ class DigicamcontrolBackend(AbstractBackend):
                         logger.critical("finally failed after 10 attempts to capture image!")
                         raise RuntimeError("finally failed after 10 attempts to capture image!")
 
-                    with req.condition:
-                        req.result_file = captured_filepath
-                        req.condition.notify_all()
+                    req.deliver(result_file=captured_filepath)
                 else:
                     logger.warning(f"this backend does not support {type(req)} requests")
                     continue
@@ -177,7 +175,7 @@ class DigicamcontrolBackend(AbstractBackend):
                     r = session.get(f"{self._config.base_url}/liveview.jpg")
                     r.raise_for_status()
 
-                    if self._lores_data[0].data and (self._lores_data[0].data == r.content):
+                    if last_frame and (last_frame == r.content):
                         raise RuntimeError(
                             "received same frame again - digicamcontrol liveview might be closed or delivers "
                             "low framerate only. Consider to reduce resolution or Livepreview Framerate."
@@ -199,15 +197,14 @@ class DigicamcontrolBackend(AbstractBackend):
                 else:
                     preview_failcounter = 0
 
-                with self._lores_data[0].condition:
-                    assert r.content
-                    self._lores_data[0].data = r.content
-                    self._lores_data[0].condition.notify_all()
+                assert r.content
+                last_frame = r.content
+                self._lores_data[0].publish(r.content)
 
                 self._frame_tick()
 
                 # limit fps to a reasonable amount. otherwise getting liveview.jpg would lead to 100% cpu as it's getting images way too often.
-                self._framerate.wait_until_fps(10)
+                self._framerate.wait_until_fps(min(10, self._lores_controller.fps or 10))
 
             # wait for trigger...
             time.sleep(0.05)
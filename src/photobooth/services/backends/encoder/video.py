@@ -1,18 +1,25 @@
 import io
 import logging
-import time
+import os
+import re
+import subprocess
+import sys
 from fractions import Fraction
+from functools import cache
 from pathlib import Path
 from threading import Event, Lock
 
 import av
 import av.logging
+from av.video.reformatter import ColorRange, VideoReformatter
 from PIL import Image
+from simplejpeg import decode_jpeg_header
 
 from ....appconfig import appconfig
 from ....utils.helper import filename_str_time
+from ....utils.metrics_timer import MetricsTimer
 from ....utils.stoppablethread import StoppableThread
-from ..abstractbackend import AbstractBackend
+from ..abstractbackend import AbstractBackend, LoresConsumer
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +27,90 @@ logger = logging.getLogger(__name__)
 av.logging.set_level(av.logging.INFO)
 
 
+@cache
+def _ffmpeg_passthrough_option() -> str:
+    """the option to keep the timestamps of the input. -fps_mode is available since ffmpeg 5.1, older versions only know -vsync
+    which is deprecated since."""
+    try:
+        version_output = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError) as exc:
+        logger.warning(f"could not determine ffmpeg version: {exc}")
+        return "-fps_mode"
+
+    # release builds are like "ffmpeg version 5.1.2-..." or "n5.1.2", git builds "N-112233-g..." are recent always.
+    match = re.search(r"ffmpeg version n?(\d+)\.(\d+)", version_output)
+    if match and (int(match.group(1)), int(match.group(2))) < (5, 1):
+        return "-vsync"
+
+    return "-fps_mode"
+
+
+class DeferredTranscode:
+    """
+    Transcodes a mjpeg passthrough recording to h264/faststart mp4 in a separate ffmpeg process
+    with low priority, so the livestream and ui are not slowed down. The input is removed when finished.
+    """
+
+    def __init__(self, video_in: Path, video_out: Path):
+        self._video_in = video_in
+        self._video_out = video_out
+
+        command = [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",  # print only if at least error level - still all goes to the logfile.
+            "-y",
+            "-i",
+            str(video_in),
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-b:v",
+            f"{appconfig.mediaprocessing.video_bitrate}k",
+            _ffmpeg_passthrough_option(),
+            "passthrough",  # keep the wallclock timestamps of the recording
+        ]
+        if appconfig.mediaprocessing.video_compatibility_mode:
+            command += ["-pix_fmt", "yuv420p"]
+        command += ["-movflags", "+faststart", str(video_out)]
+
+        if sys.platform == "win32":
+            self._process = subprocess.Popen(command, creationflags=subprocess.BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            # lower the priority after spawning, a preexec_fn is not safe to use in a threaded app.
+            self._process = subprocess.Popen(command)
+            try:
+                os.setpriority(os.PRIO_PROCESS, self._process.pid, 10)
+            except OSError as exc:
+                logger.warning(f"could not lower the priority of the transcode: {exc}")
+
+        logger.info(f"transcoding {video_in} to {video_out} in background")
+
+    def wait(self, timeout: float | None = None) -> Path:
+        with MetricsTimer(f"{self.__class__.__name__}.wait"):
+            code = self._process.wait(timeout)
+
+        if code != 0:
+            raise RuntimeError(f"error transcoding video {self._video_in}, ffmpeg exit code ({code}).")
+
+        self._video_in.unlink(missing_ok=True)
+
+        return self._video_out
+
+    def abort(self):
+        """stop the transcode if still running and remove the input and the output, the video is not used anymore."""
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+
+        self._video_in.unlink(missing_ok=True)
+        self._video_out.unlink(missing_ok=True)
+
+        logger.info(f"discarded transcoding {self._video_in} to {self._video_out}")
+
+
 class SoftwareVideoRecorder:
     """
     A standalone video recorder that:
@@ -36,6 +127,8 @@ class SoftwareVideoRecorder:
         self._output_filepath: Path | None = None
         self._lock = Lock()
         self._capture_started = Event()
+        self._passthrough: bool = False
+        self._transcodes: dict[Path, DeferredTranscode] = {}
 
     def start_recording(self, video_framerate: int, subdevice_index: int = 0) -> Path:
         """
@@ -48,7 +141,9 @@ class SoftwareVideoRecorder:
             self._output_filepath = Path("tmp", f"{filename_str_time()}_{self._backend.__class__.__name__}_video").with_suffix(".mp4")
             self._capture_started.clear()
 
-            self._thread = StoppableThread(name="SoftVideoRec", target=self._thread_fun, args=(video_framerate, subdevice_index), daemon=True)
+            self._passthrough = appconfig.mediaprocessing.video_passthrough_recording
+            target = self._thread_fun_passthrough if self._passthrough else self._thread_fun
+            self._thread = StoppableThread(name="SoftVideoRec", target=target, args=(video_framerate, subdevice_index), daemon=True)
             self._thread.start()
 
             # halt the thread requesting the recording until it actually started. this way we get more accurate duration videos.
@@ -60,20 +155,104 @@ class SoftwareVideoRecorder:
 
     def stop_recording(self):
         with self._lock:
-            if self._thread:
-                self._thread.stop()
-                self._thread.join()
+            try:
+                if self._thread:
+                    self._thread.stop()
+                    self._thread.join()
 
-            self._capture_started.clear()
-            self._thread = None
+                    if self._passthrough:
+                        # start transcoding to the final file in background, the mjpeg recording is removed after.
+                        assert self._output_filepath
+                        self._transcodes[self._output_filepath] = DeferredTranscode(self._output_filepath.with_suffix(".mkv"), self._output_filepath)
+            finally:
+                # also if the transcode could not be started, otherwise no recording could be started anymore
+                self._capture_started.clear()
+                self._thread = None
+
+    def wait_for_video_file(self, filepath: Path, timeout: float | None = None) -> Path:
+        """Returns the filepath once the video is ready. For passthrough recordings this blocks until the background transcode finished."""
+        with self._lock:
+            transcode = self._transcodes.pop(filepath, None)
+
+        if transcode:
+            try:
+                return transcode.wait(timeout)
+            except Exception:
+                transcode.abort()
+                raise
+
+        return filepath
+
+    def discard_video_file(self, filepath: Path):
+        """Discard a recording that is not processed, a background transcode of a passthrough recording is stopped and its files removed."""
+        with self._lock:
+            transcode = self._transcodes.pop(filepath, None)
+
+        if transcode:
+            transcode.abort()
+
+    def abort_transcodes(self):
+        """stop all background transcodes that were not waited for, used on shutdown."""
+        with self._lock:
+            transcodes = list(self._transcodes.values())
+            self._transcodes.clear()
+
+        for transcode in transcodes:
+            transcode.abort()
+
+    def _thread_fun_passthrough(self, video_framerate: int, subdevice_index: int):
+        """copy the lores jpeg frames as they are into a mjpeg container, no decoding/encoding at all."""
+        assert self._thread
+        assert self._output_filepath
+
+        logger.info("SoftwareVideoRecorder: start passthrough")
+
+        consumer = LoresConsumer("recorder")
+
+        first_frame = self._decode_frame(av.CodecContext.create("mjpeg", "r"), self._backend.wait_for_lores_image(subdevice_index))
+
+        with av.open(self._output_filepath.with_suffix(".mkv"), mode="w") as container:
+            stream = container.add_stream("mjpeg", rate=video_framerate)
+            stream.width = first_frame.width
+            stream.height = first_frame.height
+            stream.pix_fmt = first_frame.format.name
+            timebase_res = 90000
+            stream.time_base = Fraction(1, timebase_res)
+
+            # wallclock timestamps from the frames capture time
+            start_wallclock_ns = self._backend.wait_for_lores_frame(subdevice_index, consumer).timestamp_ns
+
+            self._capture_started.set()
+
+            while not self._thread.stopped():
+                lores_frame = self._backend.wait_for_lores_frame(subdevice_index, consumer, latest=False)
+
+                # the adaptive livestream may reduce the resolution during the recording, the stream keeps the size of the first frame
+                packet = av.Packet(self._fit_jpeg(lores_frame.data, (stream.width, stream.height)))
+                packet.stream = stream
+                packet.time_base = Fraction(1, timebase_res)  # not stream.time_base, the muxer changes it to the containers timebase
+                packet.pts = packet.dts = int((lores_frame.timestamp_ns - start_wallclock_ns) * 1e-9 * timebase_res)
+                packet.is_keyframe = True
+
+                container.mux(packet)
+
+        logger.info(f"SoftwareVideoRecorder: finished passthrough, {consumer.dropped_frames} frames dropped")
 
     def _thread_fun(self, video_framerate: int, subdevice_index: int):
         assert self._thread
 
         logger.info("SoftwareVideoRecorder: start")
 
-        frame_bytes = self._backend.wait_for_lores_image(subdevice_index)
-        width, height = Image.open(io.BytesIO(frame_bytes)).size
+        # request frames in order (not only the latest) so the recording does not skip frames if encoding stalls briefly
+        consumer = LoresConsumer("recorder")
+
+        # decode the jpeg frames by ffmpeg's mjpeg decoder straight into yuv planes. compared to decoding by PIL to RGB
+        # and converting back to yuv for h264 this avoids the rgb round trip, only the range is adjusted (jpeg full->mpeg limited).
+        decoder = av.CodecContext.create("mjpeg", "r")
+        reformatter = VideoReformatter()
+
+        first_frame = self._decode_frame(decoder, self._backend.wait_for_lores_image(subdevice_index))
+        width, height = first_frame.width, first_frame.height
 
         with av.open(self._output_filepath, mode="w", options={"movflags": "faststart"}) as container:
             stream = container.add_stream("h264", rate=video_framerate, options={})
@@ -94,20 +273,25 @@ class SoftwareVideoRecorder:
 
             stream.codec_context.bit_rate = appconfig.mediaprocessing.video_bitrate * 1000
 
-            # This is the key: ffmpeg -use_wallclock_as_timestamps
-            self._backend.wait_for_lores_image(subdevice_index)
-            start_wallclock = time.monotonic()
+            # This is the key: ffmpeg -use_wallclock_as_timestamps, using the capture timestamp of the frames
+            start_wallclock_ns = self._backend.wait_for_lores_frame(subdevice_index, consumer).timestamp_ns
 
             self._capture_started.set()
 
             while not self._thread.stopped():
-                frame_bytes = self._backend.wait_for_lores_image(subdevice_index)
-                now = time.monotonic()
+                lores_frame = self._backend.wait_for_lores_frame(subdevice_index, consumer, latest=False)
 
-                pil_img = Image.open(io.BytesIO(frame_bytes))
-                video_frame: av.VideoFrame = av.VideoFrame.from_image(pil_img)
+                # the adaptive livestream may reduce the resolution during the recording, scaled to the stream's size if so
+                video_frame = reformatter.reformat(
+                    self._decode_frame(decoder, lores_frame.data),
+                    width=width,
+                    height=height,
+                    format="yuv420p",
+                    src_color_range=ColorRange.JPEG,
+                    dst_color_range=ColorRange.MPEG,
+                )
                 # Compute wallclock timestamp
-                pts_seconds = now - start_wallclock
+                pts_seconds = (lores_frame.timestamp_ns - start_wallclock_ns) * 1e-9
                 video_frame.time_base = stream.time_base
                 video_frame.pts = int(pts_seconds / stream.time_base)
 
@@ -118,4 +302,29 @@ class SoftwareVideoRecorder:
             for packet in stream.encode():
                 container.mux(packet)
 
-        logger.info("SoftwareVideoRecorder: finished")
+        logger.info(f"SoftwareVideoRecorder: finished, {consumer.dropped_frames} frames dropped")
+
+    @staticmethod
+    def _fit_jpeg(jpeg_bytes: bytes, size: tuple[int, int]) -> bytes:
+        """the jpeg scaled to size. Returned unchanged if it has the size already, which is the usual case."""
+        height, width, _, _ = decode_jpeg_header(jpeg_bytes)
+        if (width, height) == size:
+            return jpeg_bytes
+
+        with Image.open(io.BytesIO(jpeg_bytes)) as image:
+            jpeg_bytesio = io.BytesIO()
+            image.resize(size, Image.Resampling.BILINEAR).save(jpeg_bytesio, format="JPEG", quality=85)
+
+        return jpeg_bytesio.getvalue()
+
+    @staticmethod
+    def _decode_frame(decoder: av.CodecContext, jpeg_bytes: bytes) -> av.VideoFrame:
+        # no frame threading on the decoder, so every packet results in exactly one frame without delay
+        frames = decoder.decode(av.Packet(jpeg_bytes))
+        if not frames:
+            raise RuntimeError("could not decode lores frame")
+
+        frame = frames[0]
+        assert isinstance(frame, av.VideoFrame)
+
+        return frame
@@ -6,10 +6,7 @@ Gphoto2 backend implementation
 import logging
 import os
 import time
-from pathlib import Path
-from tempfile import NamedTemporaryFile
 
-from ...utils.helper import filename_str_time
 from ..config.groups.cameras import GroupCameraGphoto2
 from .abstractbackend import AbstractBackend, StillRequest
 
@@ -162,8 +159,7 @@ class Gphoto2Backend(AbstractBackend):
         self._handle_switchmode_video_mode()
 
         while not self._stop_event.is_set():  # repeat until stopped
-            with self._hires_lock:
-                req = self._hires_queue.popleft() if self._hires_queue else None
+            req = self._pop_hires_request()
 
             if req:
                 if isinstance(req, StillRequest):
@@ -226,18 +222,8 @@ class Gphoto2Backend(AbstractBackend):
                     # read from camera
                     try:
                         # only capture one pic and return to lores streaming afterwards
-                        filepath = Path(
-                            NamedTemporaryFile(
-                                mode="wb",
-                                delete=False,
-                                dir="tmp",
-                                prefix=f"{filename_str_time()}_gphoto2_",
-                                suffix=".jpg",
-                            ).name
-                        )
-
                         camera_file = self._camera.file_get(file_to_download[0], file_to_download[1], gp.GP_FILE_TYPE_NORMAL)  # pyright: ignore [reportAttributeAccessIssue]
-                        camera_file.save(str(filepath))
+                        img_bytes = memoryview(camera_file.get_data_and_size()).tobytes()
 
                     except gp.GPhoto2Error as exc:
                         logger.critical(f"error reading camera file! check logs for errors. {exc}")
@@ -246,9 +232,7 @@ class Gphoto2Backend(AbstractBackend):
                         time.sleep(0.6)  # if it fails before next round, wait little because it might fail fast again
                         continue
 
-                    with req.condition:
-                        req.result_file = filepath
-                        req.condition.notify_all()
+                    req.deliver(result_bytes=img_bytes)
                 else:
                     logger.warning(f"this backend does not support {type(req)} requests")
                     continue
@@ -265,16 +249,14 @@ class Gphoto2Backend(AbstractBackend):
                 # (ptp_usb_getresp [usb.c:516]) PTP_OC 0x9153 receiving resp failed: Camera Not Ready (0xa102) (port_log.py:20)
                 # in the logs. to avoid that, we just sleep a bit here effectively frame limiting and
                 # giving gphoto2 time to settle and avoid flooded logs.
-                self._framerate.wait_until_fps(25)
+                self._framerate.wait_until_fps(min(25, self._lores_controller.fps or 25))
 
                 try:
                     camera_file = self._camera.capture_preview()
                     self._frame_tick()
                     img_bytes = memoryview(camera_file.get_data_and_size()).tobytes()
 
-                    with self._lores_data[0].condition:
-                        self._lores_data[0].data = img_bytes
-                        self._lores_data[0].condition.notify_all()
+                    self._lores_data[0].publish(img_bytes)
 
                 except Exception as exc:
                     preview_failcounter += 1
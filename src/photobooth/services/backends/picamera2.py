@@ -8,7 +8,6 @@ import logging
 import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from tempfile import NamedTemporaryFile
 from threading import Lock
 
 from libcamera import Transform, controls  # type: ignore
@@ -18,7 +17,6 @@ from picamera2.encoders import H264Encoder, MJPEGEncoder, Quality  # type: ignor
 from picamera2.outputs import FileOutput, PyavOutput  # type: ignore
 
 from ...appconfig import appconfig
-from ...utils.helper import filename_str_time
 from ..config.groups.cameras import GroupCameraPicamera2
 from .abstractbackend import AbstractBackend, BackendStats, StillRequest
 
@@ -37,9 +35,7 @@ class PicamLoresData(io.BufferedIOBase):
         self.lores_data = lores_data
 
     def write(self, buf) -> int:
-        with self.lores_data[0].condition:
-            self.lores_data[0].data = buf
-            self.lores_data[0].condition.notify_all()
+        self.lores_data[0].publish(buf)
 
         return len(buf)
 
@@ -326,8 +322,7 @@ class Picamera2Backend(AbstractBackend):
         while not self._stop_event.is_set():  # repeat until stopped
             self._mode_machine.process_switchmode()
 
-            with self._hires_lock:
-                req = self._hires_queue.popleft() if self._hires_queue else None
+            req = self._pop_hires_request()
 
             if req:
                 if isinstance(req, StillRequest):
@@ -337,21 +332,11 @@ class Picamera2Backend(AbstractBackend):
                     self._mode_machine.process_switchmode("still")
 
                     # capture hq picture
-                    filepath = Path(
-                        NamedTemporaryFile(
-                            mode="wb",
-                            delete=False,
-                            dir="tmp",
-                            prefix=f"{filename_str_time()}_picamera2_",
-                            suffix=".jpg",
-                        ).name
-                    )
                     # https://github.com/raspberrypi/picamera2/issues/1125#issuecomment-2387829290 fixed now, so use simple capture_file again
-                    _ = self._picamera2.capture_file(filepath, wait=1.5)  # type: ignore
+                    jpeg_bytesio = io.BytesIO()
+                    _ = self._picamera2.capture_file(jpeg_bytesio, format="jpeg", wait=1.5)  # type: ignore
 
-                    with req.condition:
-                        req.result_file = filepath
-                        req.condition.notify_all()
+                    req.deliver(result_bytes=jpeg_bytesio.getvalue())
                 else:
                     logger.warning(f"this backend does not support {type(req)} requests")
                     continue
@@ -5,14 +5,20 @@ Virtual Camera backend for testing.
 import logging
 import mmap
 import time
+from collections.abc import Generator
+from datetime import datetime
 from itertools import cycle
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 
+import cv2
+import numpy as np
+from simplejpeg import encode_jpeg_yuv_planes
+
 from ...utils.helper import filename_str_time
 from ...utils.stoppablethread import StoppableThread
 from ..config.groups.cameras import GroupCameraVirtual
-from .abstractbackend import AbstractBackend, MulticamRequest, StillRequest
+from .abstractbackend import AbstractBackend, BurstRequest, MulticamRequest, StillRequest
 
 logger = logging.getLogger(__name__)
 
@@ -51,7 +57,98 @@ class CyclicImageSource:
                     yield stream_mmap_obj.read(slice_chunk[1])
 
 
+class SyntheticImageSource:
+    """
+    Load generator: a pool of synthetic frames of any resolution is generated once into an anonymous mmap,
+    so delivering frames costs nothing but slicing the pool. Optionally a timestamp is burned into every frame,
+    for that the raw yuv frames are kept in the pool and every frame is encoded on the fly.
+    """
+
+    POOL_SIZE = 25
+    # limit the raw pool, a 4k yuv420 frame is 12MB
+    POOL_RAW_MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, width: int, height: int, quality: int, timestamp: bool):
+        # yuv420 needs even dimensions
+        self._width = width // 2 * 2
+        self._height = height // 2 * 2
+        self._quality = quality
+        self._timestamp = timestamp
+
+        self._frame_size = self._width * self._height * 3 // 2
+        pool_size = min(self.POOL_SIZE, max(2, self.POOL_RAW_MAX_BYTES // self._frame_size)) if timestamp else self.POOL_SIZE
+
+        self._pool: mmap.mmap | None = None
+        self._chunks: list[tuple[int, int]] = []  # offset, len
+
+        t0 = time.monotonic()
+        self.__generate_pool(pool_size)
+        logger.info(f"generated {pool_size} synthetic frames {self._width}x{self._height} in {round(time.monotonic() - t0, 1)}s")
+
+    def __generate_frame(self, index: int, noise: np.ndarray) -> np.ndarray:
+        """yuv420p frame as one plane like ffmpeg. diagonal gradient moving per frame plus fixed noise, so it compresses like a real image"""
+        yy, xx = np.ogrid[: self._height, : self._width]
+        y_plane = ((xx + yy // 2 + index * 16) % 256).astype(np.uint8) ^ noise
+
+        yyc, xxc = np.ogrid[: self._height // 2, : self._width // 2]
+        u_plane = np.broadcast_to(((xxc * 8 // self._width) * 16 + 64).astype(np.uint8), (self._height // 2, self._width // 2))
+        v_plane = np.broadcast_to(((yyc * 8 // self._height) * 16 + 64).astype(np.uint8), (self._height // 2, self._width // 2))
+
+        return np.concatenate((y_plane.ravel(), u_plane.ravel(), v_plane.ravel()))
+
+    def __encode(self, frame: np.ndarray) -> bytes:
+        w, h = self._width, self._height
+
+        return encode_jpeg_yuv_planes(
+            Y=frame[: w * h].reshape(h, w),
+            U=frame[w * h : w * h * 5 // 4].reshape(h // 2, w // 2),
+            V=frame[w * h * 5 // 4 :].reshape(h // 2, w // 2),
+            quality=self._quality,
+            fastdct=True,
+        )
+
+    def __generate_pool(self, pool_size: int):
+        noise = np.random.default_rng(seed=0).integers(0, 24, size=(self._height, self._width), dtype=np.uint8)
+        frames = [self.__generate_frame(i, noise) for i in range(pool_size)]
+
+        if self._timestamp:
+            chunks = [frame.tobytes() for frame in frames]
+        else:
+            chunks = [self.__encode(frame) for frame in frames]
+
+        self._pool = mmap.mmap(-1, sum(len(chunk) for chunk in chunks))
+        for chunk in chunks:
+            self._chunks.append((self._pool.tell(), len(chunk)))
+            self._pool.write(chunk)
+
+    def close(self):
+        if self._pool:
+            self._pool.close()
+            self._pool = None
+
+    def images(self) -> Generator[bytes, None, None]:
+        assert self._pool
+
+        for frame_no, (offset, length) in enumerate(cycle(self._chunks)):
+            if not self._timestamp:
+                yield self._pool[offset : offset + length]
+                continue
+
+            # the timestamp is drawn onto the luma plane in the pool, the same region is overwritten next time
+            frame = np.frombuffer(self._pool, dtype=np.uint8, count=length, offset=offset)
+            y_plane = frame[: self._width * self._height].reshape(self._height, self._width)
+            text = f"{datetime.now().strftime('%H:%M:%S.%f')[:-3]} #{frame_no}"
+            scale = self._height / 540
+            (text_w, text_h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, max(1, int(scale * 2)))
+            cv2.rectangle(y_plane, (0, 0), (text_w + int(20 * scale), text_h + int(20 * scale)), 0, -1)
+            cv2.putText(y_plane, text, (int(10 * scale), text_h + int(10 * scale)), cv2.FONT_HERSHEY_SIMPLEX, scale, 255, max(1, int(scale * 2)))
+
+            yield self.__encode(frame)
+
+
 class VirtualCameraBackend(AbstractBackend):
+    supports_burst = True
+
     def __init__(self, config: GroupCameraVirtual):
         # print(VirtualCameraBackend.__mro__)
         self._config: GroupCameraVirtual = config
@@ -61,7 +158,8 @@ class VirtualCameraBackend(AbstractBackend):
             idle_timeout=self._config.camera_standby_when_inactive_time if self._config.camera_standby_when_inactive else None,
         )
 
-        self._images_iterator = CyclicImageSource().images()
+        self._synthetic_source: SyntheticImageSource | None = None
+        self._images_iterator: Generator[bytes, None, None] = CyclicImageSource().images()
         # self._enable_producer: bool = False
         self._worker_thread: StoppableThread | None = None
 
@@ -72,30 +170,55 @@ class VirtualCameraBackend(AbstractBackend):
         super().stop()
 
     def setup_resource(self):
-        pass
+        if self._config.emulate_synthetic_source:
+            self._synthetic_source = SyntheticImageSource(
+                self._config.synthetic_resolution_width,
+                self._config.synthetic_resolution_height,
+                self._config.synthetic_quality,
+                self._config.synthetic_timestamp,
+            )
+            self._images_iterator = self._synthetic_source.images()
 
     def teardown_resource(self):
-        pass
+        if self._synthetic_source:
+            self._images_iterator.close()  # release the generators view on the pool before closing it
+            self._synthetic_source.close()
+            self._synthetic_source = None
+            self._images_iterator = CyclicImageSource().images()
 
     def run_service(self):
+        burst: BurstRequest | None = None
 
         while not self._stop_event.is_set():
-            with self._hires_lock:
-                req = self._hires_queue.popleft() if self._hires_queue else None
+            if burst:
+                # lores continues in between the captures of a burst so the preview keeps running
+                if burst.due:
+                    try:
+                        burst.deliver(self._produce_still_bytes())
+                    except Exception as exc:
+                        burst.fail(exc)
+                        raise
+                if burst.done:
+                    burst = None
+
+            req = self._pop_hires_request()
 
             if req:
                 self._mode_machine.process_switchmode("still")
 
                 if isinstance(req, StillRequest):
-                    file = self._produce_still(req.subdevice_index)
-                    with req.condition:
-                        req.result_file = file
-                        req.condition.notify_all()
+                    jpeg_bytes = self._produce_still_bytes()
+                    req.deliver(result_bytes=jpeg_bytes)
                 elif isinstance(req, MulticamRequest):
                     files = self._produce_multicam()
-                    with req.condition:
-                        req.result_files = files
-                        req.condition.notify_all()
+                    req.deliver(result_files=files)
+                elif isinstance(req, BurstRequest):
+                    try:
+                        req.deliver(self._produce_still_bytes())
+                    except Exception as exc:
+                        req.fail(exc)
+                        raise
+                    burst = None if req.done else req
                 else:
                     logger.warning(f"this backend does not support {type(req)} requests")
                     continue
@@ -108,16 +231,18 @@ class VirtualCameraBackend(AbstractBackend):
 
             self._mode_machine.process_switchmode("video")
 
-            self._framerate.wait_until_fps(self._config.framerate)
+            if self._config.emulate_synthetic_source:
+                # as load generator the configured framerate is produced always
+                self._framerate.wait_until_fps(self._config.framerate)
+            else:
+                self._framerate.wait_until_fps(min(self._config.framerate, self._lores_controller.fps or self._config.framerate))
 
             # "produce" next lores-frame
             frame = next(self._images_iterator)
             self._frame_tick()
 
             for dev_idx in range(self._config.emulate_multicam_capture_devices):
-                with self._lores_data[dev_idx].condition:
-                    self._lores_data[dev_idx].data = frame
-                    self._lores_data[dev_idx].condition.notify_all()
+                self._lores_data[dev_idx].publish(frame)
 
         logger.debug("virtualcamera thread finished")
 
@@ -129,9 +254,17 @@ class VirtualCameraBackend(AbstractBackend):
 
         return files
 
-    def _produce_still(self, index_subdevice: int = 0) -> Path:
+    def _produce_still_bytes(self) -> bytes:
         """for other threads to receive a hq JPEG image"""
 
+        if self._config.emulate_hires_static_still:
+            return Path(__file__).parent.joinpath("assets", "backend_virtualcamera", "video", "hires.jpg").resolve().read_bytes()
+        else:
+            return next(self._images_iterator)
+
+    def _produce_still(self, index_subdevice: int = 0) -> Path:
+        """multicam captures are still handed over as files"""
+
         with NamedTemporaryFile(
             mode="wb",
             delete=False,
@@ -139,20 +272,14 @@ class VirtualCameraBackend(AbstractBackend):
             prefix=f"{filename_str_time()}_virtualcamera_subdevice{index_subdevice}_",
             suffix=".jpg",
         ) as f:
-            if self._config.emulate_hires_static_still:
-                with open(Path(__file__).parent.joinpath("assets", "backend_virtualcamera", "video", "hires.jpg").resolve(), "rb") as f_hires:
-                    f.write(f_hires.read())
-            else:
-                f.write(next(self._images_iterator))
+            f.write(self._produce_still_bytes())
 
             return Path(f.name)
 
     def _capture_lores(self, index_subdevice: int = 0) -> bytes:
-        with self._lores_data[index_subdevice].condition:
-            if not self._lores_data[index_subdevice].condition.wait(timeout=0.5):
-                raise TimeoutError("timeout receiving frames")
+        lores_data = self._lores_data[index_subdevice]
 
-            return self._lores_data[index_subdevice].data
+        return lores_data.wait_for_frame(newer_than=lores_data.seq, timeout=0.5).data
 
     def _handle_switchmode_video_mode(self):
         super()._handle_switchmode_video_mode()
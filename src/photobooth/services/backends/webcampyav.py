@@ -6,8 +6,6 @@ import io
 import logging
 import sys
 import time
-from pathlib import Path
-from tempfile import NamedTemporaryFile
 
 import av
 import av.error
@@ -15,12 +13,11 @@ from av.codec import Capabilities, Codec
 from av.codec.codec import UnknownCodecError
 from av.container import InputContainer
 from av.video.reformatter import ColorRange, Interpolation, VideoReformatter
-from simplejpeg import encode_jpeg_yuv_planes
+from simplejpeg import decode_jpeg, decode_jpeg_header, encode_jpeg, encode_jpeg_yuv_planes
 
-from ...utils.helper import filename_str_time
 from ...utils.resilientservice import PermanentFault
 from ..config.groups.cameras import GroupCameraPyav
-from .abstractbackend import AbstractBackend, StillRequest
+from .abstractbackend import AbstractBackend, BurstRequest, StillRequest
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +35,8 @@ elif sys.platform == "linux":
 
 
 class WebcamPyavBackend(AbstractBackend):
+    supports_burst = True
+
     def __init__(self, config: GroupCameraPyav):
         self._config: GroupCameraPyav = config
         super().__init__(
@@ -139,8 +138,78 @@ class WebcamPyavBackend(AbstractBackend):
             del packet
             raise PermanentFault("Error decoding camera frame! Ensure the settings are correct (device name, fps, resolution, ...)") from exc
 
+    def _lores_resolution(self, reduce_factor: int) -> tuple[int, int]:
+        # yuv420 planes need even dimensions
+        return (
+            self._config.cam_resolution_width // reduce_factor // 2 * 2,
+            self._config.cam_resolution_height // reduce_factor // 2 * 2,
+        )
+
+    def lores_jpeg_dct_scaled(self, packet: av.Packet, reduce_factor: int) -> bytes:
+        """mjpeg packets are decoded by libjpeg straight at preview size using the 1/2, 1/4, 1/8 scaled IDCT
+        which skips most of the decoding work compared to decode at full size and resize afterwards.
+        Without reduction the packet is passed through untouched."""
+        if reduce_factor == 1:
+            return bytes(packet)
+
+        jpeg_bytes = bytes(packet)
+        height, width, _, _ = decode_jpeg_header(jpeg_bytes)
+        # libjpeg picks the smallest scaled IDCT that results in at least the requested size
+        rgb = decode_jpeg(jpeg_bytes, fastdct=True, fastupsample=True, min_height=height // reduce_factor, min_width=width // reduce_factor)
+
+        return encode_jpeg(rgb, quality=self._lores_controller.quality, fastdct=True)
+
+    def lores_jpeg_reformatted(self, reformatter: VideoReformatter, packet: av.Packet, src_color_range: int, reduce_factor: int) -> bytes:
+        """rawvideo (and mjpeg libjpeg cannot decode) is decoded by ffmpeg, resized and converted to yuv420p and encoded to jpeg"""
+        frame = self.decode_frame(packet)
+        rW, rH = self._lores_resolution(reduce_factor)
+
+        if reduce_factor > 1:
+            out_frame = reformatter.reformat(
+                frame,
+                width=rW,
+                height=rH,
+                interpolation=Interpolation.BILINEAR,
+                format="yuv420p",
+                src_color_range=src_color_range,
+                dst_color_range=ColorRange.JPEG,  # simplejpeg is full range
+            ).to_ndarray()
+        else:
+            out_frame = reformatter.reformat(
+                frame,
+                format="yuv420p",
+                src_color_range=src_color_range,
+                dst_color_range=ColorRange.JPEG,  # simplejpeg is full range
+            ).to_ndarray()
+
+        # compress raw YUV420p to JPEG
+        jpeg_bytes = encode_jpeg_yuv_planes(
+            Y=out_frame[:rH],
+            U=out_frame.reshape(rH * 3, rW // 2)[rH * 2 : rH * 2 + rH // 2],
+            V=out_frame.reshape(rH * 3, rW // 2)[rH * 2 + rH // 2 :],
+            quality=self._lores_controller.quality,
+            fastdct=True,
+        )
+        del out_frame, frame
+
+        return jpeg_bytes
+
+    def hires_jpeg(self, packet: av.Packet, codec_name: str) -> bytes:
+        if codec_name == "mjpeg":
+            return bytes(packet)
+        elif codec_name == "rawvideo":
+            frame = self.decode_frame(packet)
+            image_bytesio = io.BytesIO()
+            frame.to_image().save(image_bytesio, format="JPEG", quality=90)
+            del frame
+
+            return image_bytesio.getvalue()
+        else:
+            raise PermanentFault(f"The webcam's codec {codec_name} is not supported!")
+
     def run_service(self):
         reformatter = VideoReformatter()
+        burst: BurstRequest | None = None
         options = {
             "video_size": f"{self._config.cam_resolution_width}x{self._config.cam_resolution_height}",
         }
@@ -161,8 +230,7 @@ class WebcamPyavBackend(AbstractBackend):
             # dshow/v4l usually dont need this configured because their default seems reasonable.
             options["framerate"] = str(self._config.cam_framerate)
 
-        rW = self._config.cam_resolution_width // self._config.preview_resolution_reduce_factor
-        rH = self._config.cam_resolution_height // self._config.preview_resolution_reduce_factor
+        rW, rH = self._lores_resolution(self._config.preview_resolution_reduce_factor)
 
         while not self._stop_event.is_set():
             self._mode_machine.process_switchmode()
@@ -183,6 +251,7 @@ class WebcamPyavBackend(AbstractBackend):
                 input_stream.thread_type = "AUTO"  # speed up processing
                 input_stream.thread_count = 0  # speed up processing
                 codec_name = input_stream.codec.name
+                mjpeg_dct_scaling = True
 
                 # 1 loop to spit out packet and frame information
                 logger.info(f"input_device: {input_device}")
@@ -191,42 +260,37 @@ class WebcamPyavBackend(AbstractBackend):
                 logger.info(f"livestream resolution: {rW}x{rH}")
 
                 for packet in self.frame_generator(input_device, input_stream):
-                    with self._hires_lock:
-                        req = self._hires_queue.popleft() if self._hires_queue else None
+                    req = self._pop_hires_request()
 
                     # hires
                     if req:
                         if isinstance(req, StillRequest):
-                            if codec_name == "mjpeg":
-                                jpeg_bytes_hires = bytes(packet)
-                            elif codec_name == "rawvideo":
-                                frame = self.decode_frame(packet)
-                                image_bytesio = io.BytesIO()
-                                frame.to_image().save(image_bytesio, format="JPEG", quality=90)
-                                jpeg_bytes_hires = image_bytesio.getvalue()
-                                del frame
-                            else:
-                                raise PermanentFault(f"The webcam's codec {codec_name} is not supported!")
+                            jpeg_bytes_hires = self.hires_jpeg(packet, codec_name)
 
                             # only capture one pic and return to lores streaming afterwards
-                            with NamedTemporaryFile(
-                                mode="wb",
-                                delete=False,
-                                dir="tmp",
-                                prefix=f"{filename_str_time()}_pyav_",
-                                suffix=".jpg",
-                            ) as f:
-                                f.write(jpeg_bytes_hires)
-
-                            with req.condition:
-                                req.result_file = Path(f.name)
-                                req.condition.notify_all()
+                            req.deliver(result_bytes=jpeg_bytes_hires)
 
                             continue
+                        elif isinstance(req, BurstRequest):
+                            burst = req
                         else:
                             logger.warning(f"this backend does not support {type(req)} requests")
                             continue
 
+                    if burst:
+                        if burst.due:
+                            try:
+                                burst.deliver(self.hires_jpeg(packet, codec_name))
+                            except Exception as exc:
+                                burst.fail(exc)
+                                raise
+                        if burst.done:
+                            burst = None
+
+                        # bursts as fast as possible use every frame, otherwise the frames in between feed the preview
+                        if burst and not burst.interval:
+                            continue
+
                     # abort streaming on shutdown so process can join and close
                     if self._stop_event.is_set():
                         del packet  # del packet to allow buffer release in c ffmpeg python
@@ -240,42 +304,24 @@ class WebcamPyavBackend(AbstractBackend):
                         del packet  # del packet to allow buffer release in c ffmpeg python
                         break
 
-                    if not self._framerate.should_process_frame(15):
+                    if not self._framerate.should_process_frame(self._lores_controller.fps or 15):
                         continue
 
-                    frame = self.decode_frame(packet)
-
-                    if self._config.preview_resolution_reduce_factor > 1:
-                        out_frame = reformatter.reformat(
-                            frame,
-                            width=rW,
-                            height=rH,
-                            interpolation=Interpolation.BILINEAR,
-                            format="yuv420p",
-                            src_color_range=input_stream.color_range,
-                            dst_color_range=ColorRange.JPEG,  # simplejpeg is full range
-                        ).to_ndarray()
+                    # the controller might reduce the resolution further under load
+                    reduce_factor = self._config.preview_resolution_reduce_factor * self._lores_controller.downscale
+
+                    if codec_name == "mjpeg" and mjpeg_dct_scaling:
+                        try:
+                            jpeg_bytes = self.lores_jpeg_dct_scaled(packet, reduce_factor)
+                        except ValueError as exc:
+                            # some webcams send frames libjpeg refuses (e.g. missing huffman tables), ffmpeg's decoder is more forgiving.
+                            logger.warning(f"cannot decode webcam frames by libjpeg, fallback to ffmpeg decoding for the livestream: {exc}")
+                            mjpeg_dct_scaling = False
+                            continue
                     else:
-                        out_frame = reformatter.reformat(
-                            frame,
-                            format="yuv420p",
-                            src_color_range=input_stream.color_range,
-                            dst_color_range=ColorRange.JPEG,  # simplejpeg is full range
-                        ).to_ndarray()
-
-                    # compress raw YUV420p to JPEG
-                    jpeg_bytes = encode_jpeg_yuv_planes(
-                        Y=out_frame[:rH],
-                        U=out_frame.reshape(rH * 3, rW // 2)[rH * 2 : rH * 2 + rH // 2],
-                        V=out_frame.reshape(rH * 3, rW // 2)[rH * 2 + rH // 2 :],
-                        quality=85,
-                        fastdct=True,
-                    )
-                    del out_frame, frame
-
-                    with self._lores_data[0].condition:
-                        self._lores_data[0].data = jpeg_bytes
-                        self._lores_data[0].condition.notify_all()
+                        jpeg_bytes = self.lores_jpeg_reformatted(reformatter, packet, input_stream.color_range, reduce_factor)
+
+                    self._lores_data[0].publish(jpeg_bytes)
 
                     self._frame_tick()
 
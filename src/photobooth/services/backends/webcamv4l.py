@@ -4,16 +4,14 @@ v4l webcam implementation backend
 
 import logging
 import time
-from pathlib import Path
-from tempfile import NamedTemporaryFile
 from typing import TYPE_CHECKING
 
 import cv2
+import numpy as np
 import simplejpeg
 
-from ...utils.helper import filename_str_time
 from ..config.groups.cameras import GroupCameraV4l2
-from .abstractbackend import AbstractBackend, StillRequest
+from .abstractbackend import AbstractBackend, BurstRequest, StillRequest
 
 try:
     import linuxpy.video.device as linuxpy_video_device  # type: ignore
@@ -28,6 +26,9 @@ logger = logging.getLogger(__name__)
 
 
 class WebcamV4lBackend(AbstractBackend):
+    supports_burst = True
+    LORES_QUALITY = 90
+
     def __init__(self, config: GroupCameraV4l2):
         self._config: GroupCameraV4l2 = config
         super().__init__(
@@ -109,8 +110,8 @@ class WebcamV4lBackend(AbstractBackend):
                 "You should consider to select the correct pixel format!"
             )
 
-    def _frame_to_jpeg(self, frame: "linuxpy_video_device_type.Frame") -> bytes:
-        """Convert JPG/MJPG and YUVY pixelformat to output JPG"""
+    def _frame_to_jpeg(self, frame: "linuxpy_video_device_type.Frame", quality: int = 90, downscale: int = 1) -> bytes:
+        """Convert JPG/MJPG and YUVY pixelformat to output JPG. quality and downscale apply to raw pixelformats only, JPG is passed through."""
         # https://github.com/tiagocoutinho/linuxpy/blob/d223fa2b9078fd5b0ba1415ddea5c38f938398c5/examples/video/web/common.py#L29
         assert linuxpy_video_device
         assert self._fmt_pixel_format is not None
@@ -127,7 +128,10 @@ class WebcamV4lBackend(AbstractBackend):
             Y = arr[0 : h * w].reshape((h, w))
             U = arr[h * w : h * w + (h // 2) * (w // 2)].reshape((h // 2, w // 2))
             V = arr[h * w + (h // 2) * (w // 2) :].reshape((h // 2, w // 2))
-            encoded = simplejpeg.encode_jpeg_yuv_planes(Y=Y, U=U, V=V, quality=90, fastdct=True)
+            if downscale > 1:
+                # skipping pixels is good enough for the livestream and almost free
+                Y, U, V = (np.ascontiguousarray(plane[::downscale, ::downscale]) for plane in (Y, U, V))
+            encoded = simplejpeg.encode_jpeg_yuv_planes(Y=Y, U=U, V=V, quality=quality, fastdct=True)
 
             return encoded
         elif self._fmt_pixel_format == linuxpy_video_device.PixelFormat.YUYV:  # v4l raw int enum 16  YUV 4:2:2
@@ -138,7 +142,9 @@ class WebcamV4lBackend(AbstractBackend):
             # It was tested to convert YUYV data using numpy and feed to yuv_encode directly with not performance benefit.
             # cv2 to convert to planar YUV would be most efficient but is not avail :(
             bgr = cv2.cvtColor(data, cv2.COLOR_YUV2RGB_YUYV)
-            encoded = simplejpeg.encode_jpeg(bgr, quality=90, fastdct=True)
+            if downscale > 1:
+                bgr = cv2.resize(bgr, None, fx=1 / downscale, fy=1 / downscale, interpolation=cv2.INTER_NEAREST)
+            encoded = simplejpeg.encode_jpeg(bgr, quality=quality, fastdct=True)
 
             return encoded
         else:
@@ -180,8 +186,7 @@ class WebcamV4lBackend(AbstractBackend):
         logger.info(f"webcam name: {self._device.info.card if self._device.info else 'unknown'}")
 
         while not self._stop_event.is_set():
-            with self._hires_lock:
-                req = self._hires_queue.popleft() if self._hires_queue else None
+            req = self._pop_hires_request()
 
             if req:
                 self._mode_machine.process_switchmode()
@@ -198,18 +203,33 @@ class WebcamV4lBackend(AbstractBackend):
 
                             logger.info(f"flushed {self._config.flush_number_frames_after_switch} frames before capture high resolution image")
 
-                            with NamedTemporaryFile(mode="wb", delete=False, dir="tmp", prefix=f"{filename_str_time()}_v4l2_", suffix=".jpg") as f:
-                                f.write(self._frame_to_jpeg(frame))
-
-                            logger.info(f"written image to {Path(f.name)}")
-
-                            with req.condition:
-                                req.result_file = Path(f.name)
-                                req.condition.notify_all()
+                            req.deliver(result_bytes=self._frame_to_jpeg(frame))
 
                             # job done
                             break
 
+                elif isinstance(req, BurstRequest):
+                    try:
+                        with self._capture:
+                            for frame in self._capture:
+                                if frame.frame_nb == 0 or frame.frame_nb < self._skip_frames_after_switch:
+                                    continue
+
+                                if req.due:
+                                    req.deliver(self._frame_to_jpeg(frame))
+                                elif req.interval and self._framerate.should_process_frame(self._lores_controller.fps or 15):
+                                    # frames in between the captures feed the preview
+                                    jpeg_buffer = self._frame_to_jpeg(frame, self._lores_controller.quality, self._lores_controller.downscale)
+                                    self._lores_data[0].publish(jpeg_buffer)
+                                    self._frame_tick()
+
+                                if req.done or self._stop_event.is_set():
+                                    break
+                    except Exception as exc:
+                        # the requester gets the error right away instead of running into the timeout
+                        req.fail(exc)
+                        raise
+
                 else:
                     logger.warning(f"this backend does not support {type(req)} requests")
                     continue
@@ -231,21 +251,19 @@ class WebcamV4lBackend(AbstractBackend):
                     if frame.frame_nb < self._skip_frames_after_switch:
                         continue
 
-                    if not self._framerate.should_process_frame(15):
+                    if not self._framerate.should_process_frame(self._lores_controller.fps or 15):
                         continue
 
                     # produce
                     try:
-                        jpeg_buffer = self._frame_to_jpeg(frame)
+                        jpeg_buffer = self._frame_to_jpeg(frame, self._lores_controller.quality, self._lores_controller.downscale)
                     except ValueError as exc:
                         logger.debug(f"error converting frame to jpeg: {exc}")
                         continue
 
                     self._frame_tick()
 
-                    with self._lores_data[0].condition:
-                        self._lores_data[0].data = jpeg_buffer
-                        self._lores_data[0].condition.notify_all()
+                    self._lores_data[0].publish(jpeg_buffer)
 
                     # check for pending mode change? if so break out the stream and switch
                     if self._mode_machine.is_mode_change_pending:
@@ -87,11 +87,9 @@ class WigglecamBackend(AbstractBackend):
 
     def _capture_lores(self, index_subdevice: int = 0) -> bytes:
         assert self._lores_data
+        lores_data = self._lores_data[index_subdevice]
 
-        with self._lores_data[index_subdevice].condition:
-            if not self._lores_data[index_subdevice].condition.wait(timeout=0.5):
-                raise TimeoutError("timeout receiving frames")
-            return self._lores_data[index_subdevice].data
+        return lores_data.wait_for_frame(newer_than=lores_data.seq, timeout=0.5).data
 
     def _capture_still(self, subdevice_index: int) -> Path:
         # TODO: get highres from the one camera selected, for now get all and return the selected one
@@ -179,22 +177,17 @@ class WigglecamBackend(AbstractBackend):
                 continue
 
         while not self._stop_event.is_set():
-            with self._hires_lock:
-                req = self._hires_queue.popleft() if self._hires_queue else None
+            req = self._pop_hires_request()
 
             if req:
                 self._mode_machine.process_switchmode("still")
 
                 if isinstance(req, StillRequest):
                     file = self._capture_still(req.subdevice_index)
-                    with req.condition:
-                        req.result_file = file
-                        req.condition.notify_all()
+                    req.deliver(result_file=file)
                 elif isinstance(req, MulticamRequest):
                     files = self._capture_multicam()
-                    with req.condition:
-                        req.result_files = files
-                        req.condition.notify_all()
+                    req.deliver(result_files=files)
                 else:
                     logger.warning(f"this backend does not support {type(req)} requests")
                     continue
@@ -211,9 +204,7 @@ class WigglecamBackend(AbstractBackend):
                 msg = ImageMessage.from_bytes(data)
 
                 # store raw JPEG of all devices. TODO: might need to limit to only one device if it gets overwhelming for low end SBC
-                with self._lores_data[msg.device_id].condition:
-                    self._lores_data[msg.device_id].data = msg.jpg_bytes
-                    self._lores_data[msg.device_id].condition.notify_all()
+                self._lores_data[msg.device_id].publish(msg.jpg_bytes)
 
                 if msg.device_id == self._config.index_cam_video:
                     self._frame_tick()
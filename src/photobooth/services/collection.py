@@ -22,6 +22,8 @@ from ..plugins import pm as pluggy_pm
 from ..utils.media_resizer import resize
 from ..utils.metrics_timer import MetricsTimer
 from .base import BaseService
+from .mediaprocessing.previewcache import filter_preview_cache
+from .mediaprocessing.stepcache import step_cache
 from .sse import sse_service
 from .sse.sse_ import SseEventDbInsert, SseEventDbRemove, SseEventDbUpdate
 
@@ -179,13 +181,59 @@ class Cache:
 
                     return cacheditem_new
 
+    def add_renditions(self, renditions: list[Cacheditem]):
+        """add scaled versions created during processing already. Existing ones of same item and dimension are outdated, so replaced."""
+        outdated_filepaths: list[Path] = []
+
+        with Session(engine) as session, self._lock_cache_check:
+            for rendition in renditions:
+                outdated_items = session.scalars(
+                    select(Cacheditem).where(
+                        Cacheditem.mediaitem_id == rendition.mediaitem_id,
+                        Cacheditem.dimension == rendition.dimension,
+                        Cacheditem.processed == rendition.processed,
+                    )
+                ).all()
+
+                for outdated_item in outdated_items:
+                    outdated_filepaths.append(outdated_item.filepath)
+                    session.delete(outdated_item)
+
+                session.add(rendition)
+
+            session.commit()
+            for rendition in renditions:
+                session.refresh(rendition)  # refresh so consuming function can access the attributes without session
+
+        for outdated_filepath in outdated_filepaths:
+            outdated_filepath.unlink(missing_ok=True)
+
+        logger.debug(f"added {len(renditions)} renditions to the cache, replaced {len(outdated_filepaths)} outdated items")
+
+    def invalidate_item(self, mediaitem_id: UUID):
+        """remove all cached items of the mediaitem, used when it was updated. The timestamps have a resolution of seconds only,
+        so an update in the same second as the cached item was created could not be detected otherwise."""
+        with Session(engine) as session, self._lock_cache_check:
+            outdated_items = session.scalars(select(Cacheditem).where(Cacheditem.mediaitem_id == mediaitem_id)).all()
+            outdated_filepaths = [outdated_item.filepath for outdated_item in outdated_items]
+
+            for outdated_item in outdated_items:
+                session.delete(outdated_item)
+
+            session.commit()
+
+        for outdated_filepath in outdated_filepaths:
+            outdated_filepath.unlink(missing_ok=True)
+
     def _db_check_cache_valid(self, mediaitem_id: UUID, dimension: DimensionTypes, processed: bool = True):
         with Session(engine) as session:
             results = session.scalars(
                 select(Cacheditem)
                 .join(Mediaitem)
                 .where(Cacheditem.mediaitem_id == mediaitem_id, Cacheditem.dimension == dimension, Cacheditem.processed == processed)
-                .where(Mediaitem.updated_at < Cacheditem.created_at)  # cached item created later than last updated mediaitem
+                # cached item created later than last updated mediaitem. Same is valid also because resolution is seconds only
+                # and renditions are added right after the mediaitem. Updating a mediaitem removes its cached items.
+                .where(Mediaitem.updated_at <= Cacheditem.created_at)
             )
 
             cacheditem_exists = results.one_or_none()  # if none, there is no item yet cached and cached version needs to be created.
@@ -269,12 +317,16 @@ class MediacollectionService(BaseService):
         # remove outdated items from cache during startup.
         self.cache.on_start_maintain()
 
-    def add_item(self, item: Mediaitem):
+    def add_item(self, item: Mediaitem, renditions: list[Cacheditem] | None = None):
         # check files are avail:
         self.fs.check_representing_files_raise(item)
 
         self.db.add_item(item)
 
+        # scaled versions created during processing already, added before clients are notified so the first view is a cache hit.
+        if renditions:
+            self.cache.add_renditions(renditions)
+
         # if shown in gallery negative priority_modifier for higher prio.
         pluggy_pm.hook.collection_files_added(files=[item.processed, item.unprocessed], priority_modifier=-1 if item.show_in_gallery else +1)
 
@@ -287,10 +339,14 @@ class MediacollectionService(BaseService):
 
         return item.id
 
-    def update_item(self, item: Mediaitem):
+    def update_item(self, item: Mediaitem, renditions: list[Cacheditem] | None = None):
         self.fs.check_representing_files_raise(item)
 
         self.db.update_item(item)
+        self.cache.invalidate_item(item.id)
+
+        if renditions:
+            self.cache.add_renditions(renditions)
 
         pluggy_pm.hook.collection_files_updated(files=[item.processed])
 
@@ -300,6 +356,8 @@ class MediacollectionService(BaseService):
     def delete_item(self, item: Mediaitem):
         self.db.delete_item(item)
         self.fs.delete_item(item, appconfig.common.users_delete_to_recycle_dir)
+        step_cache.delete_item(item.id)
+        filter_preview_cache.delete_item(item.id)
 
         pluggy_pm.hook.collection_files_deleted(files=[item.processed, item.unprocessed])
 
@@ -315,6 +373,8 @@ class MediacollectionService(BaseService):
         logger.info("media files cleared")
 
         self.cache.clear_all()
+        step_cache.clear_all()
+        filter_preview_cache.clear_all()
         logger.info("cache cleared")
 
     def count(self) -> int:
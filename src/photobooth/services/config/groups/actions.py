@@ -280,6 +280,10 @@ class MulticameraProcessing(BaseModel):
         le=500,
         description="Duration of each frame in milliseconds. Wigglegrams look good usually between 100-200ms duration.",
     )
+    canvas_max_length: NonNegativeInt = Field(
+        default=0,
+        description="Maximum length in pixel of the longer side of the resulting wigglegram. The images are scaled down while aligning, smaller wigglegrams process faster (for example 1500). Set to 0 to keep the resolution of the captures.",
+    )
     image_filter: PluginFilters = Field(
         default=PluginFilters("original"),
     )
@@ -37,7 +37,7 @@ class GroupCameraVirtual(BaseModelCamera):
     framerate: int = Field(
         default=15,
         ge=5,
-        le=30,
+        le=60,
         description="Reduce the framerate to save cpu/gpu on device displaying the live preview",
         json_schema_extra={"ui_schema_extra": {"slider": True}, "computeIntense": True},
     )
@@ -51,6 +51,34 @@ class GroupCameraVirtual(BaseModelCamera):
         le=20,
         description="Number of emulated cameras when asking for synchronized capture for wigglegrams.",
     )
+    emulate_synthetic_source: bool = Field(
+        default=False,
+        description="Generate synthetic frames instead of playing the demovideo. Use it as repeatable load generator to test how the app scales with high resolutions, framerates and many cameras. The livestream is produced at the framerate above regardless of the adaptive livestream.",
+    )
+    synthetic_resolution_width: int = Field(
+        default=1920,
+        ge=320,
+        le=7680,
+        description="Resolution width of the synthetic frames (livestream and stills).",
+    )
+    synthetic_resolution_height: int = Field(
+        default=1080,
+        ge=240,
+        le=4320,
+        description="Resolution height of the synthetic frames (livestream and stills).",
+    )
+    synthetic_quality: int = Field(
+        default=85,
+        ge=10,
+        le=100,
+        description="JPEG quality of the synthetic frames.",
+        json_schema_extra={"ui_schema_extra": {"slider": True}},
+    )
+    synthetic_timestamp: bool = Field(
+        default=False,
+        description="Burn a timestamp and frame number into every synthetic frame to measure latencies. Frames are encoded on the fly then, which costs CPU.",
+        json_schema_extra={"computeIntense": True},
+    )
 
 
 class GroupCameraPicamera2(BaseModelCamera):
@@ -414,6 +442,58 @@ class GroupCameras(BaseModel):
         description="Trigger camera capture by offset earlier (in seconds). 0 trigger exactly when countdown is 0. Use to compensate for delay in camera processing for better UX.",
     )
 
+    preswitch_still_mode: bool = Field(
+        default=True,
+        description="Switch the camera to still mode during the countdown, timed by the measured switch time, so the switch does not delay the capture. Helps cameras with slow mode changes (e.g. Picamera2, DSLR viewfinder).",
+    )
+    livestream_adaptive: bool = Field(
+        default=False,
+        description="Adapt the livestream framerate, quality and resolution to the demand of the clients and the CPU load. During postprocessing the livestream is throttled to the minimum so the processing finishes earlier. If disabled, the livestream runs at the framerate and quality of the backend.",
+        json_schema_extra={"computeIntense": True},
+    )
+    livestream_framerate_min: int = Field(
+        default=5,
+        ge=1,
+        le=30,
+        description="Lowest framerate the livestream is reduced to.",
+        json_schema_extra={"ui_schema_extra": {"slider": True}},
+    )
+    livestream_framerate_max: int = Field(
+        default=15,
+        ge=1,
+        le=30,
+        description="Highest framerate of the livestream.",
+        json_schema_extra={"ui_schema_extra": {"slider": True}, "computeIntense": True},
+    )
+    livestream_quality_min: int = Field(
+        default=60,
+        ge=10,
+        le=100,
+        description="Lowest JPEG quality the livestream is reduced to (backends encoding the livestream themselves only).",
+        json_schema_extra={"ui_schema_extra": {"slider": True}},
+    )
+    livestream_quality_max: int = Field(
+        default=85,
+        ge=10,
+        le=100,
+        description="Highest JPEG quality of the livestream (backends encoding the livestream themselves only).",
+        json_schema_extra={"ui_schema_extra": {"slider": True}, "computeIntense": True},
+    )
+    livestream_downscale_max: int = Field(
+        default=2,
+        ge=1,
+        le=4,
+        description="Highest additional factor the livestream resolution is reduced by under load (backends encoding the livestream themselves only). 1 to never reduce.",
+        json_schema_extra={"ui_schema_extra": {"slider": True}},
+    )
+    livestream_cpu_target: int = Field(
+        default=70,
+        ge=10,
+        le=100,
+        description="CPU load of the app (in percent of all cores) above which the livestream is reduced.",
+        json_schema_extra={"ui_schema_extra": {"slider": True}},
+    )
+
     index_backend_stills: int = Field(
         default=0,
         description="Index of one backend below to capture stills.",
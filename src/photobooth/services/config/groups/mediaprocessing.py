@@ -35,6 +35,26 @@ class GroupMediaprocessing(BaseModel):
         description="Minimum dimension of the longer side used to scale thumbnails captures. The shorter side is calculated to keep aspect ratio.",
     )
 
+    processing_workers: int = Field(
+        default=2,
+        ge=0,
+        le=8,
+        json_schema_extra={"computeIntense": True},
+        description="Number of worker processes to postprocess the captures of collages, animations and wigglegrams in parallel. Each worker needs additional memory, especially if background removal is used. Set to 0 to process all captures one after another in the app process.",
+    )
+
+    asset_cache_size: int = Field(
+        default=150,
+        ge=0,
+        le=2000,
+        description="Memory in MB to keep decoded frames, backgrounds and overlays for reuse, so they are not loaded for every capture again. Least recently used assets are dropped if the limit is exceeded. 0 disables the cache.",
+    )
+
+    step_cache_enable: bool = Field(
+        default=True,
+        description="Store results of expensive processing steps (background removal) per image, so changing the filter later in the gallery does not compute them again. Needs about 2MB disk space per image.",
+    )
+
     video_bitrate: int = Field(
         default=3000,
         ge=1000,
@@ -48,12 +68,66 @@ class GroupMediaprocessing(BaseModel):
         description="Enable for improved video compatibility on iOS devices and Firefox. Might reduce resulting quality slightly.",
     )
 
+    video_passthrough_recording: bool = Field(
+        default=False,
+        json_schema_extra={"computeIntense": True},
+        description="Record the livestream frames as they are (MJPEG) without encoding during capture. The video is transcoded in background after the capture finished. Recommended for long videos on low power devices to keep the livestream smooth while recording. Needs more disk space temporarily.",
+    )
+
     remove_background_model: RembgModelType = Field(
         default="modnet",
         json_schema_extra={"computeIntense": True},
         description="Select from predefined models. Modnet and u2netp are packaged with the app, other models will be downloaded on demand and cached, so on first use of other models, the app needs internet access. u2netp is a reduced model that is fastest, modnet usually only slightly slower but provides good results.",
     )
 
+    remove_background_preload: bool = Field(
+        default=True,
+        description="Load the background removal model in background when the app starts, so the first capture does not need to wait for it. Only if background removal is enabled in any action.",
+    )
+
+    remove_background_intra_op_threads: int = Field(
+        default=0,
+        ge=0,
+        le=64,
+        json_schema_extra={"computeIntense": True},
+        description="Number of threads used to compute a single operation of the background removal model. 0 lets the AI runtime decide, usually the number of CPU cores. Consider to reduce if multiple processing workers are used.",
+    )
+
+    remove_background_inter_op_threads: int = Field(
+        default=0,
+        ge=0,
+        le=64,
+        json_schema_extra={"computeIntense": True},
+        description="Number of threads used to compute independent operations of the background removal model in parallel. 0 or 1 computes operations one after another which is best for most models.",
+    )
+
+    remove_background_inference_size: int = Field(
+        default=512,
+        ge=256,
+        le=1024,
+        multiple_of=32,
+        json_schema_extra={"computeIntense": True},
+        description="Resolution the background removal model computes at (shorter side). Lower values are faster but less detailed. Applies to modnet only, other models use a fixed resolution.",
+    )
+
+    remove_background_refine_mask: bool = Field(
+        default=True,
+        json_schema_extra={"computeIntense": True},
+        description="Scale the computed mask to the image resolution following the edges of the image (guided filter), so edges of the cutout stay sharp. If disabled, the mask is resampled which gives softer edges.",
+    )
+
+    remove_background_inference_process: bool = Field(
+        default=True,
+        description="Compute the background removal in a dedicated process if no processing workers are used, so the app stays responsive (livestream, gallery) while the model computes. Needs some more memory.",
+    )
+
+    remove_background_inference_timeout: int = Field(
+        default=30,
+        ge=5,
+        le=300,
+        description="Seconds to wait for the background removal in the dedicated process. If exceeded, the process is restarted and the image processed without background removal.",
+    )
+
     fileformat_animations: Literal["webp", "avif", "gif"] = Field(
         default="webp",
         description="Format in which animations are stored. WebP is recommended nowadays. AVIF is a newer format, encodes fast, produces smallest files but is not yet broadly compatible. GIF is lower quality (max 256 colors), more compute intensive to encode but offers best compatibility. GIF is deprecated here.",
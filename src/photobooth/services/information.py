@@ -1,3 +1,4 @@
+import dataclasses
 import logging
 import platform
 import subprocess
@@ -21,6 +22,7 @@ from ..utils.repeatedtimer import RepeatedTimer
 from ..utils.stoppablethread import StoppableThread
 from .acquisition import AcquisitionService
 from .base import BaseService
+from .mediaprocessing.executor import mediaprocessing_executor
 from .sse import sse_service
 from .sse.sse_ import SseEventIntervalInformationRecord, SseEventOnetimeInformationRecord
 
@@ -123,6 +125,7 @@ class InformationService(BaseService):
             memory=self._gather_memory(),
             cma=self._gather_cma(),
             backends=self._gather_backends_stats(),
+            mediaprocessing=self._gather_mediaprocessing_stats(),
             stats_counter=self._gather_stats_counter(),
             limits_counter=self._gather_limits_counter(),
             battery_percent=self._gather_battery(),
@@ -202,6 +205,9 @@ class InformationService(BaseService):
     def _gather_backends_stats(self):
         return self._acquisition_service.stats()
 
+    def _gather_mediaprocessing_stats(self) -> dict[str, Any]:
+        return dataclasses.asdict(mediaprocessing_executor.get_stats())
+
     def _gather_disk(self) -> dict[str, int | float]:
         return psutil.disk_usage(str(Path.cwd().absolute()))._asdict()
 
@@ -0,0 +1,129 @@
+"""
+Process-wide cache for static image assets like frames, backgrounds and overlays.
+
+The same few assets are applied to every capture, so decoding, alpha analysis and fitting is done once only.
+Entries are keyed by path, mtime and filesize, so a changed asset is picked up on next use.
+Images returned are shared between callers and must not be modified, copy() them before pasting into.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AssetCacheStats:
+    entries: int
+    size_bytes: int
+    hits: int
+    misses: int
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+
+    return 64  # bbox and similar small values
+
+
+class AssetCache:
+    def __init__(self, max_bytes: int = 150 * 1024 * 1024):
+        # updated from config when the processing service starts
+        self.max_bytes = max_bytes
+
+        self._lock = Lock()
+        self._entries: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self._size_bytes: int = 0
+        self._hits: int = 0
+        self._misses: int = 0
+
+    @staticmethod
+    def _file_key(filepath: Path | str) -> tuple[str, int, int]:
+        # raises FileNotFoundError if the asset is not avail
+        stat = Path(filepath).stat()
+        return (str(Path(filepath).resolve()), stat.st_mtime_ns, stat.st_size)
+
+    def _lookup(self, key: tuple) -> tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return True, self._entries[key][0]
+
+            self._misses += 1
+            return False, None
+
+    def _insert(self, key: tuple, value: Any):
+        nbytes = _nbytes(value)
+        max_bytes = self.max_bytes
+
+        with self._lock:
+            if key in self._entries or nbytes > max_bytes:
+                # a concurrent caller was faster or the asset would evict everything else, just use it uncached.
+                return
+
+            self._entries[key] = (value, nbytes)
+            self._size_bytes += nbytes
+
+            while self._size_bytes > max_bytes:
+                evicted_key, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self._size_bytes -= evicted_nbytes
+                logger.debug(f"evicted {evicted_key} from asset cache")
+
+    def get_rgba(self, filepath: Path | str) -> Image.Image:
+        """decoded asset converted to RGBA."""
+        key = (*self._file_key(filepath), "rgba")
+
+        found, image = self._lookup(key)
+        if not found:
+            # convert to rgba because there could be paletted PNGs in mode P but still with alpha in info.transparency.
+            # converting to RGBA moves info.transparency to actual channel and handling is easy
+            with Image.open(filepath) as image_file:
+                image = image_file.convert("RGBA")
+            self._insert(key, image)
+
+        return image
+
+    def get_transparent_bbox(self, filepath: Path | str) -> tuple[int, int, int, int] | None:
+        """bounding box of the transparent area of the asset, None if there is no transparent area."""
+        key = (*self._file_key(filepath), "transparent_bbox")
+
+        found, bbox = self._lookup(key)
+        if not found:
+            # detect boundary box of transparent area, for this get alphachannel, invert and getbbox:
+            bbox = ImageOps.invert(self.get_rgba(filepath).getchannel("A")).getbbox()  # getchannel A returns img mode 'L'
+            self._insert(key, bbox)
+
+        return bbox
+
+    def get_fitted(self, filepath: Path | str, size: tuple[int, int]) -> Image.Image:
+        """asset cover-fitted to size, this might crop the asset but fills size fully. automatic centered."""
+        key = (*self._file_key(filepath), "fitted", size)
+
+        found, image = self._lookup(key)
+        if not found:
+            image = ImageOps.fit(self.get_rgba(filepath), size, method=Image.Resampling.LANCZOS)
+            self._insert(key, image)
+
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def get_stats(self) -> AssetCacheStats:
+        with self._lock:
+            return AssetCacheStats(entries=len(self._entries), size_bytes=self._size_bytes, hits=self._hits, misses=self._misses)
+
+
+asset_cache = AssetCache()
@@ -0,0 +1,215 @@
+"""
+Precompiled collage templates.
+
+The static content of a collage (fill color, background, predefined images with their filter and the front image) is the same
+for every job. It is rendered once into layers below, between and above the slots of the captures, so per job only the captures
+are decoded, fitted into their slot and composited. Captures are decoded at reduced size close to the size of their slot.
+Layers are composed by alpha compositing, so consecutive static content can be merged into one layer in advance.
+Templates are kept per process and keyed by the configuration and the assets used, so changes are picked up on the next job.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+
+from PIL import Image, ImageOps
+from pydantic_extra_types.color import Color
+
+from ...utils.exceptions import PipelineError
+from ..config.groups.actions import CollageProcessing
+from ..config.models.models import CollageMergeDefinition
+from .assetcache import asset_cache
+from .context import ImageContext
+from .pipeline import Pipeline
+from .steps.image import PluginFilterStep, _file_cache_key
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_CACHE: OrderedDict[tuple, CollageTemplate] = OrderedDict()
+MAX_TEMPLATE_CACHE = 2  # each template holds a few canvas sized layers
+LOCK_TEMPLATE = Lock()
+
+
+@dataclass
+class CaptureSlot:
+    index: int  # index of the capture in the job's captures
+    merge_definition: CollageMergeDefinition
+
+
+@dataclass
+class CollageTemplate:
+    size: tuple[int, int]
+    layers: list[Image.Image | CaptureSlot]  # bottom to top, static layers are canvas sized RGBA and shared, never modify them.
+
+    @property
+    def number_captures(self) -> int:
+        return sum(isinstance(layer, CaptureSlot) for layer in self.layers)
+
+    def render(self, files_in: list[Path]) -> Image.Image:
+        """compose the collage of the captures, returns a new RGBA image."""
+        if len(files_in) != self.number_captures:
+            raise RuntimeError("error processing, wrong number of images")
+
+        canvas = Image.new("RGBA", self.size)
+
+        for layer in self.layers:
+            if isinstance(layer, CaptureSlot):
+                merge_def = layer.merge_definition
+                with open_reduced(files_in[layer.index], (merge_def.width, merge_def.height)) as capture:
+                    slot_image, xy = fit_into_slot(capture, merge_def)
+            else:
+                slot_image, xy = layer, (0, 0)
+
+            alpha_composite_clipped(canvas, slot_image, xy)
+
+        return canvas
+
+
+def open_reduced(filepath: Path, size: tuple[int, int]) -> Image.Image:
+    """open the image to decode at reduced size, but still large enough to cover size. Only JPEGs support this, others are decoded full."""
+    image = Image.open(filepath)
+
+    scale = max(size[0] / image.width, size[1] / image.height)
+    if scale < 1:
+        image.draft(image.mode, (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+
+    return image
+
+
+def fit_into_slot(image: Image.Image, merge_def: CollageMergeDefinition) -> tuple[Image.Image, tuple[int, int]]:
+    """image fitted and rotated as defined and the position to paste it at."""
+    fitted = ImageOps.fit(image, (merge_def.width, merge_def.height), method=Image.Resampling.LANCZOS)
+    rotated, offset_x, offset_y = rotate(fitted, merge_def.rotate)
+
+    return rotated, (merge_def.pos_x - offset_x, merge_def.pos_y - offset_y)
+
+
+def rotate(image: Image.Image, angle: int = 0, expand: bool = True) -> tuple[Image.Image, int, int]:
+    """image rotated counter clockwise as RGBA and the offset of the expanded image to keep its center."""
+    if angle == 0:
+        # quick return, but also convert to RGBA for consistency reason in following processing
+        return image.convert("RGBA"), 0, 0
+
+    _rotated_image = image.convert("RGBA").rotate(
+        angle=angle,
+        expand=expand,
+        resample=Image.Resampling.BICUBIC,
+    )  # pos values = counter clockwise
+
+    # https://github.com/python-pillow/Pillow/issues/4556
+    offset_x = int(_rotated_image.width / 2 - image.width / 2)
+    offset_y = int(_rotated_image.height / 2 - image.height / 2)
+
+    return _rotated_image, offset_x, offset_y
+
+
+def alpha_composite_clipped(canvas: Image.Image, image: Image.Image, xy: tuple[int, int]):
+    """composite image onto canvas in place, parts outside the canvas are clipped."""
+    x, y = xy
+    canvas.alpha_composite(image, dest=(max(x, 0), max(y, 0)), source=(max(-x, 0), max(-y, 0)))
+
+
+def compile_collage_template(config: CollageProcessing) -> CollageTemplate:
+    size = (config.canvas_width, config.canvas_height)
+    layers: list[Image.Image | CaptureSlot] = []
+    static_layer: Image.Image | None = None  # static content is merged into this until the next capture slot
+
+    def add_static(image: Image.Image, xy: tuple[int, int] = (0, 0)):
+        nonlocal static_layer
+        if static_layer is None:
+            static_layer = Image.new("RGBA", size)
+        alpha_composite_clipped(static_layer, image, xy)
+
+    # below the collage, the background is mounted behind and the color fills everything that is still transparent
+    if config.canvas_fill_background_enable:
+        add_static(Image.new("RGBA", size, Color(config.canvas_fill_background_color).as_rgb_tuple()))
+
+    if config.canvas_img_background_enable:
+        if not config.canvas_img_background_file:
+            raise ValueError("image background enabled, but no file given")
+        add_static(_get_fitted_asset(config.canvas_img_background_file, size))
+
+    # captures fill the definitions without predefined image in sequence
+    capture_slots: list[tuple[CollageMergeDefinition, int | None]] = []
+    for merge_def in config.merge_definition:
+        capture_index = None if merge_def.predefined_image else sum(index is not None for _, index in capture_slots)
+        capture_slots.append((merge_def, capture_index))
+
+    for merge_def, capture_index in sorted(capture_slots, key=lambda p: p[0].pos_z):
+        if capture_index is None:
+            assert merge_def.predefined_image
+            add_static(*fit_into_slot(_get_filtered_predefined(merge_def), merge_def))
+        else:
+            if static_layer:
+                layers.append(static_layer)
+                static_layer = None
+            layers.append(CaptureSlot(capture_index, merge_def))
+
+    if config.canvas_img_front_enable:
+        if not config.canvas_img_front_file:
+            raise ValueError("image frame enabled, but no file given")
+        add_static(_get_fitted_asset(config.canvas_img_front_file, size))
+
+    if static_layer:
+        layers.append(static_layer)
+
+    return CollageTemplate(size, layers)
+
+
+def _get_fitted_asset(filepath: Path, size: tuple[int, int]) -> Image.Image:
+    try:
+        return asset_cache.get_fitted(filepath, size)
+    except FileNotFoundError as exc:
+        raise PipelineError(f"file {str(filepath)} not found!") from exc
+
+
+def _get_filtered_predefined(merge_def: CollageMergeDefinition) -> Image.Image:
+    # captures are postprocessed during capture, predefined not. The filter of the definition is applied here.
+    assert merge_def.predefined_image
+    try:
+        context = ImageContext(asset_cache.get_rgba(merge_def.predefined_image))
+    except FileNotFoundError as exc:
+        raise PipelineError(f"error getting predefined file {exc}") from exc
+
+    if merge_def.image_filter:
+        Pipeline[ImageContext](PluginFilterStep(merge_def.image_filter))(context)
+
+    return context.image
+
+
+def _template_key(config: CollageProcessing) -> tuple:
+    asset_files = [
+        config.canvas_img_background_file,
+        config.canvas_img_front_file,
+        *(merge_def.predefined_image for merge_def in config.merge_definition),
+    ]
+
+    return (
+        config.model_dump_json(exclude={"canvas_texts_enable", "canvas_texts"}),
+        tuple(_file_cache_key(filepath) if filepath else None for filepath in asset_files),
+    )
+
+
+def get_collage_template(config: CollageProcessing) -> CollageTemplate:
+    """compiled template of the collage, compiled on first use and if the config or an asset changed."""
+    key = _template_key(config)
+
+    with LOCK_TEMPLATE:
+        if key in TEMPLATE_CACHE:
+            TEMPLATE_CACHE.move_to_end(key)
+            return TEMPLATE_CACHE[key]
+
+    template = compile_collage_template(config)
+    logger.info(f"compiled collage template, {len(template.layers)} layers of which {template.number_captures} are captures")
+
+    with LOCK_TEMPLATE:
+        TEMPLATE_CACHE[key] = template
+        if len(TEMPLATE_CACHE) > MAX_TEMPLATE_CACHE:
+            TEMPLATE_CACHE.popitem(last=False)
+
+    return template
@@ -10,12 +10,7 @@ from PIL import Image
 class ImageContext:
     image: Image.Image
     preview: bool = False
-
-
-@dataclass
-class CollageContext:
-    canvas: Image.Image
-    images: list[Image.Image]
+    persistable: bool = True  # false if a step failed but processing continued, so the result must not be reused later.
 
 
 @dataclass
@@ -0,0 +1,293 @@
+"""
+Run compute intense mediaprocessing in worker processes so multiple captures of a job are processed in parallel.
+
+The entry points are module level functions taking picklable args only, so they are safe to use with the spawn start method.
+Worker processes import the app on their own, mediaprocessing config is handed over with every task to keep workers in sync.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from threading import Lock, Thread
+from typing import Any, TypeVar
+
+from ...appconfig import appconfig
+from ...database.models import Cacheditem, Mediaitem
+from ...utils.media_resizer import resize, resize_jpeg_inmemory
+from ..config.groups.mediaprocessing import GroupMediaprocessing, RembgModelType
+from .assetcache import asset_cache
+from .processes import process_phase1images
+from .steps.image import close_rembg_session, preload_rembg_session
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+
+@dataclass
+class TaskTiming:
+    pid: int
+    task: str
+    duration: float  # seconds spent in the worker, queueing excluded
+
+
+@dataclass
+class WorkerStats:
+    pid: int
+    tasks: int = 0
+    last_task: str = ""
+    last_duration: float = 0.0
+    total_duration: float = 0.0
+
+
+@dataclass
+class ExecutorStats:
+    workers: int
+    last_batch_size: int = 0
+    last_batch_duration: float | None = None
+    per_worker: list[WorkerStats] = field(default_factory=list)
+
+
+def _worker_sync_config(mediaprocessing_config: dict[str, Any]):
+    # the worker has its own appconfig instance loaded from disk, sync the group that is used during processing.
+    appconfig.mediaprocessing = GroupMediaprocessing(**mediaprocessing_config)
+    asset_cache.max_bytes = appconfig.mediaprocessing.asset_cache_size * 1024 * 1024
+
+
+def _worker_init(mediaprocessing_config: dict[str, Any], preload_model: RembgModelType | None):
+    _worker_sync_config(mediaprocessing_config)
+
+    if preload_model:
+        _preload_rembg_session(preload_model)
+
+
+def _preload_rembg_session(model_name: RembgModelType):
+    # same settings as the processing pipeline uses, so the preloaded session is reused.
+    preload_rembg_session(
+        model_name,
+        appconfig.mediaprocessing.remove_background_intra_op_threads,
+        appconfig.mediaprocessing.remove_background_inter_op_threads,
+        appconfig.mediaprocessing.remove_background_inference_process,
+        appconfig.mediaprocessing.remove_background_inference_timeout,
+        appconfig.mediaprocessing.remove_background_inference_size,
+        appconfig.mediaprocessing.remove_background_refine_mask,
+    )
+
+
+def _worker_spawn():
+    # no-op, submitted to spawn the workers right away instead on first use.
+    pass
+
+
+def _worker_entry(mediaprocessing_config: dict[str, Any], fn: Callable[..., R], *args) -> tuple[R, TaskTiming]:
+    _worker_sync_config(mediaprocessing_config)
+
+    start = time.perf_counter()
+    result = fn(*args)
+
+    return result, TaskTiming(os.getpid(), fn.__name__, time.perf_counter() - start)
+
+
+def process_phase1capture(mediaitem: Mediaitem, full_still_length: int) -> tuple[Mediaitem, list[Cacheditem]]:
+    """resize the captured original to unprocessed and create the processed phase-1 image and its scaled versions from it."""
+    assert mediaitem.captured_original
+
+    if mediaitem.captured_original.suffix.lower() in (".jpg", ".jpeg"):
+        # decode once only and keep the unprocessed image in memory, processed is created from that instead reading unprocessed again.
+        unprocessed_image = resize_jpeg_inmemory(mediaitem.captured_original, mediaitem.unprocessed, full_still_length)
+        renditions = process_phase1images(unprocessed_image, mediaitem)
+    else:
+        resize(mediaitem.captured_original, mediaitem.unprocessed, full_still_length)
+        renditions = process_phase1images(mediaitem.unprocessed, mediaitem)
+
+    return mediaitem, renditions
+
+
+class _WorkerFuture(Future):
+    """Future of a task handed to a worker process. Cancelling succeeds only if the task did not start yet,
+    so a cancelled task is guaranteed to not leave any results behind."""
+
+    def __init__(self, inner: Future):
+        super().__init__()
+        self._inner = inner
+
+    def cancel(self) -> bool:
+        # if inner is cancelled, its done callback cancels this future also
+        return self._inner.cancel()
+
+
+class MediaprocessingExecutor:
+    def __init__(self):
+        self._lock = Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self._workers: int = 0
+        self._preload_model: RembgModelType | None = None
+
+        self._worker_stats: dict[int, WorkerStats] = {}
+        self._last_batch_size: int = 0
+        self._last_batch_duration: float | None = None
+
+    def start(self, workers: int, preload_model: RembgModelType | None = None):
+        """Start the worker processes. If a background removal model is given, it's loaded ahead of time in each worker or,
+        without workers, in a background thread of the app process."""
+        with self._lock:
+            self._shutdown_pool()
+
+            self._workers = workers
+            self._preload_model = preload_model
+            self._worker_stats.clear()
+
+            if workers > 0:
+                self._pool = self._create_pool()
+
+        if preload_model and workers == 0:
+            Thread(
+                name="_rembg_preload_thread",
+                target=_preload_rembg_session,
+                args=(preload_model,),
+                daemon=True,
+            ).start()
+
+        logger.info(f"mediaprocessing executor started with {workers} worker processes")
+
+    def stop(self):
+        with self._lock:
+            self._shutdown_pool()
+
+        # the inference process of the app process, if any
+        close_rembg_session()
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # processes are spawned on demand, so a pool that is never used is cheap.
+        pool = ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(appconfig.mediaprocessing.model_dump(mode="json"), self._preload_model),
+        )
+
+        if self._preload_model:
+            # spawn all workers now so they load the model while the app is idle
+            for _ in range(self._workers):
+                pool.submit(_worker_spawn)
+
+        return pool
+
+    def _shutdown_pool(self):
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _replace_broken_pool(self, broken_pool: ProcessPoolExecutor):
+        # a worker died (for example killed due to out of memory), the pool is unusable afterwards. start over.
+        with self._lock:
+            if self._pool is not broken_pool:
+                return  # replaced already by another task of the broken pool or stopped meanwhile
+
+            logger.warning("mediaprocessing worker pool is broken, restarting it")
+            # not waiting, this might be called from the pool's management thread. the workers are gone anyway.
+            broken_pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._create_pool()
+
+    def _record(self, timing: TaskTiming):
+        with self._lock:
+            stats = self._worker_stats.setdefault(timing.pid, WorkerStats(pid=timing.pid))
+            stats.tasks += 1
+            stats.last_task = timing.task
+            stats.last_duration = timing.duration
+            stats.total_duration += timing.duration
+
+        logger.info(f"{timing.task} took {timing.duration:.3f}s in worker {timing.pid}")
+
+    @property
+    def is_parallel(self) -> bool:
+        """true if tasks are processed in worker processes, false if processed in the calling thread."""
+        return self._pool is not None
+
+    def submit(self, fn: Callable[..., R], *args) -> Future[R]:
+        """Submit fn(*args) to a worker process. fn needs to be a module level function and args picklable.
+        Without workers configured, fn is run right away in the calling thread."""
+        config = appconfig.mediaprocessing.model_dump(mode="json")
+
+        with self._lock:
+            pool = self._pool
+
+        if pool is None:
+            out: Future[R] = Future()
+            out.set_running_or_notify_cancel()
+            try:
+                result, timing = _worker_entry(config, fn, *args)
+            except Exception as exc:
+                out.set_exception(exc)
+            else:
+                self._record(timing)
+                out.set_result(result)
+
+            return out
+
+        try:
+            inner = pool.submit(_worker_entry, config, fn, *args)
+        except BrokenProcessPool:
+            self._replace_broken_pool(pool)
+            with self._lock:
+                pool = self._pool
+            assert pool
+            inner = pool.submit(_worker_entry, config, fn, *args)
+
+        worker_future: _WorkerFuture = _WorkerFuture(inner)
+
+        def _done(inner: Future[tuple[R, TaskTiming]]):
+            if inner.cancelled():
+                Future.cancel(worker_future)
+                return
+
+            try:
+                result, timing = inner.result()
+            except BaseException as exc:
+                if isinstance(exc, BrokenProcessPool):
+                    # the worker died during the task, replace the pool before the caller notices so following tasks succeed.
+                    self._replace_broken_pool(pool)
+                worker_future.set_exception(exc)
+            else:
+                self._record(timing)
+                worker_future.set_result(result)
+
+        inner.add_done_callback(_done)
+
+        return worker_future
+
+    def map(self, fn: Callable[..., R], args_list: Iterable[tuple]) -> list[R]:
+        """Fan out fn over all args and wait until all finished. Results are returned in order of args_list."""
+        return self.gather([self.submit(fn, *args) for args in args_list])
+
+    def gather(self, futures: list[Future[R]]) -> list[R]:
+        """Wait for all futures submitted earlier. The time waited is reported as batch duration,
+        so for tasks submitted ahead of time it's the remaining time the job actually had to wait for."""
+        start = time.perf_counter()
+
+        results = [future.result() for future in futures]
+
+        self._last_batch_size = len(futures)
+        self._last_batch_duration = time.perf_counter() - start
+        logger.info(f"waited {self._last_batch_duration:.3f}s for batch of {len(futures)} tasks to finish")
+
+        return results
+
+    def get_stats(self) -> ExecutorStats:
+        with self._lock:
+            return ExecutorStats(
+                workers=self._workers,
+                last_batch_size=self._last_batch_size,
+                last_batch_duration=self._last_batch_duration,
+                per_worker=[WorkerStats(**vars(stats)) for stats in self._worker_stats.values()],
+            )
+
+
+mediaprocessing_executor = MediaprocessingExecutor()
@@ -17,10 +17,18 @@ ErrorHandler = Callable[[Exception, Context, NextStep], None]
 
 
 class PipelineStep(Generic[Context]):
+    # steps that are expensive to compute set this, so their result is stored and reused if the step did not change.
+    persist_result: bool = False
+
     @abstractmethod
     def __call__(self, context: Context, next_step: NextStep) -> None:
         pass
 
+    def cache_key(self) -> str | None:
+        """Identity of the step's parameters. Results are reused only if the key of this and all previous steps is unchanged.
+        None if the step cannot be identified, for example because the result depends on the time."""
+        return None
+
     def __repr__(self) -> str:
         return self.__class__.__name__
 
@@ -0,0 +1,58 @@
+"""
+Persistent cache for the filter previews shown in the filter picker.
+
+Previews are stored per mediaitem and keyed by filter and a version of the mediaitem, so an updated mediaitem gets new previews.
+Outdated versions are replaced when a new version is stored.
+"""
+
+from __future__ import annotations
+
+import logging
+import shutil
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from PIL import Image
+
+from ... import CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class FilterPreviewCache:
+    def __init__(self, path: Path | str = Path(CACHE_PATH, "filterpreviews")):
+        self.path = Path(path)
+
+    def filepath(self, item_id: UUID, filter: str, version: int) -> Path:
+        return Path(self.path, item_id.hex, f"{filter}.{version}.jpg")
+
+    def get(self, item_id: UUID, filter: str, version: int) -> Path | None:
+        filepath = self.filepath(item_id, filter, version)
+
+        return filepath if filepath.is_file() else None
+
+    def store(self, item_id: UUID, filter: str, version: int, image: Image.Image) -> Path:
+        filepath = self.filepath(item_id, filter, version)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        # write to temp file and rename, so concurrent readers never see a partial file
+        tmp_filepath = filepath.with_name(f"{uuid4().hex}.tmp")
+        image.save(tmp_filepath, format="jpeg", quality=80, optimize=False)
+        tmp_filepath.replace(filepath)
+
+        for outdated in filepath.parent.glob(f"{filter}.*.jpg"):
+            if outdated != filepath:
+                outdated.unlink(missing_ok=True)
+
+        return filepath
+
+    def delete_item(self, item_id: UUID):
+        shutil.rmtree(Path(self.path, item_id.hex), ignore_errors=True)
+
+    def clear_all(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+        logger.info("deleted all filter previews")
+
+
+filter_preview_cache = FilterPreviewCache()
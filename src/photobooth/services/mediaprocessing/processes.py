@@ -4,19 +4,22 @@ import logging
 import shutil
 import traceback
 from pathlib import Path
+from uuid import UUID, uuid4
 
 from PIL import Image, ImageOps
 
+from ... import CACHE_PATH
 from ...appconfig import appconfig
-from ...database.models import Mediaitem
+from ...database.models import Cacheditem, DimensionTypes, Mediaitem
 from ...utils.media_encode import encode
 from ...utils.metrics_timer import MetricsTimer
 from ..config.groups.actions import AnimationProcessing, CollageProcessing, MulticameraProcessing, SingleImageProcessing, VideoProcessing
-from .context import AnimationContext, CollageContext, ImageContext, MulticameraContext, VideoContext
+from .collagetemplate import get_collage_template
+from .context import AnimationContext, ImageContext, MulticameraContext, VideoContext
 from .pipeline import NextStep, Pipeline, PipelineStep
+from .stepcache import PersistResultStep, StepCache, step_cache
 from .steps.animation import AlignSizesStep
 from .steps.animation_collage_shared import AddPredefinedImagesStep, PostPredefinedImagesStep
-from .steps.collage import MergeCollageStep
 from .steps.image import FillBackgroundStep, ImageFrameStep, ImageMountStep, PluginFilterStep, RemovebgStep, TextStep
 from .steps.multicamera import AlignAsPerCalibrationStep
 from .steps.video import BoomerangStep
@@ -24,24 +27,38 @@ from .steps.video import BoomerangStep
 logger = logging.getLogger(__name__)
 
 
-def process_image_inner(file_in: Path, config: SingleImageProcessing, preview: bool):
+def process_image_inner(
+    file_in: Path | Image.Image,
+    config: SingleImageProcessing,
+    preview: bool,
+    step_cache_ref: tuple[UUID, str] | None = None,
+):
     """
     Unified handling of images that are just one single capture: 1pictaken (singleimages) and stills that are used in collages or animation
     Since config is different and also can depend on the current number of the image in the capture sequence,
     the config has to be determined externally.
 
     Preview is true if we need a quick generation of a preview for filter selection. Used to save CPU
+    file_in can be an image decoded already, to avoid decoding again. It is transposed in place then.
+    step_cache_ref is the mediaitem id and the key of the input, if given results of expensive steps are stored
+    and processing resumes after the last unchanged step next time.
     """
 
-    image = Image.open(file_in)
-    ImageOps.exif_transpose(image, in_place=True)  # to correct for any orientation set.
-
-    context = ImageContext(image, preview)
-    steps = []
+    steps: list[PipelineStep] = []
 
     # assemble pipeline
     if config.remove_background and not preview:
-        steps.append(RemovebgStep(model_name=appconfig.mediaprocessing.remove_background_model))
+        steps.append(
+            RemovebgStep(
+                model_name=appconfig.mediaprocessing.remove_background_model,
+                intra_op_num_threads=appconfig.mediaprocessing.remove_background_intra_op_threads,
+                inter_op_num_threads=appconfig.mediaprocessing.remove_background_inter_op_threads,
+                inference_process=appconfig.mediaprocessing.remove_background_inference_process,
+                inference_timeout=appconfig.mediaprocessing.remove_background_inference_timeout,
+                inference_size=appconfig.mediaprocessing.remove_background_inference_size,
+                refine_mask=appconfig.mediaprocessing.remove_background_refine_mask,
+            )
+        )
 
     if config.img_background_enable:
         if not config.img_background_file:
@@ -64,6 +81,25 @@ def process_image_inner(file_in: Path, config: SingleImageProcessing, preview: b
 
     # finished assembly
 
+    image = None
+    if step_cache_ref:
+        item_id, input_key = step_cache_ref
+        keys = StepCache.chain_keys(input_key, steps)
+        start, image = step_cache.resume(item_id, steps, keys)
+
+        steps_resumed: list[PipelineStep] = []
+        for step, key in list(zip(steps, keys, strict=True))[start:]:
+            steps_resumed.append(step)
+            if step.persist_result and key:
+                steps_resumed.append(PersistResultStep(step_cache, item_id, key))
+        steps = steps_resumed
+
+    if image is None:
+        image = file_in if isinstance(file_in, Image.Image) else Image.open(file_in)
+        ImageOps.exif_transpose(image, in_place=True)  # to correct for any orientation set.
+
+    context = ImageContext(image, preview)
+
     # setup pipeline.
     pipeline = Pipeline[ImageContext](*steps)
 
@@ -83,14 +119,50 @@ def process_image_inner(file_in: Path, config: SingleImageProcessing, preview: b
     return manipulated_image
 
 
-def process_phase1images(file_in: Path, mediaitem: Mediaitem):
-    manipulated_image = process_image_inner(file_in, SingleImageProcessing(**mediaitem.pipeline_config), preview=False)
+def generate_renditions(images: list[Image.Image], mediaitem: Mediaitem, durations: int | list[int] | None = None) -> list[Cacheditem]:
+    """
+    Create the scaled versions of the processed mediaitem from the images still in memory, so the first view is a cache hit
+    and the processed file does not need to be decoded again. The returned cacheditems are added to the db along with the mediaitem.
+    """
+    renditions: list[Cacheditem] = []
+
+    for dimension in DimensionTypes:
+        dimension_pixel: int = getattr(appconfig.mediaprocessing, f"{dimension.value}_still_length")
+        id = uuid4()
+        rendition = Cacheditem(
+            id=id,
+            mediaitem_id=mediaitem.id,
+            dimension=dimension,
+            processed=True,
+            filepath=Path(CACHE_PATH, id.hex).with_suffix(mediaitem.unprocessed.suffix),
+        )
+
+        scaling_factor = dimension_pixel / max(images[0].size)
+        if scaling_factor >= 1:
+            # processed is small enough already, no need to encode again
+            shutil.copy2(mediaitem.processed, rendition.filepath)
+        else:
+            size = (round(images[0].width * scaling_factor), round(images[0].height * scaling_factor))
+            encode([image.resize(size, Image.Resampling.BICUBIC, reducing_gap=3.0) for image in images], rendition.filepath, durations)
+
+        renditions.append(rendition)
+
+    return renditions
+
+
+def process_phase1images(file_in: Path | Image.Image, mediaitem: Mediaitem) -> list[Cacheditem]:
+    """file_in is the unprocessed image of the mediaitem, so it's identified by the unprocessed file when storing step results."""
+    step_cache_ref = None
+    if appconfig.mediaprocessing.step_cache_enable and mediaitem.unprocessed.is_file():
+        step_cache_ref = (mediaitem.id, StepCache.input_key(mediaitem.unprocessed))
+
+    manipulated_image = process_image_inner(file_in, SingleImageProcessing(**mediaitem.pipeline_config), preview=False, step_cache_ref=step_cache_ref)
 
     ## final: save full result and create scaled versions
     # complete processed version (unprocessed and processed are different here)
     encode([manipulated_image], mediaitem.processed)
 
-    return mediaitem
+    return generate_renditions([manipulated_image], mediaitem)
 
 
 def process_video(video_in: Path, mediaitem: Mediaitem):
@@ -117,48 +189,24 @@ def process_video(video_in: Path, mediaitem: Mediaitem):
     shutil.copy2(mediaitem.unprocessed, mediaitem.processed)
 
 
-def process_and_generate_collage(files_in: list[Path], mediaitem: Mediaitem):
+def process_and_generate_collage(files_in: list[Path], mediaitem: Mediaitem) -> list[Cacheditem]:
     # get config from mediaitem, that is passed as json dict (model_dump) along with it
     config = CollageProcessing(**mediaitem.pipeline_config)
 
-    ## prepare: create canvas and input images
-    canvas_size = (config.canvas_width, config.canvas_height)
-    canvas = Image.new("RGBA", canvas_size, color=None)
-    collage_images: list[Image.Image] = [Image.open(image_in) for image_in in files_in]
-
-    context = CollageContext(canvas, collage_images)
-    steps_phase1: list[PipelineStep[CollageContext]] = []
-    steps_phase1.append(AddPredefinedImagesStep(config.merge_definition))
-    steps_phase1.append(PostPredefinedImagesStep(config.merge_definition))
-    steps_phase1.append(MergeCollageStep(config.merge_definition))
-    pipeline = Pipeline[CollageContext](*steps_phase1)
-    pipeline(context)
-
-    canvas = context.canvas
-
-    ## phase 2
-    context = ImageContext(canvas, False)
-    steps_phase2: list[PipelineStep[ImageContext]] = []
-
-    # assemble pipeline
-    if config.canvas_img_background_enable:
-        if not config.canvas_img_background_file:
-            raise ValueError("image background enabled, but no file given")
-        steps_phase2.append(ImageMountStep(config.canvas_img_background_file))
+    ## static content is precompiled, per job only the captures are composited
+    template = get_collage_template(config)
 
-    if config.canvas_fill_background_enable:
-        steps_phase2.append(FillBackgroundStep(config.canvas_fill_background_color))
+    with MetricsTimer(process_and_generate_collage.__name__):
+        canvas = template.render(files_in)
 
-    if config.canvas_img_front_enable:
-        if not config.canvas_img_front_file:
-            raise ValueError("image frame enabled, but no file given")
-        steps_phase2.append(ImageMountStep(config.canvas_img_front_file, reverse=True))
+        # texts are applied last, those with placeholders differ per job. Static texts are cached by the step.
+        context = ImageContext(canvas, False)
+        steps: list[PipelineStep[ImageContext]] = []
 
-    if config.canvas_texts_enable:
-        steps_phase2.append(TextStep(config.canvas_texts))
+        if config.canvas_texts_enable:
+            steps.append(TextStep(config.canvas_texts))
 
-    pipeline = Pipeline[ImageContext](*steps_phase2)
-    with MetricsTimer(process_and_generate_collage.__name__):
+        pipeline = Pipeline[ImageContext](*steps)
         pipeline(context)
 
     canvas = context.image
@@ -169,8 +217,10 @@ def process_and_generate_collage(files_in: list[Path], mediaitem: Mediaitem):
     # complete processed version (unprocessed and processed are same here for this one)
     shutil.copy2(mediaitem.unprocessed, mediaitem.processed)
 
+    return generate_renditions([canvas], mediaitem)
+
 
-def process_and_generate_animation(files_in: list[Path], mediaitem: Mediaitem):
+def process_and_generate_animation(files_in: list[Path], mediaitem: Mediaitem) -> list[Cacheditem]:
     # get config from mediaitem, that is passed as json dict (model_dump) along with it
     config = AnimationProcessing(**mediaitem.pipeline_config)
 
@@ -191,10 +241,13 @@ def process_and_generate_animation(files_in: list[Path], mediaitem: Mediaitem):
         pipeline(context)
 
     ## create mediaitem
-    encode(context.images, mediaitem.unprocessed, durations=[definition.duration for definition in config.merge_definition])
+    durations = [definition.duration for definition in config.merge_definition]
+    encode(context.images, mediaitem.unprocessed, durations=durations)
     # complete processed version (unprocessed and processed are same here for this one)
     shutil.copy2(mediaitem.unprocessed, mediaitem.processed)
 
+    return generate_renditions(context.images, mediaitem, durations)
+
 
 def process_wigglegram_inner(files_in: list[Path], config: MulticameraProcessing, preview: bool) -> list[Image.Image]:
     ## stage: merge captured images and predefined to one image with transparency
@@ -202,7 +255,7 @@ def process_wigglegram_inner(files_in: list[Path], config: MulticameraProcessing
 
     context = MulticameraContext(multicamera_images)
     steps = []
-    steps.append(AlignAsPerCalibrationStep())
+    steps.append(AlignAsPerCalibrationStep(max_length=config.canvas_max_length))
     # steps.append(AutoPivotPointStep())
     # steps.append(OffsetPerOpticalFlowStep())
     # steps.append(CropCommonAreaStep())
@@ -214,7 +267,7 @@ def process_wigglegram_inner(files_in: list[Path], config: MulticameraProcessing
     return context.images
 
 
-def process_and_generate_wigglegram(files_in: list[Path], mediaitem: Mediaitem):
+def process_and_generate_wigglegram(files_in: list[Path], mediaitem: Mediaitem) -> list[Cacheditem]:
     # get config from mediaitem, that is passed as json dict (model_dump) along with it
     config = MulticameraProcessing(**mediaitem.pipeline_config)
     manipulated_image = process_wigglegram_inner(files_in, config, preview=False)
@@ -227,4 +280,4 @@ def process_and_generate_wigglegram(files_in: list[Path], mediaitem: Mediaitem):
     # unprocessed and processed are same here for now
     shutil.copy2(mediaitem.unprocessed, mediaitem.processed)
 
-    return mediaitem
+    return generate_renditions(sequence_images, mediaitem, config.duration)
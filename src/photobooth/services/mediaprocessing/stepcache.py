@@ -0,0 +1,147 @@
+"""
+Persistent cache for results of expensive pipeline steps, so reprocessing a mediaitem resumes after the last unchanged step.
+
+Results are stored per mediaitem, keyed by the content of the input file and the parameters of all steps up to and including
+the step that produced the result. If any of these change, the key changes and the result is not reused.
+Only steps that set persist_result store their result, cheap steps are just computed again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from PIL import Image
+
+from ... import CACHE_PATH
+from .context import ImageContext
+from .pipeline import NextStep, PipelineStep
+
+logger = logging.getLogger(__name__)
+
+
+class StepCache:
+    def __init__(self, path: Path | str = Path(CACHE_PATH, "steps")):
+        self.path = Path(path)
+
+        # encoding takes some time, so results are written in background and processing is not delayed.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="StepCacheWriter")
+        self._pending: set[Future] = set()
+
+    @staticmethod
+    def input_key(filepath: Path) -> str:
+        """identity of an input file by its content"""
+        with open(filepath, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+    @staticmethod
+    def chain_keys(input_key: str, steps: list[PipelineStep]) -> list[str | None]:
+        """key of the result after each of the steps. Once a step cannot be identified, no later result can be reused."""
+        keys: list[str | None] = []
+        key: str | None = input_key
+
+        for step in steps:
+            step_key = step.cache_key()
+            key = hashlib.sha256(f"{key}|{step_key}".encode()).hexdigest() if key and step_key else None
+            keys.append(key)
+
+        return keys
+
+    def _filepath(self, item_id: UUID, key: str) -> Path:
+        return Path(self.path, item_id.hex, key).with_suffix(".webp")
+
+    def resume(self, item_id: UUID, steps: list[PipelineStep], keys: list[str | None]) -> tuple[int, Image.Image | None]:
+        """index of the first step to compute and the stored result to continue with. (0, None) if nothing is stored."""
+        for index in reversed(range(len(steps))):
+            key = keys[index]
+            if not steps[index].persist_result or not key:
+                continue
+
+            filepath = self._filepath(item_id, key)
+            if not filepath.is_file():
+                continue
+
+            try:
+                with Image.open(filepath) as image_file:
+                    image_file.load()
+                    image = image_file.copy()  # copy to drop the file reference and format info
+
+                logger.info(f"resuming processing of {item_id} after step {steps[index]}, skipped {index + 1} steps")
+                return index + 1, image
+            except Exception as exc:
+                logger.warning(f"could not read stored step result {filepath}, computing again, error: {exc}")
+
+        return 0, None
+
+    def store(self, item_id: UUID, key: str, image: Image.Image):
+        filepath = self._filepath(item_id, key)
+
+        # the folder is created right away, not by the writer. If the item is deleted (maybe by another process) before the
+        # result is written, the folder is missing and the result dropped instead of leaving the folder behind.
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        # copied because later steps might modify the image in place.
+        future = self._writer.submit(self._write, filepath, image.copy())
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def _write(self, filepath: Path, image: Image.Image):
+        # write to temp file and rename, so concurrent readers never see a partial file.
+        # the temp file is outside the item's folder, so the rename is the only change to the folder.
+        tmp_filepath = Path(self.path, f"{uuid4().hex}.tmp")
+        try:
+            image.save(tmp_filepath, format="webp", lossless=True, quality=0, method=0)
+            tmp_filepath.replace(filepath)
+        except FileNotFoundError:
+            logger.info(f"step result {filepath} not stored, the item was deleted meanwhile")
+        except Exception as exc:
+            logger.warning(f"could not store step result {filepath}, error: {exc}")
+        finally:
+            tmp_filepath.unlink(missing_ok=True)
+
+    def flush(self):
+        """wait until all results are written"""
+        for future in list(self._pending):
+            future.result()
+
+    def delete_item(self, item_id: UUID):
+        self.flush()
+
+        # results of worker processes might still be written in background. The folder is moved away atomically first,
+        # so results written later find it missing and are dropped.
+        item_path = Path(self.path, item_id.hex)
+        deleted_path = Path(self.path, f"{uuid4().hex}.deleted")
+        try:
+            item_path.rename(deleted_path)
+        except FileNotFoundError:
+            return
+
+        shutil.rmtree(deleted_path, ignore_errors=True)
+
+    def clear_all(self):
+        self.flush()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+        logger.info("deleted all stored step results")
+
+
+class PersistResultStep(PipelineStep):
+    """Store the result of the previous step, inserted after steps that set persist_result."""
+
+    def __init__(self, cache: StepCache, item_id: UUID, key: str) -> None:
+        self.cache = cache
+        self.item_id = item_id
+        self.key = key
+
+    def __call__(self, context: ImageContext, next_step: NextStep) -> None:
+        if context.persistable:
+            self.cache.store(self.item_id, self.key, context.image)
+
+        next_step(context)
+
+
+step_cache = StepCache()
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import hashlib
 import logging
+import math
+import multiprocessing
 import time
 from collections import OrderedDict
 from datetime import datetime
 from enum import Enum
 from itertools import chain
 from pathlib import Path
+from string import Formatter
 from threading import Lock
 
 from PIL import Image, ImageDraw, ImageFont, ImageOps
@@ -15,20 +18,29 @@ from pydantic_extra_types.color import Color
 
 from ....plugins import pm
 from ....utils.exceptions import PipelineError
+from ....utils.rembg.inference_process import InferenceProcessSession
 from ....utils.rembg.rembg import remove
 from ....utils.rembg.session_factory import new_session
 from ....utils.rembg.sessions.base import BaseSession
 from ...config.groups.mediaprocessing import RembgModelType
 from ...config.models import models
+from ..assetcache import asset_cache
 from ..context import ImageContext
 from ..pipeline import NextStep, PipelineStep
 
 logger = logging.getLogger(__name__)
 
 rembg_session: BaseSession | None = None
+rembg_session_key: tuple | None = None  # settings the session was created with
+LOCK_SESSION = Lock()
 REMOVE_CACHE: OrderedDict[str, Image.Image] = OrderedDict()
 MAX_CACHE = 3
 LOCK_CACHE = Lock()
+FONT_CACHE: OrderedDict[tuple, ImageFont.FreeTypeFont] = OrderedDict()
+MAX_FONT_CACHE = 16
+TEXTLAYER_CACHE: OrderedDict[tuple, tuple[Image.Image, tuple[int, int]] | None] = OrderedDict()
+MAX_TEXTLAYER_CACHE = 32
+LOCK_TEXT = Lock()  # freetype faces are not threadsafe, so all text rendering is serialized
 
 
 def get_plugin_avail_filters():
@@ -42,10 +54,23 @@ def get_plugin_userselectable_filters():
 PluginFilters = Enum("PluginFilters", get_plugin_avail_filters(), type=str)
 
 
+def _file_cache_key(filepath: Path | str) -> str | None:
+    # assets are identified by path and modification, so replacing a file invalidates stored results.
+    try:
+        stat = Path(filepath).stat()
+    except OSError:
+        return None
+
+    return f"{Path(filepath).resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
 class PluginFilterStep(PipelineStep):
     def __init__(self, plugin_filter: PluginFilters) -> None:
         self.plugin_filter: PluginFilters = plugin_filter
 
+    def cache_key(self) -> str | None:
+        return f"{self}:{self.plugin_filter.value if self.plugin_filter else None}"
+
     def __call__(self, context: ImageContext, next_step: NextStep) -> None:
         if (not self.plugin_filter) or (self.plugin_filter and self.plugin_filter.value == "original"):
             # nothing to do here...
@@ -72,6 +97,9 @@ class FillBackgroundStep(PipelineStep):
     def __init__(self, color: Color | str) -> None:
         self.color = color
 
+    def cache_key(self) -> str | None:
+        return f"{self}:{Color(self.color).as_rgb_tuple()}"
+
     def __call__(self, context: ImageContext, next_step: NextStep) -> None:
         if not context.image.has_transparency_data:
             logger.warning("no transparency in image, fill background skipped!")
@@ -93,6 +121,10 @@ class ImageMountStep(PipelineStep):
         self.background_file = background_file
         self.reverse = reverse
 
+    def cache_key(self) -> str | None:
+        file_key = _file_cache_key(self.background_file)
+        return f"{self}:{file_key}:{self.reverse}" if file_key else None
+
     def __call__(self, context: ImageContext, next_step: NextStep) -> None:
         if not context.image.has_transparency_data:
             logger.warning("no transparency in image, fill background skipped!")
@@ -100,19 +132,12 @@ class ImageMountStep(PipelineStep):
             return  # needed, otherwise remaining code will be executed after returning from next_step
 
         try:
-            background_path = self.background_file
-            background_img = Image.open(background_path).convert("RGBA")
+            # fit background image to actual image size
+            # this might crop the background but fills the image fully. automatic centered.
+            background_img_adjusted = asset_cache.get_fitted(self.background_file, context.image.size)
         except FileNotFoundError as exc:
             raise PipelineError(f"file {str(self.background_file)} not found!") from exc
 
-        # fit background image to actual image size
-        # this might crop the background but fills the image fully. automatic centered.
-        background_img_adjusted = ImageOps.fit(
-            background_img,
-            context.image.size,
-            method=Image.Resampling.LANCZOS,
-        )
-
         # paste the actual image to the background
         if self.reverse:
             # copy() to output a new image so return output is consistent between reverse True/False
@@ -121,9 +146,10 @@ class ImageMountStep(PipelineStep):
             output.paste(background_img_adjusted, mask=background_img_adjusted)
             context.image = output
         else:
-            # mount image on top of loaded file.
-            background_img_adjusted.paste(context.image, mask=context.image)
-            context.image = background_img_adjusted
+            # mount image on top of loaded file. copy() because the cached background is shared.
+            output = background_img_adjusted.copy()
+            output.paste(context.image, mask=context.image)
+            context.image = output
 
         next_step(context)
 
@@ -138,19 +164,17 @@ class ImageFrameStep(PipelineStep):
     def __init__(self, frame_file: Path | str) -> None:
         self.frame_file = frame_file
 
+    def cache_key(self) -> str | None:
+        file_key = _file_cache_key(self.frame_file)
+        return f"{self}:{file_key}" if file_key else None
+
     def __call__(self, context: ImageContext, next_step: NextStep) -> None:
         # check frame is avail, otherwise send pipelineerror
         try:
-            frame_path = self.frame_file
-            # convert to rgba because there could be paletted PNGs in mode P but still with alpha in info.transparency.
-            # converting to RGBA moves info.transparency to actual channel and handling is easy
-            image_frame = Image.open(frame_path).convert("RGBA")
+            image_frame = asset_cache.get_rgba(self.frame_file)
+            transparent_xy = asset_cache.get_transparent_bbox(self.frame_file)
         except FileNotFoundError as exc:
             raise PipelineError(f"file {str(self.frame_file)} not found!") from exc
-
-        try:
-            # detect boundary box of transparent area, for this get alphachannel, invert and getbbox:
-            transparent_xy = ImageOps.invert(image_frame.getchannel("A")).getbbox()  # getchannel A returns img mode 'L'
         except Exception as exc:  # no transparent channel A
             raise PipelineError(f"error processing image, cannot apply stage, error {exc}") from exc
 
@@ -171,7 +195,6 @@ class ImageFrameStep(PipelineStep):
 
         context.image = result_image
         del image_fitted
-        del image_frame
 
         next_step(context)
 
@@ -180,6 +203,28 @@ class TextStep(PipelineStep):
     def __init__(self, textstageconfig: list[models.TextsConfig]) -> None:
         self.textstageconfig = textstageconfig
 
+    @staticmethod
+    def is_static_text(text: str) -> bool:
+        # text without placeholders like {date} or {time} is the same for every image
+        return all(field_name is None for _, field_name, _, _ in Formatter().parse(text))
+
+    @staticmethod
+    def get_font(font: Path, size: int) -> ImageFont.FreeTypeFont:
+        key = (str(font), font.stat().st_mtime_ns, size)
+
+        with LOCK_TEXT:
+            if key in FONT_CACHE:
+                FONT_CACHE.move_to_end(key)
+                return FONT_CACHE[key]
+
+            img_font = ImageFont.truetype(font=str(font), size=size)
+
+            FONT_CACHE[key] = img_font
+            if len(FONT_CACHE) > MAX_FONT_CACHE:
+                FONT_CACHE.popitem(last=False)
+
+        return img_font
+
     def __call__(self, context: ImageContext, next_step: NextStep) -> None:
         updated_image = context.image.copy()
 
@@ -197,19 +242,40 @@ class TextStep(PipelineStep):
             if not textconfig.font.is_file():
                 raise PipelineError(f"font {textconfig.font} not found!")
 
-            img_font = ImageFont.truetype(font=str(textconfig.font), size=textconfig.font_size)
-
-            draw_rotated_text(
-                image=updated_image,
-                angle=textconfig.rotate,
-                xy=(textconfig.pos_x, textconfig.pos_y),
-                text=textconfig.text.format(
-                    date=datetime.now().strftime("%x"),
-                    time=datetime.now().strftime("%X"),
-                ),
-                fill=Color(textconfig.color).as_rgb_tuple(),
-                font=img_font,
+            img_font = self.get_font(textconfig.font, textconfig.font_size)
+            text = textconfig.text.format(
+                date=datetime.now().strftime("%x"),
+                time=datetime.now().strftime("%X"),
             )
+            xy = (textconfig.pos_x, textconfig.pos_y)
+
+            if self.is_static_text(textconfig.text):
+                # the layer depends on the canvas size because rotation is around the canvas center
+                key = (
+                    text,
+                    str(textconfig.font),
+                    textconfig.font.stat().st_mtime_ns,
+                    textconfig.font_size,
+                    textconfig.rotate,
+                    xy,
+                    updated_image.size,
+                )
+
+                with LOCK_TEXT:
+                    if key in TEXTLAYER_CACHE:
+                        TEXTLAYER_CACHE.move_to_end(key)
+                    else:
+                        TEXTLAYER_CACHE[key] = render_rotated_text_layer(updated_image.size, textconfig.rotate, xy, text, font=img_font)
+                        if len(TEXTLAYER_CACHE) > MAX_TEXTLAYER_CACHE:
+                            TEXTLAYER_CACHE.popitem(last=False)
+
+                    text_layer = TEXTLAYER_CACHE[key]
+            else:
+                with LOCK_TEXT:
+                    text_layer = render_rotated_text_layer(updated_image.size, textconfig.rotate, xy, text, font=img_font)
+
+            if text_layer:
+                paste_text_layer(updated_image, text_layer, fill=Color(textconfig.color).as_rgb_tuple())
 
         context.image = updated_image
         del updated_image
@@ -218,8 +284,29 @@ class TextStep(PipelineStep):
 
 
 class RemovebgStep(PipelineStep):
-    def __init__(self, model_name: RembgModelType) -> None:
+    persist_result = True  # computing the model takes seconds
+
+    def __init__(
+        self,
+        model_name: RembgModelType,
+        intra_op_num_threads: int = 0,
+        inter_op_num_threads: int = 0,
+        inference_process: bool = False,
+        inference_timeout: float = 30.0,
+        inference_size: int = 0,
+        refine_mask: bool = False,
+    ) -> None:
         self.model_name = model_name
+        self.intra_op_num_threads = intra_op_num_threads
+        self.inter_op_num_threads = inter_op_num_threads
+        self.inference_process = inference_process
+        self.inference_timeout = inference_timeout
+        self.inference_size = inference_size
+        self.refine_mask = refine_mask
+
+    def cache_key(self) -> str | None:
+        # threads and process don't affect the result
+        return f"{self}:{self.model_name}:{self.inference_size}:{self.refine_mask}"
 
     @staticmethod
     def hash_image_fast(img: Image.Image):
@@ -252,15 +339,19 @@ class RemovebgStep(PipelineStep):
         return result
 
     def __call__(self, context: ImageContext, next_step: NextStep) -> None:
-        global rembg_session
-
         try:
-            # maybe in future we can reuse a session and predownload models, but as of now we start a session only on first use
-            if not rembg_session or rembg_session.name() != self.model_name:
-                logger.debug(f"ai background removal model {self.model_name} session initialized")
-                rembg_session = new_session(model_name=self.model_name)
+            # usually the session is preloaded already during startup, otherwise it's started on first use.
+            session = get_rembg_session(
+                self.model_name,
+                self.intra_op_num_threads,
+                self.inter_op_num_threads,
+                self.inference_process,
+                self.inference_timeout,
+                self.inference_size,
+                self.refine_mask,
+            )
 
-            cutout_image = self.remove_with_cache(img=context.image, session=rembg_session)
+            cutout_image = self.remove_with_cache(img=context.image, session=session)
 
             assert type(cutout_image) is Image.Image
             assert cutout_image is not context.image
@@ -271,35 +362,164 @@ class RemovebgStep(PipelineStep):
         except Exception as exc:
             logger.error(f"could not remove background, error {exc}")
             # log the err, but continue anyways...
+            context.persistable = False
 
         next_step(context)
 
 
-def draw_rotated_text(image: Image.Image, angle: int, xy: tuple[int, int], text: str, fill, *args, **kwargs):
-    """Draw text at an angle into an image, takes the same arguments
-        as Image.text() except for:
+def get_rembg_session(
+    model_name: RembgModelType,
+    intra_op_num_threads: int = 0,
+    inter_op_num_threads: int = 0,
+    inference_process: bool = False,
+    inference_timeout: float = 30.0,
+    inference_size: int = 0,
+    refine_mask: bool = False,
+) -> BaseSession:
+    """Session of the model, created on first use only and reused later. Threadsafe so preloading and processing can access it concurrently.
+
+    If inference_process is set, the inference runs in a dedicated process so the app process is not stalled.
+    Mediaprocessing workers are separate processes already, so they always compute in their own process."""
+    global rembg_session, rembg_session_key
+
+    with LOCK_SESSION:
+        use_process = inference_process and multiprocessing.parent_process() is None
+        key = (model_name, intra_op_num_threads, inter_op_num_threads, use_process, inference_timeout, inference_size, refine_mask)
+
+        if not rembg_session or rembg_session_key != key:
+            _close_rembg_session()
+
+            if use_process:
+                rembg_session = InferenceProcessSession(
+                    model_name,
+                    intra_op_num_threads,
+                    inter_op_num_threads,
+                    inference_timeout,
+                    inference_size=inference_size,
+                    refine_mask=refine_mask,
+                )
+            else:
+                rembg_session = new_session(
+                    model_name,
+                    intra_op_num_threads=intra_op_num_threads,
+                    inter_op_num_threads=inter_op_num_threads,
+                    inference_size=inference_size,
+                    refine_mask=refine_mask,
+                )
+            rembg_session_key = key
+            logger.debug(f"ai background removal model {model_name} session initialized, dedicated process: {use_process}")
+
+        return rembg_session
+
+
+def _close_rembg_session():
+    global rembg_session, rembg_session_key
+
+    if isinstance(rembg_session, InferenceProcessSession):
+        rembg_session.close()
+
+    rembg_session = None
+    rembg_session_key = None
+
+
+def close_rembg_session():
+    """Release the session and stop the inference process if any. The session is created again on next use."""
+    with LOCK_SESSION:
+        _close_rembg_session()
+
+
+def preload_rembg_session(
+    model_name: RembgModelType,
+    intra_op_num_threads: int = 0,
+    inter_op_num_threads: int = 0,
+    inference_process: bool = False,
+    inference_timeout: float = 30.0,
+    inference_size: int = 0,
+    refine_mask: bool = False,
+):
+    """Load the model and run a first inference, because the first inference takes significantly longer than following ones."""
+    try:
+        session = get_rembg_session(
+            model_name,
+            intra_op_num_threads,
+            inter_op_num_threads,
+            inference_process,
+            inference_timeout,
+            inference_size,
+            refine_mask,
+        )
 
-    :param image: Image to write text into
+        tms = time.monotonic()
+        session.predict(Image.new("RGB", (640, 480)))
+        tme = time.monotonic()
+
+        logger.info(f"preloaded ai background removal model {model_name}, load took {session.load_duration:0.3}s, first inference {tme - tms:0.3}s")
+    except Exception as exc:
+        logger.error(f"could not preload background removal model {model_name}, error {exc}")
+
+
+def render_rotated_text_layer(
+    canvas_size: tuple[int, int], angle: int, xy: tuple[int, int], text: str, *args, **kwargs
+) -> tuple[Image.Image, tuple[int, int]] | None:
+    """Render text into a mask that covers only the text's bounding box, rotated like the whole canvas
+    was rotated around its center. Takes the same arguments as ImageDraw.text() except for:
+
+    :param canvas_size: Size of the image the text is pasted into later
     :param angle: Angle to write text at
+    :return: The mask and its position on the canvas, None if the text has no visible pixel
     """
 
+    # bbox of the text on the canvas, 1px margin to keep the antialiased edges
+    left, top, right, bottom = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox(xy, text, *args, **kwargs)
+    left, top, right, bottom = left - 1, top - 1, right + 1, bottom + 1
+
+    if right - left <= 2 or bottom - top <= 2:
+        return None
+
     # build a transparency mask large enough to hold the text
-    mask = Image.new("L", image.size, 0)  # "L" = 8bit pixels, greyscale
+    mask = Image.new("L", (right - left, bottom - top), 0)  # "L" = 8bit pixels, greyscale
 
     # add text to mask
     draw = ImageDraw.Draw(mask)
-    draw.text(xy, text, 255, *args, **kwargs)
+    draw.text((xy[0] - left, xy[1] - top), text, 255, *args, **kwargs)
 
     if angle == 0:
-        rotated_mask = mask
-    else:
-        # rotated_mask = mask.rotate(angle)
-        rotated_mask = mask.rotate(
-            angle=angle,
-            expand=False,
-            resample=Image.Resampling.BICUBIC,
-        )  # pos values = counter clockwise
+        return mask, (left, top)
+
+    # rotate the layer's center around the canvas center to find where the rotated layer is placed
+    center_x, center_y = canvas_size[0] / 2, canvas_size[1] / 2
+    dx, dy = left + mask.width / 2 - center_x, top + mask.height / 2 - center_y
+    rad = math.radians(angle)
+    rotated_center_x = center_x + dx * math.cos(rad) + dy * math.sin(rad)
+    rotated_center_y = center_y - dx * math.sin(rad) + dy * math.cos(rad)
+
+    rotated_mask = mask.rotate(
+        angle=angle,
+        expand=True,
+        resample=Image.Resampling.BICUBIC,
+    )  # pos values = counter clockwise
+
+    return rotated_mask, (round(rotated_center_x - rotated_mask.width / 2), round(rotated_center_y - rotated_mask.height / 2))
+
+
+def paste_text_layer(image: Image.Image, text_layer: tuple[Image.Image, tuple[int, int]], fill):
+    """Paste a layer from render_rotated_text_layer in given color into the image. Parts outside the image are clipped."""
+    mask, box = text_layer
 
     # paste the appropriate color, with the text transparency mask
-    colored_text_image = Image.new("RGBA", image.size, fill)
-    image.paste(colored_text_image, rotated_mask)
+    colored_text_image = Image.new("RGBA", mask.size, fill)
+    image.paste(colored_text_image, box, mask)
+
+
+def draw_rotated_text(image: Image.Image, angle: int, xy: tuple[int, int], text: str, fill, *args, **kwargs):
+    """Draw text at an angle into an image, takes the same arguments
+        as Image.text() except for:
+
+    :param image: Image to write text into
+    :param angle: Angle to write text at
+    """
+
+    text_layer = render_rotated_text_layer(image.size, angle, xy, text, *args, **kwargs)
+
+    if text_layer:
+        paste_text_layer(image, text_layer, fill)
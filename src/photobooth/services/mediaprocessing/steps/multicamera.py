@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import logging
+from pathlib import Path
+from threading import Lock
 
 import cv2
 import numpy as np
@@ -15,6 +17,27 @@ from ..pipeline import NextStep, PipelineStep
 
 logger = logging.getLogger(__name__)
 
+CALIBRATION_CACHE: dict[Path, tuple[tuple, SimpleCalibrationUtil]] = {}
+LOCK_CALIBRATION = Lock()
+
+
+def get_calibration_util(calibration_data_path: Path) -> SimpleCalibrationUtil:
+    """calibration util with the data loaded. Loaded again only if the calibration files changed, the warp maps are kept meanwhile."""
+    files = sorted(calibration_data_path.glob(f"{SimpleCalibrationUtil.FILE_PREFIX}_*{SimpleCalibrationUtil.FILE_SUFFIX}"))
+    key = tuple((file.name, file.stat().st_mtime_ns, file.stat().st_size) for file in files)
+
+    with LOCK_CALIBRATION:
+        if calibration_data_path in CALIBRATION_CACHE and CALIBRATION_CACHE[calibration_data_path][0] == key:
+            return CALIBRATION_CACHE[calibration_data_path][1]
+
+        cal_util = SimpleCalibrationUtil()
+        cal_util.load_calibration_data(calibration_data_path)
+        logger.info("Calibration data loaded successfully")
+
+        CALIBRATION_CACHE[calibration_data_path] = (key, cal_util)
+
+    return cal_util
+
 
 class AutoPivotPointStep(PipelineStep):
     def __init__(self) -> None:
@@ -235,21 +258,26 @@ class AlignAsPerCalibrationStep(PipelineStep):
     The backends only use a subset of the calibration util: load and align, so only these are exposed.
     Calibration routine and saving is done in the multicam-tool which is actually living in the api backend endpoints."""
 
-    def __init__(self, crop: bool = True) -> None:
-        self._cal_util = SimpleCalibrationUtil()
+    def __init__(self, crop: bool = True, max_length: int = 0) -> None:
         self._calibration_data_path = CALIBRATION_DATA_PATH
         self._crop = crop
+        self._max_length = max_length
 
         try:
-            self._cal_util.load_calibration_data(self._calibration_data_path)
-            logger.info("Calibration data loaded successfully")
+            self._cal_util = get_calibration_util(self._calibration_data_path)
         except Exception as exc:
+            self._cal_util = SimpleCalibrationUtil()
             logger.warning(f"No valid multicam calibration loaded, the results may suffer. Error: {exc}")
 
     def __call__(self, context: MulticameraContext, next_step: NextStep) -> None:
         try:
-            context.images = self._cal_util.align_all(context.images, crop=self._crop)
+            context.images = self._cal_util.align_all(context.images, crop=self._crop, max_length=self._max_length)
         except Exception as exc:
             logger.warning(f"Failed aligning multicam images using calibration. Please rerun multicamera calibration. Error: {exc}")
 
+            # unaligned images are still scaled to the output size
+            if self._max_length:
+                for image in context.images:
+                    image.thumbnail((self._max_length, self._max_length), Image.Resampling.LANCZOS)
+
         next_step(context)
@@ -15,7 +15,10 @@ from .acquisition import AcquisitionService
 from .base import BaseService
 from .collection import MediacollectionService
 from .config.groups.actions import MultiImageJobControl
+from .config.groups.mediaprocessing import RembgModelType
 from .information import InformationService
+from .mediaprocessing.assetcache import asset_cache
+from .mediaprocessing.executor import mediaprocessing_executor
 from .processor.animation import JobModelAnimation
 from .processor.base import Capture, JobModelBase
 from .processor.collage import JobModelCollage
@@ -50,7 +53,21 @@ class DbListenter:
                 logger.info(f"add {len(model._result_mediaitems)} results to db")
 
                 for items in model._result_mediaitems:
-                    self._mediacollection_service.add_item(items)  # and to the db.
+                    renditions = [rendition for rendition in model._result_renditions if rendition.mediaitem_id == items.id]
+                    self._mediacollection_service.add_item(items, renditions)  # and to the db.
+
+
+class AcquisitionLoadListener:
+    def __init__(self, acquisition_service: AcquisitionService):
+        self._acquisition_service = acquisition_service
+
+    def on_enter_state(self, target: State):
+        if target.id == ProcessingMachine.completed.id:
+            self._acquisition_service.signal_postprocessing(True)
+
+    def on_exit_state(self, source: State):
+        if source.id == ProcessingMachine.completed.id:
+            self._acquisition_service.signal_postprocessing(False)
 
 
 class PluginEventHooks:
@@ -112,12 +129,32 @@ class ProcessingService(BaseService):
 
     def start(self):
         super().start()
+
+        asset_cache.max_bytes = appconfig.mediaprocessing.asset_cache_size * 1024 * 1024
+        asset_cache.clear()
+        mediaprocessing_executor.start(appconfig.mediaprocessing.processing_workers, self._get_preload_model())
+
         super().started()
 
     def stop(self):
         super().stop()
+
+        mediaprocessing_executor.stop()
+
         super().stopped()
 
+    @staticmethod
+    def _get_preload_model() -> RembgModelType | None:
+        # preloading the model needs memory, so it's done only if there is any action using it.
+        remove_background_used = any(action.processing.remove_background for action in appconfig.actions.image) or any(
+            action.processing.capture_remove_background for action in appconfig.actions.collage
+        )
+
+        if appconfig.mediaprocessing.remove_background_preload and remove_background_used:
+            return appconfig.mediaprocessing.remove_background_model
+        else:
+            return None
+
     def is_occupied(self) -> bool:
         return self._workflow_jobmodel is not None
 
@@ -183,7 +220,11 @@ class ProcessingService(BaseService):
             sse_service.dispatch_event(SseEventProcessStateinfo(None, None, None))
 
         finally:
+            # on abort or failure, there might be still phase-1 processing started ahead of time
+            self._workflow_jobmodel.cancel_phase1images()
             self._workflow_jobmodel = None
+            # if the job failed during postprocessing, the state is never left regularly
+            self._acquisition_service.signal_postprocessing(False)
             # send empty response to ui so it knows it's in idle again.
 
     def initial_emit(self):
@@ -209,7 +250,8 @@ class ProcessingService(BaseService):
         # add listener to the job
         self._workflow_jobmodel._status_sm.add_listener(FrontendNotifierEventHooks())  # 1st listener executed,
         self._workflow_jobmodel._status_sm.add_listener(PluginEventHooks())  # 2nd
-        self._workflow_jobmodel._status_sm.add_listener(DbListenter(self._mediacollection_service))  # 4rd, then machine, then model.
+        self._workflow_jobmodel._status_sm.add_listener(DbListenter(self._mediacollection_service))  # 3rd
+        self._workflow_jobmodel._status_sm.add_listener(AcquisitionLoadListener(self._acquisition_service))  # 4th, then machine, then model.
 
         ## run in separate thread
         self._process_thread = Thread(name="_processingservice_thread", target=self._process_fun, args=(), daemon=True)
@@ -12,7 +12,7 @@ from ..acquisition import AcquisitionService
 from ..config.groups.actions import AnimationConfigurationSet, SingleImageProcessing
 from ..config.models.models import PluginFilters
 from ..mediaprocessing.processes import process_and_generate_animation
-from .base import Capture, CaptureSet, JobModelBase
+from .base import CaptureSet, JobModelBase
 
 logger = logging.getLogger(__name__)
 
@@ -30,27 +30,46 @@ class JobModelAnimation(JobModelBase[AnimationConfigurationSet]):
         return self._get_number_of_captures_from_merge_definition(self._configuration_set.processing.merge_definition)
 
     def on_enter_counting(self):
-        self._acquisition_service.thrill_still()
-
         super().on_enter_counting()
 
+        # the countdown is started, so the camera can be switched to still mode ahead of time
+        self._acquisition_service.thrill_still(self._countdown_timer.duration)
+
     def on_exit_counting(self):
         super().on_exit_counting()
 
     def on_enter_capture(self):
         logger.info(f"current capture ({self.captures_taken + 1}/{self.total_captures_to_take}, remaining {self.remaining_captures_to_take - 1})")
 
-        captureset = CaptureSet([Capture(self._acquisition_service.wait_for_still_file())])
+        for capture in self.capture_stills():
+            captureset = CaptureSet([capture])
+
+            # add to tmp collection
+            # update model so it knows the latest number of captures and the machine can react accordingly if finished
+            self._capture_sets.append(captureset)
 
-        # add to tmp collection
-        # update model so it knows the latest number of captures and the machine can react accordingly if finished
-        self._capture_sets.append(captureset)
+            logger.info(f"captureset {captureset} successful")
 
-        logger.info(f"captureset {captureset} successful")
+            # process the capture while the countdown for the next one is running (or the rest of the burst is captured) already
+            self.prefetch_phase1image(
+                capture,
+                self._configuration_set.jobcontrol.show_individual_captures_in_gallery,
+                self._phase1_config(self.captures_taken - 1),
+            )
 
     def on_exit_capture(self):
         pass
 
+    def _phase1_config(self, index: int) -> SingleImageProcessing:
+        # list only captured_images from merge_definition (excludes predefined)
+        merge_definition_capture_only = [item for item in self._configuration_set.processing.merge_definition if not item.predefined_image]
+
+        return SingleImageProcessing(
+            texts_enable=False,
+            img_frame_enable=False,
+            image_filter=merge_definition_capture_only[index].image_filter if index is not None else PluginFilters("original"),
+        )
+
     def on_enter_approval(self):
         # set an uuid of capture to approve
         self._approval_id = self._capture_sets[-1].captures[0].uuid
@@ -62,29 +81,17 @@ class JobModelAnimation(JobModelBase[AnimationConfigurationSet]):
     def on_enter_completed(self):
 
         ## PHASE 1:
-        # postprocess each capture individually
+        # postprocess each capture individually, captures might have been started during the countdown already
         captures_to_process = [capture_set.captures[0] for capture_set in self._capture_sets]
-        # list only captured_images from merge_definition (excludes predefined)
-        merge_definition_capture_only = [item for item in self._configuration_set.processing.merge_definition if not item.predefined_image]
-        phase1_mediaitems: list[Mediaitem] = []
-
-        for index, capture_to_process in enumerate(captures_to_process):
-            logger.info(f"postprocessing capture: {capture_to_process=}")
-
-            _config = SingleImageProcessing(
-                texts_enable=False,
-                img_frame_enable=False,
-                image_filter=merge_definition_capture_only[index].image_filter if index is not None else PluginFilters("original"),
-            )
+        logger.info(f"postprocessing captures: {captures_to_process=}")
 
-            mediaitem = self.complete_phase1image(
-                capture_to_process.filepath,
-                self._configuration_set.jobcontrol.show_individual_captures_in_gallery,
-                _config,
-            )
-            phase1_mediaitems.append(mediaitem)
-
-            logger.info(f"capture {mediaitem=} successful")
+        phase1_mediaitems = self.complete_phase1images(
+            [
+                (capture_to_process, self._configuration_set.jobcontrol.show_individual_captures_in_gallery, self._phase1_config(index))
+                for index, capture_to_process in enumerate(captures_to_process)
+            ]
+        )
+        logger.info(f"captures {phase1_mediaitems=} successful")
 
         assert len(phase1_mediaitems) > 0
 
@@ -102,7 +109,7 @@ class JobModelAnimation(JobModelBase[AnimationConfigurationSet]):
             pipeline_config=self._configuration_set.processing.model_dump(mode="json"),
         )
 
-        process_and_generate_animation([item.processed for item in phase1_mediaitems], phase2_mediaitem)
+        self._result_renditions.extend(process_and_generate_animation([item.processed for item in phase1_mediaitems], phase2_mediaitem))
 
         assert phase2_mediaitem.unprocessed.is_file()
         assert phase2_mediaitem.processed.is_file()
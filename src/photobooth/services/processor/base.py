@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import logging
 from abc import ABC, abstractmethod
+from collections.abc import Generator
+from concurrent.futures import Future
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TYPE_CHECKING, Generic, TypeVar
@@ -11,10 +13,9 @@ from statemachine import Event
 
 from ... import PATH_CAMERA_ORIGINAL, PATH_PROCESSED, PATH_UNPROCESSED
 from ...appconfig import appconfig
-from ...database.models import Mediaitem, MediaitemTypes
+from ...database.models import Cacheditem, Mediaitem, MediaitemTypes
 from ...utils.countdowntimer import CountdownTimer
 from ...utils.helper import filename_str_time
-from ...utils.media_resizer import resize
 from ..config.groups.actions import (
     BaseConfigurationSet,
     MulticameraJobControl,
@@ -24,7 +25,8 @@ from ..config.groups.actions import (
     VideoJobControl,
 )
 from ..config.models.models import AnimationMergeDefinition, CollageMergeDefinition
-from ..mediaprocessing.processes import process_phase1images
+from ..mediaprocessing.executor import mediaprocessing_executor, process_phase1capture
+from ..mediaprocessing.stepcache import step_cache
 from .machine.processingmachine import ProcessingMachine
 
 if TYPE_CHECKING:
@@ -63,7 +65,12 @@ class JobModelBase(ABC, Generic[T]):
         # intermediate-data to reuse in different states
         self._capture_sets: list[CaptureSet] = list()
 
+        # phase-1 processing started ahead of time, by capture uuid
+        self._phase1_pending: dict[UUID, tuple[Mediaitem, Future[tuple[Mediaitem, list[Cacheditem]]]]] = {}
+
         self._result_mediaitems: list[Mediaitem] | None = None
+        # scaled versions created during processing already, added to the cache along with the results
+        self._result_renditions: list[Cacheditem] = []
         self._present_mediaitem_id: UUID | None = None
         self._approval_id: UUID | None = None
 
@@ -144,11 +151,13 @@ class JobModelBase(ABC, Generic[T]):
         if event == self._status_sm.reject:
             logger.info("rejected captureset, remove last captureset")
             captureset = self._capture_sets.pop()
+            self.cancel_phase1images(captureset.captures)
             remove_files(captureset)
 
         if event == self._status_sm.abort:
             logger.info("abort job, remove all capturesets")
             for captureset in self._capture_sets:
+                self.cancel_phase1images(captureset.captures)
                 remove_files(captureset)
 
             self._capture_sets.clear()
@@ -209,13 +218,33 @@ class JobModelBase(ABC, Generic[T]):
     def wait_countdown_finished(self):
         self._countdown_timer.wait_countdown_finished()
 
-    def complete_phase1image(self, capture_to_process: Path, show_in_gallery: bool, pipeline_config: SingleImageProcessing) -> Mediaitem:
-        original_filenamepath = Path(filename_str_time()).with_suffix(capture_to_process.suffix)
+    def capture_stills(self) -> Generator[Capture, None, None]:
+        """capture the still(s) of the capture state. Multi-image jobs without countdown and approval between the captures
+        take all remaining stills in one burst request, so the backend doesn't switch modes between the stills."""
+        jobcontrol = self._configuration_set.jobcontrol
+        if (
+            isinstance(jobcontrol, MultiImageJobControl)
+            and jobcontrol.countdown_capture_second_following == 0
+            and not jobcontrol.ask_approval_each_capture
+            and self.remaining_captures_to_take > 1
+        ):
+            for filepath in self._acquisition_service.wait_for_burst_files(self.remaining_captures_to_take, destination=PATH_CAMERA_ORIGINAL):
+                yield Capture(filepath)
+        else:
+            yield Capture(self._acquisition_service.wait_for_still_file(destination=PATH_CAMERA_ORIGINAL))
 
-        # very first, move the capture_to_process to originals. if anything later fails, at least we got the file in safe place.
-        captured_original = capture_to_process.rename(Path(PATH_CAMERA_ORIGINAL, original_filenamepath))
+    def _prepare_phase1mediaitem(self, capture_to_process: Path, show_in_gallery: bool, pipeline_config: SingleImageProcessing) -> Mediaitem:
+        if capture_to_process.parent.resolve() == Path(PATH_CAMERA_ORIGINAL).resolve():
+            # backends handing over stills in memory write them directly to the originals already.
+            original_filenamepath = Path(capture_to_process.name)
+            captured_original = capture_to_process
+        else:
+            original_filenamepath = Path(filename_str_time()).with_suffix(capture_to_process.suffix)
 
-        mediaitem = Mediaitem(
+            # very first, move the capture_to_process to originals. if anything later fails, at least we got the file in safe place.
+            captured_original = capture_to_process.rename(Path(PATH_CAMERA_ORIGINAL, original_filenamepath))
+
+        return Mediaitem(
             id=uuid4(),
             job_identifier=self._job_identifier,
             media_type=MediaitemTypes.image,
@@ -226,16 +255,85 @@ class JobModelBase(ABC, Generic[T]):
             show_in_gallery=show_in_gallery,
         )
 
+    def start_phase1image(self, capture: Capture, show_in_gallery: bool, pipeline_config: SingleImageProcessing):
+        """start phase-1 processing of a capture in the background. The capture is moved to the originals first, so capture.filepath is updated."""
+        if capture.uuid in self._phase1_pending:
+            return
+
+        mediaitem = self._prepare_phase1mediaitem(capture.filepath, show_in_gallery, pipeline_config)
+        assert mediaitem.captured_original
+        capture.filepath = mediaitem.captured_original
+
         # TODO: get some clever way to scale AND cache?
         # TODO: check if cache-generation checks for size and if already same as target, don't scale, just copy, clever trick done.
-        resize(captured_original, mediaitem.unprocessed, appconfig.mediaprocessing.full_still_length)
-        process_phase1images(mediaitem.unprocessed, mediaitem)
+        future = mediaprocessing_executor.submit(process_phase1capture, mediaitem, appconfig.mediaprocessing.full_still_length)
+        self._phase1_pending[capture.uuid] = (mediaitem, future)
+
+    def prefetch_phase1image(self, capture: Capture, show_in_gallery: bool, pipeline_config: SingleImageProcessing):
+        """start phase-1 processing right after a capture of a multi-capture job, so it runs during the next countdown.
+        Without worker processes, the processing would block the job, so it's postponed to the completed state as usual."""
+        if mediaprocessing_executor.is_parallel:
+            self.start_phase1image(capture, show_in_gallery, pipeline_config)
+
+    def cancel_phase1images(self, captures: list[Capture] | None = None):
+        """cancel phase-1 processing of captures (all pending if None) and remove results that were created already."""
+        uuids = [capture.uuid for capture in captures] if captures is not None else list(self._phase1_pending)
+
+        for uuid in uuids:
+            if uuid not in self._phase1_pending:
+                continue
+
+            mediaitem, future = self._phase1_pending.pop(uuid)
+
+            if future.cancel():
+                logger.info(f"cancelled phase-1 processing of {mediaitem.captured_original}")
+                step_cache.delete_item(mediaitem.id)
+                continue
+
+            # processing started already and cannot be interrupted, wait for it to cleanup properly.
+            try:
+                _, renditions = future.result()
+            except Exception as exc:
+                logger.warning(f"phase-1 processing of cancelled capture failed: {exc}")
+            else:
+                for rendition in renditions:
+                    rendition.filepath.unlink(missing_ok=True)
+
+            mediaitem.unprocessed.unlink(missing_ok=True)
+            mediaitem.processed.unlink(missing_ok=True)
+            # the item never reaches the collection, so stored step results would not be deleted otherwise.
+            step_cache.delete_item(mediaitem.id)
+
+    def complete_phase1image(self, capture_to_process: Path, show_in_gallery: bool, pipeline_config: SingleImageProcessing) -> Mediaitem:
+        return self.complete_phase1images([(Capture(capture_to_process), show_in_gallery, pipeline_config)])[0]
+
+    def complete_phase1images(self, captures_to_process: list[tuple[Capture, bool, SingleImageProcessing]]) -> list[Mediaitem]:
+        """phase-1 of each capture is independent from the others, so all captures are processed in parallel by the executor.
+        Captures that were started ahead of time are not processed again. Returns once all captures are finished, so phase-2 can start right after."""
+        captures = [capture for capture, _, _ in captures_to_process]
+
+        try:
+            for capture_to_process in captures_to_process:
+                self.start_phase1image(*capture_to_process)
+
+            results = mediaprocessing_executor.gather([self._phase1_pending[capture.uuid][1] for capture in captures])
+        except Exception:
+            # the job fails if one capture fails, cleanup the other captures instead leaving their results behind.
+            self.cancel_phase1images(captures)
+            raise
+
+        pending = [self._phase1_pending.pop(capture.uuid) for capture in captures]
+
+        for _, renditions in results:
+            self._result_renditions.extend(renditions)
 
-        assert mediaitem.unprocessed.is_file()
-        assert mediaitem.processed.is_file()
-        assert mediaitem.captured_original and mediaitem.captured_original.is_file()
+        mediaitems = [mediaitem for mediaitem, _ in pending]
+        for mediaitem in mediaitems:
+            assert mediaitem.unprocessed.is_file()
+            assert mediaitem.processed.is_file()
+            assert mediaitem.captured_original and mediaitem.captured_original.is_file()
 
-        return mediaitem
+        return mediaitems
 
     def set_results(self, mediaitems: list[Mediaitem] | Mediaitem, present_uuid: UUID):
         """on enter completed, this has to be set by classes. present is sent to UI, the results are added to db"""
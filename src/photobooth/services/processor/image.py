@@ -2,6 +2,7 @@ import logging
 
 from statemachine import Event
 
+from ... import PATH_CAMERA_ORIGINAL
 from ...database.models import MediaitemTypes
 from ..acquisition import AcquisitionService
 from ..config.groups.actions import SingleImageConfigurationSet
@@ -23,18 +24,18 @@ class JobModelImage(JobModelBase[SingleImageConfigurationSet]):
         return 1
 
     def on_enter_counting(self):
-        self._acquisition_service.thrill_still()
-        # self._acquisition_service.signalbackends_hq_thrill()
-
         super().on_enter_counting()
 
+        # the countdown is started, so the camera can be switched to still mode ahead of time
+        self._acquisition_service.thrill_still(self._countdown_timer.duration)
+
     def on_exit_counting(self):
         super().on_exit_counting()
 
     def on_enter_capture(self):
         logger.info(f"current capture ({self.captures_taken + 1}/{self.total_captures_to_take}, remaining {self.remaining_captures_to_take - 1})")
 
-        captureset = CaptureSet([Capture(self._acquisition_service.wait_for_still_file())])
+        captureset = CaptureSet([Capture(self._acquisition_service.wait_for_still_file(destination=PATH_CAMERA_ORIGINAL))])
 
         # add to tmp collection
         # update model so it knows the latest number of captures and the machine can react accordingly if finished
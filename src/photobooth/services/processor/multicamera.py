@@ -27,10 +27,11 @@ class JobModelMulticamera(JobModelBase[MulticameraConfigurationSet]):
         return 1
 
     def on_enter_counting(self):
-        self._acquisition_service.thrill_multicam()
-
         super().on_enter_counting()
 
+        # the countdown is started, so the camera can be switched to still mode ahead of time
+        self._acquisition_service.thrill_multicam(self._countdown_timer.duration)
+
     def on_exit_counting(self):
         super().on_exit_counting()
 
@@ -56,23 +57,22 @@ class JobModelMulticamera(JobModelBase[MulticameraConfigurationSet]):
 
     def on_enter_completed(self):
         capture_set = self._capture_sets[0]  # for now only 1 set supported...
-        files_to_process = [capture.filepath for capture in capture_set.captures]
 
         ## PHASE 1:
         # postprocess each capture individually
         # list only captured_images from merge_definition (excludes predefined)
-        phase1_mediaitems: list[Mediaitem] = []
+        phase1_captures: list[tuple[Capture, bool, SingleImageProcessing]] = []
 
-        for file_to_process in files_to_process:
-            logger.info(f"postprocessing capture: {file_to_process=}")
+        for capture in capture_set.captures:
+            logger.info(f"postprocessing capture: {capture=}")
 
             # until now just a very basic filter avail applied over all images
             _config = SingleImageProcessing(image_filter=self._configuration_set.processing.image_filter)
 
-            mediaitem = self.complete_phase1image(file_to_process, self._configuration_set.jobcontrol.show_individual_captures_in_gallery, _config)
-            phase1_mediaitems.append(mediaitem)
+            phase1_captures.append((capture, self._configuration_set.jobcontrol.show_individual_captures_in_gallery, _config))
 
-            logger.info(f"capture {mediaitem=} successful")
+        phase1_mediaitems = self.complete_phase1images(phase1_captures)
+        logger.info(f"captures {phase1_mediaitems=} successful")
 
         assert len(phase1_mediaitems) > 0
 
@@ -89,7 +89,7 @@ class JobModelMulticamera(JobModelBase[MulticameraConfigurationSet]):
             pipeline_config=self._configuration_set.processing.model_dump(mode="json"),
         )
 
-        process_and_generate_wigglegram([item.processed for item in phase1_mediaitems], phase2_mediaitem)
+        self._result_renditions.extend(process_and_generate_wigglegram([item.processed for item in phase1_mediaitems], phase2_mediaitem))
 
         assert phase2_mediaitem.unprocessed.is_file()
         assert phase2_mediaitem.processed.is_file()
@@ -44,7 +44,7 @@ class JobModelVideo(JobModelBase[VideoConfigurationSet]):
         self._capture_sets.append(captureset)
 
     def on_exit_capture(self):
-        self._acquisition_service.stop_recording()  # blocks until video is written...
+        self._acquisition_service.stop_recording()  # blocks until video is written, in passthrough mode the transcode continues in background
 
         logger.info(f"captureset {self._capture_sets} successful")
 
@@ -56,8 +56,8 @@ class JobModelVideo(JobModelBase[VideoConfigurationSet]):
 
     def on_enter_completed(self):
 
-        # postprocess each video
-        capture_to_process = self._capture_sets[0].captures[0].filepath
+        # postprocess each video, wait for the background transcode to finish if recorded in passthrough mode
+        capture_to_process = self._acquisition_service.wait_for_video_file(self._capture_sets[0].captures[0].filepath)
         logger.debug(f"recorded to {capture_to_process}")
 
         original_filenamepath = Path(filename_str_time()).with_suffix(".mp4")
@@ -92,3 +92,14 @@ class JobModelVideo(JobModelBase[VideoConfigurationSet]):
 
     def on_enter_finished(self):
         pass
+
+    def cancel_phase1images(self, captures: list[Capture] | None = None):
+        super().cancel_phase1images(captures)
+
+        # videos are not processed ahead, but passthrough recordings are transcoded in background until the job waits for them.
+        # if the job was aborted or failed before, the transcode is stopped and its files are removed.
+        if captures is None:
+            captures = [capture for captureset in self._capture_sets for capture in captureset.captures]
+
+        for capture in captures:
+            self._acquisition_service.discard_video_file(capture.filepath)
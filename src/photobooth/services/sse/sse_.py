@@ -210,6 +210,7 @@ class SseEventIntervalInformationRecord(SseEventBase):
     memory: dict[str, int | float]
     cma: dict[str, int | None] | dict[str, None]
     backends: dict[str, dict[str, Any]]
+    mediaprocessing: dict[str, Any]
     stats_counter: list[UsageStatsPublic]
     limits_counter: list[ShareLimitsPublic]
     battery_percent: int | None
@@ -230,6 +231,7 @@ class SseEventIntervalInformationRecord(SseEventBase):
                 memory=self.memory,
                 cma=self.cma,
                 backends=self.backends,
+                mediaprocessing=self.mediaprocessing,
                 # https://stackoverflow.com/questions/77637278/sqlalchemy-model-to-json
                 stats_counter=[UsageStatsPublic.model_validate(entry).model_dump(mode="json") for entry in self.stats_counter],
                 limits_counter=[ShareLimitsPublic.model_validate(entry).model_dump(mode="json") for entry in self.limits_counter],
@@ -1,4 +1,5 @@
 import logging
+import shutil
 from pathlib import Path
 
 import av
@@ -61,6 +62,34 @@ def resize_jpeg_simplejpeg(filepath_in: Path, filepath_out: Path, scaled_min_len
     piexif.insert(piexif.dump(piexif.load(str(filepath_in))), str(filepath_out))
 
 
+def resize_jpeg_inmemory(filepath_in: Path, filepath_out: Path, scaled_min_length: int) -> Image.Image:
+    """scale a jpeg and keep the decoded image in memory for further processing, so it's decoded only once.
+    libjpeg scales in the DCT domain already (1/2, 1/4, 1/8) to the smallest size covering the target size.
+    The returned image is not transposed yet, the orientation is kept in the exif as for the other resizers."""
+
+    image = Image.open(filepath_in)
+
+    original_length = max(image.width, image.height)  # scale for the max length
+    scaling_factor = scaled_min_length / original_length
+
+    if scaling_factor > 1:
+        logger.warning("scale factor bigger than 1 - consider optimize config, usually images shall shrink, resizing skipped")
+        image.load()
+
+        # not resized, so the original is written as it is instead of encoding it again with losses.
+        shutil.copyfile(filepath_in, filepath_out)
+
+        return image
+
+    image.draft(image.mode, (int(image.width * scaling_factor), int(image.height * scaling_factor)))
+    image.load()
+
+    # encode to jpeg again and transplant the exif data, so the orientation tag is kept.
+    image.save(filepath_out, quality=85, exif=image.info.get("exif", b""))
+
+    return image
+
+
 def resize_jpeg(filepath_in: Path, filepath_out: Path, scaled_min_length: int):
     resize_jpeg_simplejpeg(filepath_in, filepath_out, scaled_min_length)  # faster
     # resize_jpeg_pillow(filepath_in, filepath_out, scaled_min_length) # possibly better quality and more accurate dimensions
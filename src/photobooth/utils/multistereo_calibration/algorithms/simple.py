@@ -1,7 +1,11 @@
 import logging
+import math
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from threading import Lock
 
 import cv2
 import numpy as np
@@ -12,6 +16,9 @@ from .base import CalibrationBase, PersistableDataclass
 logger = logging.getLogger(__name__)
 
 DEBUG_TMP = False
+# maps are needed per camera and size. at full size each costs 6 bytes per output pixel, about 42MB for 3240x2160,
+# so the cache is bounded by memory to fit the maps of four cameras at full size.
+MAX_WARP_MAPS_BYTES = 200 * 1024 * 1024
 
 
 @dataclass
@@ -27,6 +34,9 @@ class SimpleCalibrationUtil(CalibrationBase[CalDataAlign]):
     def __init__(self):
         super().__init__()
 
+        self._warp_maps: OrderedDict[tuple, tuple[np.ndarray, np.ndarray]] = OrderedDict()
+        self._lock_warp_maps = Lock()
+
     def load_calibration_data(self, dir: Path) -> None:
         """Load all calibration data from disk."""
         super()._load_calibration_data(dir, CalDataAlign)
@@ -59,8 +69,10 @@ class SimpleCalibrationUtil(CalibrationBase[CalDataAlign]):
         assert len(caldataalign) == len(cameras)
         self._caldataalign = caldataalign
 
-    def align_all(self, images: list[Image.Image], crop: bool) -> list[Image.Image]:
-        """align all images, while 1 image per camera, sorted by the index"""
+    def align_all(self, images: list[Image.Image], crop: bool, max_length: int = 0) -> list[Image.Image]:
+        """align all images, while 1 image per camera, sorted by the index.
+        If max_length is given, the output is scaled down so its longer side is at most max_length. Scaling is part of the warp
+        and images not decoded yet are decoded at reduced size, so this is much faster than scaling afterwards."""
 
         assert self._caldataalign, "No calibration data loaded. You need to load the data first or calibrate."
         assert len(images) >= 2, "need at least 2 images to align"
@@ -90,30 +102,26 @@ class SimpleCalibrationUtil(CalibrationBase[CalDataAlign]):
             logger.warning(f"number of images and calibration data do not align - you need to recalibrate, error {exc}")
             raise
 
-        proc_images_out = []
-        crop_area = None
-        for cam_idx, (caldataalign, image) in enumerate(zip(self._caldataalign, images, strict=True)):
-            # print(cam_idx, caldataalign, image)
-
-            H_rescaled = self.__rescale_H(caldataalign.H, (caldataalign.img_width, caldataalign.img_height), image.size)
-            proc_img = self.__align_to_reference(H_rescaled, image)
-
-            if DEBUG_TMP:
-                proc_img.save(f"tmp/aligned_{cam_idx}.jpg")
+        crop_area = self.__compute_common_crop(img_size) if crop else (0, 0, *img_size)
+        output_size = self.__output_size(crop_area, max_length)
 
-            if crop:
-                # cache once per run; assumes all images are same size though
-                if not crop_area:
-                    crop_area = self.__compute_common_crop(img_size)
+        # large downscales are mostly done while decoding/reducing by integer factors, the warp does the remaining scale only.
+        reduce_factor = max(1, min((crop_area[2] - crop_area[0]) // output_size[0], (crop_area[3] - crop_area[1]) // output_size[1]))
 
-                proc_img = self.__crop_to_common_intersect(proc_img, crop_area)
+        # opencv releases the GIL, so the cameras are aligned in parallel
+        with ThreadPoolExecutor(max_workers=len(images), thread_name_prefix="AlignCamera") as executor:
+            proc_images_out = list(
+                executor.map(
+                    lambda args: self.__align_camera(*args, img_size, crop_area, output_size, reduce_factor),
+                    zip(self._caldataalign, images, strict=True),
+                )
+            )
 
-                if DEBUG_TMP:
-                    proc_img.save(f"tmp/cropped_{cam_idx}.jpg")
-
-            proc_images_out.append(proc_img)
+        if DEBUG_TMP:
+            for cam_idx, proc_img in enumerate(proc_images_out):
+                proc_img.save(f"tmp/aligned_{cam_idx}.jpg")
 
-        logger.info(f"Aligned {len(proc_images_out)} files to {crop_area} crop area.")
+        logger.info(f"Aligned {len(proc_images_out)} files to {crop_area} crop area, output size {output_size}.")
 
         return proc_images_out
 
@@ -246,36 +254,94 @@ class SimpleCalibrationUtil(CalibrationBase[CalDataAlign]):
         if x_max <= x_min or y_max <= y_min:
             raise ValueError("No common overlap region found across all cameras.")
 
+        # Ensure even width/height for downstream video encoding compatibility
+        x_max -= (x_max - x_min) % 2
+        y_max -= (y_max - y_min) % 2
+
         return x_min, y_min, x_max, y_max
 
     @staticmethod
-    def __align_to_reference(H: np.ndarray, image: Image.Image) -> Image.Image:
-        img_arr = np.array(image)
-        # img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR) # only geometric manipulation, can skip color conversion
-        img_arr_warped = cv2.warpPerspective(img_arr, H, image.size, flags=cv2.INTER_CUBIC)
-        # warped_rgb = cv2.cvtColor(warped_bgr, cv2.COLOR_BGR2RGB)
-        return Image.fromarray(img_arr_warped)
+    def __output_size(crop_area: tuple[int, int, int, int], max_length: int) -> tuple[int, int]:
+        x1, y1, x2, y2 = crop_area
+        w, h = x2 - x1, y2 - y1
+
+        if not max_length or max(w, h) <= max_length:
+            return w, h
+
+        scale = max_length / max(w, h)
+
+        # Ensure even width/height for downstream video encoding compatibility
+        w, h = max(2, round(w * scale)), max(2, round(h * scale))
+        return w - w % 2, h - h % 2
 
     @staticmethod
-    def __crop_to_common_intersect(img: Image.Image, crop: tuple[int, int, int, int]) -> Image.Image:
-        """
-        Crop a Pillow image to the given rectangle.
+    def __reduce(image: Image.Image, reduce_factor: int) -> Image.Image:
+        """image reduced by the factor, JPEGs not loaded yet are decoded at reduced size already."""
+        if reduce_factor == 1:
+            return image
 
-        Args:
-            img (Image.Image): Input PIL image.
-            crop (tuple[int, int, int, int]): (x1, y1, x2, y2) coordinates of the crop rectangle,
-                                              where (x1, y1) is top-left and (x2, y2) is bottom-right.
+        width = image.width
+        image.draft(image.mode, (math.ceil(width / reduce_factor), math.ceil(image.height / reduce_factor)))
 
-        Returns:
-            Image.Image: Cropped PIL image.
-        """
-        x1, y1, x2, y2 = crop
+        # draft only scales by 1/2, 1/4 or 1/8, the remaining factor is reduced after decoding
+        remaining_factor = reduce_factor * image.width // width
+        return image.reduce(remaining_factor) if remaining_factor > 1 else image
 
-        # Ensure even width/height for downstream video encoding compatibility
-        if (x2 - x1) % 2 != 0:
-            x2 -= 1
-        if (y2 - y1) % 2 != 0:
-            y2 -= 1
+    def __align_camera(
+        self,
+        caldataalign: CalDataAlign,
+        image: Image.Image,
+        img_size: tuple[int, int],
+        crop_area: tuple[int, int, int, int],
+        output_size: tuple[int, int],
+        reduce_factor: int,
+    ) -> Image.Image:
+        reduced = self.__reduce(image, reduce_factor)
+        map1, map2 = self.__get_warp_maps(caldataalign, reduced.size, img_size, crop_area, output_size)
+
+        img_arr_warped = cv2.remap(np.asarray(reduced), map1, map2, interpolation=cv2.INTER_CUBIC)
 
-        # Pillow crop uses (left, upper, right, lower)
-        return img.crop((x1, y1, x2, y2))
+        return Image.fromarray(img_arr_warped)
+
+    def __get_warp_maps(
+        self,
+        caldataalign: CalDataAlign,
+        input_size: tuple[int, int],
+        img_size: tuple[int, int],
+        crop_area: tuple[int, int, int, int],
+        output_size: tuple[int, int],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """lookup maps for cv2.remap that warp, crop and scale in one pass. Computed once per calibration and sizes."""
+        H = np.asarray(caldataalign.H, dtype=np.float64)
+        key = (H.tobytes(), caldataalign.img_width, caldataalign.img_height, input_size, img_size, crop_area, output_size)
+
+        with self._lock_warp_maps:
+            if key in self._warp_maps:
+                self._warp_maps.move_to_end(key)
+                return self._warp_maps[key]
+
+        H_rescaled = self.__rescale_H(H, (caldataalign.img_width, caldataalign.img_height), img_size)
+
+        # input pixel -> full size pixel, pixel centers are kept aligned when scaling
+        sx_in, sy_in = img_size[0] / input_size[0], img_size[1] / input_size[1]
+        input_to_full = np.array([[sx_in, 0, (sx_in - 1) / 2], [0, sy_in, (sy_in - 1) / 2], [0, 0, 1]], dtype=np.float64)
+
+        # reference pixel -> output pixel by cropping and scaling
+        x1, y1, x2, y2 = crop_area
+        sx_out, sy_out = output_size[0] / (x2 - x1), output_size[1] / (y2 - y1)
+        ref_to_output = np.array([[sx_out, 0, sx_out * (0.5 - x1) - 0.5], [0, sy_out, sy_out * (0.5 - y1) - 0.5], [0, 0, 1]], dtype=np.float64)
+
+        # remap needs the source position of each output pixel
+        output_to_input = np.linalg.inv(ref_to_output @ H_rescaled @ input_to_full)
+
+        u, v = np.meshgrid(np.arange(output_size[0], dtype=np.float32), np.arange(output_size[1], dtype=np.float32))
+        points = cv2.perspectiveTransform(np.stack([u, v], axis=-1).reshape(-1, 1, 2), output_to_input).reshape(output_size[1], output_size[0], 2)
+        map1, map2 = cv2.convertMaps(points, None, cv2.CV_16SC2)  # fixed point maps are faster to remap
+
+        with self._lock_warp_maps:
+            self._warp_maps[key] = (map1, map2)
+            # least recently used are dropped first, the latest is kept even if it exceeds the limit on its own.
+            while len(self._warp_maps) > 1 and sum(m1.nbytes + m2.nbytes for m1, m2 in self._warp_maps.values()) > MAX_WARP_MAPS_BYTES:
+                self._warp_maps.popitem(last=False)
+
+        return map1, map2
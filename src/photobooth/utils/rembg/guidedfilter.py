@@ -0,0 +1,77 @@
+"""
+Upsample the low resolution mask predicted by a model to the full image resolution using a fast guided filter.
+
+The filter coefficients are computed at the mask resolution and only applied at full resolution, see
+He, Sun: Fast Guided Filter (2015). Edges of the mask follow the edges of the full resolution image so they stay sharp,
+plain resampling blurs the mask's edges by the scale factor instead.
+"""
+
+import numpy as np
+from PIL import Image
+from PIL.Image import Image as PILImage
+
+STRIP_HEIGHT = 256  # rows processed at once at full resolution to limit memory
+
+
+def _box_mean(x: np.ndarray, r: int) -> np.ndarray:
+    """mean of each (2r+1)x(2r+1) window, borders are extended."""
+    k = 2 * r + 1
+
+    # one extra leading row/col so the window sum is the difference of two cumulative sums
+    padded = np.pad(x, ((r + 1, r), (r + 1, r)), mode="edge")
+
+    c = padded.cumsum(axis=0, dtype=np.float64)
+    rows = c[k:, :] - c[:-k, :]
+    c = rows.cumsum(axis=1)
+    windows = c[:, k:] - c[:, :-k]
+
+    return (windows / (k * k)).astype(np.float32)
+
+
+def guided_upsample(mask: PILImage, guide: PILImage, radius: int = 4, eps: float = 1e-3) -> PILImage:
+    """
+    Upsample the mask to the size of the guide.
+
+    Parameters:
+        mask (PILImage): The low resolution mask, mode L.
+        guide (PILImage): The full resolution image the mask was predicted from.
+        radius (int): Window radius in pixel of the mask resolution.
+        eps (float): Regularization, smaller values follow the guide's edges closer.
+
+    Returns:
+        PILImage: The mask in the guide's size, mode L.
+    """
+    guide_full = guide.convert("L")
+
+    if mask.size == guide_full.size:
+        return mask
+
+    guide_lr = np.asarray(guide_full.resize(mask.size, Image.Resampling.BILINEAR, reducing_gap=2.0), dtype=np.float32) / 255.0
+    p = np.asarray(mask.convert("L"), dtype=np.float32) / 255.0
+
+    mean_i = _box_mean(guide_lr, radius)
+    mean_p = _box_mean(p, radius)
+    var_i = _box_mean(guide_lr * guide_lr, radius) - mean_i * mean_i
+    cov_ip = _box_mean(guide_lr * p, radius) - mean_i * mean_p
+
+    a = cov_ip / (var_i + eps)
+    b = mean_p - a * mean_i
+
+    # coefficients are smooth, so bilinear upsampling is sufficient. PIL keeps the full resolution float images off the numpy heap.
+    a_full = Image.fromarray(_box_mean(a, radius), mode="F").resize(guide_full.size, Image.Resampling.BILINEAR)
+    b_full = Image.fromarray(_box_mean(b, radius), mode="F").resize(guide_full.size, Image.Resampling.BILINEAR)
+
+    width, height = guide_full.size
+    out = np.empty((height, width), dtype=np.uint8)
+
+    for top in range(0, height, STRIP_HEIGHT):
+        box = (0, top, width, min(top + STRIP_HEIGHT, height))
+
+        q = np.asarray(guide_full.crop(box), dtype=np.float32)  # scaled by 255 already
+        q *= np.asarray(a_full.crop(box))
+        q += np.asarray(b_full.crop(box)) * 255.0
+
+        np.clip(q, 0, 255, out=q)
+        out[box[1] : box[3], :] = q + 0.5  # round
+
+    return Image.fromarray(out, mode="L")
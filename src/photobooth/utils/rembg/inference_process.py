@@ -0,0 +1,186 @@
+"""
+Run the inference of a model in a dedicated process, so the app process is not stalled while the model computes.
+
+Images are handed over to the process and masks returned in shared memory, only names and shapes are sent through the queues.
+The process is restarted automatically if it crashed or did not answer in time.
+"""
+
+import logging
+import multiprocessing
+import queue
+import time
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock
+from uuid import uuid4
+
+import numpy as np
+from PIL import Image
+from PIL.Image import Image as PILImage
+
+from .sessions.base import BaseSession
+
+logger = logging.getLogger(__name__)
+
+
+def _inference_process_main(
+    request_queue, response_queue, model_name: str, intra_op_num_threads: int, inter_op_num_threads: int, session_kwargs: dict
+):
+    from .session_factory import new_session
+
+    try:
+        session = new_session(model_name, intra_op_num_threads=intra_op_num_threads, inter_op_num_threads=inter_op_num_threads, **session_kwargs)
+    except Exception as exc:
+        response_queue.put((None, f"could not load model {model_name}, error {exc}", 0.0))
+        return
+
+    response_queue.put((None, None, session.load_duration))
+
+    while True:
+        request = request_queue.get()
+        if request is None:  # stop requested
+            break
+
+        request_id, shm_in_name, shape, mode, shm_out_name = request
+
+        shm_in = SharedMemory(name=shm_in_name)
+        shm_out = SharedMemory(name=shm_out_name)
+        try:
+            # copy, so no reference to the shared memory is kept after the request
+            img = Image.frombuffer(mode, (shape[1], shape[0]), shm_in.buf, "raw", mode, 0, 1).copy()
+            mask = session.predict(img)
+
+            np.ndarray((shape[0], shape[1]), dtype=np.uint8, buffer=shm_out.buf)[:] = np.asarray(mask, dtype=np.uint8)
+
+            response_queue.put((request_id, None, 0.0))
+        except Exception as exc:
+            response_queue.put((request_id, str(exc), 0.0))
+        finally:
+            shm_in.close()
+            shm_out.close()
+
+
+class InferenceProcessSession(BaseSession):
+    """Session that computes the predictions in a dedicated process, it can be used wherever a session is used.
+    The model is loaded in the process only, so this does not initialize the base session. Additional keyword arguments are
+    handed to the session created in the process."""
+
+    def __init__(self, model_name: str, intra_op_num_threads: int = 0, inter_op_num_threads: int = 0, timeout: float = 30.0, **session_kwargs):
+        self.model_name = model_name
+        self._intra_op_num_threads = intra_op_num_threads
+        self._inter_op_num_threads = inter_op_num_threads
+        self._timeout = timeout
+        self._session_kwargs = session_kwargs
+
+        self._lock = Lock()  # one request at a time, the process computes one after another anyways.
+        self._process = None
+        self._request_queue = None
+        self._response_queue = None
+
+        self.load_duration = 0.0
+
+        with self._lock:
+            self._start()
+
+    def _start(self):
+        ctx = multiprocessing.get_context("spawn")
+        self._request_queue = ctx.Queue()
+        self._response_queue = ctx.Queue()
+        self._process = ctx.Process(
+            target=_inference_process_main,
+            name=f"rembg_{self.model_name}",
+            args=(
+                self._request_queue,
+                self._response_queue,
+                self.model_name,
+                self._intra_op_num_threads,
+                self._inter_op_num_threads,
+                self._session_kwargs,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+
+        # wait until the model is loaded, so errors are raised early. No timeout because models might be downloaded first.
+        _, error, self.load_duration = self._wait_response(None, timeout=None)
+        if error:
+            self._stop()
+            raise RuntimeError(error)
+
+        logger.info(f"inference process for model {self.model_name} started, pid {self._process.pid}")
+
+    def _stop(self):
+        if self._process is None:
+            return
+
+        if self._process.is_alive():
+            assert self._request_queue
+            self._request_queue.put(None)
+            self._process.join(timeout=2)
+
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+
+        self._process = None
+
+    def _restart(self, reason: str):
+        logger.warning(f"restarting inference process for model {self.model_name}, reason: {reason}")
+        self._stop()
+        self._start()
+
+    def _wait_response(self, request_id: str | None, timeout: float | None) -> tuple[str | None, str | None, float]:
+        assert self._process and self._response_queue
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            try:
+                response = self._response_queue.get(timeout=0.2)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise ChildProcessError(f"inference process died, exitcode {self._process.exitcode}") from None
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"inference process did not answer within {timeout}s") from None
+                continue
+
+            if response[0] == request_id:
+                return response
+
+            logger.warning(f"dropped outdated response of inference process {response[0]}")
+
+    def predict(self, img: PILImage, *args, **kwargs) -> PILImage:
+        img_in = img if img.mode in ("RGB", "RGBA", "L") else img.convert("RGB")
+        shape = (img_in.height, img_in.width, len(img_in.getbands()))
+
+        shm_in = SharedMemory(create=True, size=shape[0] * shape[1] * shape[2])
+        shm_out = SharedMemory(create=True, size=shape[0] * shape[1])
+        try:
+            np.ndarray(shape, dtype=np.uint8, buffer=shm_in.buf)[:] = np.asarray(img_in, dtype=np.uint8).reshape(shape)
+
+            with self._lock:
+                if not self._process or not self._process.is_alive():
+                    self._restart("process not running")
+                assert self._request_queue
+
+                request_id = uuid4().hex
+                self._request_queue.put((request_id, shm_in.name, shape, img_in.mode, shm_out.name))
+
+                try:
+                    _, error, _ = self._wait_response(request_id, self._timeout)
+                except (TimeoutError, ChildProcessError) as exc:
+                    # restart so the next request is served again, this one is lost.
+                    self._restart(str(exc))
+                    raise
+
+            if error:
+                raise RuntimeError(f"inference failed, error {error}")
+
+            return Image.fromarray(np.ndarray((shape[0], shape[1]), dtype=np.uint8, buffer=shm_out.buf).copy(), mode="L")
+        finally:
+            shm_in.close()
+            shm_in.unlink()
+            shm_out.close()
+            shm_out.unlink()
+
+    def close(self):
+        with self._lock:
+            self._stop()
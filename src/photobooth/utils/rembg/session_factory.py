@@ -8,18 +8,20 @@ from .sessions.base import BaseSession
 ort.disable_telemetry_events()  # https://github.com/microsoft/onnxruntime/blob/main/docs/Privacy.md
 
 
-def new_session(model_name: str = "modnet", *args, **kwargs) -> BaseSession:
+def new_session(model_name: str = "modnet", *args, intra_op_num_threads: int = 0, inter_op_num_threads: int = 0, **kwargs) -> BaseSession:
     """
     Create a new session object based on the specified model name.
 
     This function searches for the session class based on the model name in the 'sessions_class' list.
     It then creates an instance of the session class with the provided arguments.
-    The 'sess_opts' object is created using the 'ort.SessionOptions()' constructor.
-    If the 'OMP_NUM_THREADS' environment variable is set, the 'inter_op_num_threads' option of 'sess_opts' is set to its value.
+    The 'sess_opts' object is created using the 'ort.SessionOptions()' constructor with all graph optimizations enabled.
+    Thread counts not given (0) are taken from the 'OMP_NUM_THREADS' environment variable if set, otherwise onnxruntime decides.
 
     Parameters:
         model_name (str): The name of the model.
         *args: Additional positional arguments.
+        intra_op_num_threads (int): Threads to compute a single operation, 0 for default.
+        inter_op_num_threads (int): Threads to compute independent operations in parallel, 0 for default.
         **kwargs: Additional keyword arguments.
 
     Raises:
@@ -39,10 +41,19 @@ def new_session(model_name: str = "modnet", *args, **kwargs) -> BaseSession:
         raise ValueError(f"No session class found for model '{model_name}'")
 
     sess_opts = ort.SessionOptions()
+    sess_opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
 
     if "OMP_NUM_THREADS" in os.environ:
         threads = int(os.environ["OMP_NUM_THREADS"])
         sess_opts.inter_op_num_threads = threads
         sess_opts.intra_op_num_threads = threads
 
+    if intra_op_num_threads:
+        sess_opts.intra_op_num_threads = intra_op_num_threads
+    if inter_op_num_threads:
+        sess_opts.inter_op_num_threads = inter_op_num_threads
+        if inter_op_num_threads > 1:
+            # inter op threads are used only if operations are executed in parallel.
+            sess_opts.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
     return session_class(model_name, sess_opts, *args, **kwargs)
@@ -19,7 +19,7 @@ class ModnetSession(BaseSession):
             List[PILImage]: The list of output masks.
         """
 
-        resize_to = self.get_ref_size(img.width, img.height, 512)
+        resize_to = self.get_ref_size(img.width, img.height, self.inference_size or 512)
 
         ort_outs = self.inner_session.run(None, self.normalize_2(img, resize_to))
         assert isinstance(ort_outs, Sequence)
@@ -29,7 +29,7 @@ class ModnetSession(BaseSession):
 
         mask = Image.fromarray((np.squeeze(pred) * 255).astype("uint8"))
 
-        mask = mask.resize(img.size, Image.Resampling.LANCZOS)
+        mask = self.upsample_mask(mask, img)
 
         return mask
 
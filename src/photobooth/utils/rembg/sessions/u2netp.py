@@ -31,7 +31,7 @@ class U2netpSession(BaseSession):
         pred = np.squeeze(pred)
 
         mask = Image.fromarray((pred * 255).astype("uint8"))
-        mask = mask.resize(img.size, Image.Resampling.LANCZOS)
+        mask = self.upsample_mask(mask, img)
 
         return mask
 
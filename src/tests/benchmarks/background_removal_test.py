@@ -1,6 +1,7 @@
 import logging
 from collections.abc import Generator
 
+import numpy as np
 import pytest
 from PIL import Image
 
@@ -46,3 +47,37 @@ def test_models_remove_cutout_new_sess(benchmark, _session: BaseSession):
 
     # reusing a session is cheaper, we confirm by recreating a new session every time.
     benchmark(make_session_and_remove, img=input_image, model=_session.name())
+
+
+def mask_iou(mask: Image.Image, reference: Image.Image) -> float:
+    a = np.asarray(mask) > 127
+    b = np.asarray(reference) > 127
+    union = np.logical_or(a, b).sum()
+
+    return float(np.logical_and(a, b).sum() / union) if union else 1.0
+
+
+@pytest.fixture(params=[(512, False), (512, True), (384, True), (320, True), (256, True)], ids=lambda p: f"size{p[0]}-refine{p[1]}")
+def _variant(request):
+    yield request.param
+
+
+@pytest.mark.benchmark(group="rembg_lowres_refined")
+def test_modnet_lowres_refined(benchmark, _variant: tuple[int, bool]):
+    """throughput and quality of reduced inference sizes with refined masks, compared to the default full size plain resampled mask."""
+    inference_size, refine_mask = _variant
+    input_image = Image.open("src/tests/assets/input.jpg")
+    input_image.load()
+
+    reference_mask = remove(input_image, session=new_session("modnet"), only_mask=True)
+
+    session = new_session("modnet", inference_size=inference_size, refine_mask=refine_mask)
+    mask = benchmark(remove, img=input_image, session=session, only_mask=True)
+
+    iou = mask_iou(mask, reference_mask)
+    megapixel = input_image.width * input_image.height / 1e6
+    benchmark.extra_info["iou"] = round(iou, 4)
+    benchmark.extra_info["megapixel_per_s"] = round(megapixel / benchmark.stats.stats.mean, 2)
+    logger.info(f"modnet size {inference_size} refine {refine_mask}: iou {iou:.4f}, {benchmark.extra_info['megapixel_per_s']} MP/s")
+
+    assert iou > 0.9
@@ -0,0 +1,103 @@
+import io
+import logging
+from fractions import Fraction
+
+import av
+import pytest
+from av.video.reformatter import ColorRange, VideoReformatter
+from PIL import Image
+
+from photobooth.appconfig import appconfig
+
+logger = logging.getLogger(name=None)
+
+NUMBER_FRAMES = 100
+
+
+@pytest.fixture(autouse=True)
+def run_around_tests():
+    appconfig.reset_defaults()
+
+    yield
+
+
+@pytest.fixture()
+def lores_frame():
+    with open("src/tests/assets/input_lores.jpg", "rb") as f:
+        yield f.read()
+
+
+def _add_stream(container, width: int, height: int):
+    # same settings as the SoftwareVideoRecorder
+    stream = container.add_stream("h264", rate=25)
+    stream.width = width
+    stream.height = height
+    stream.time_base = Fraction(1, 90000)
+    stream.codec_context.max_b_frames = 0
+    stream.codec_context.options["tune"] = "zerolatency"
+    stream.codec_context.options["preset"] = "veryfast"
+    stream.codec_context.thread_type = "AUTO"
+    stream.codec_context.thread_count = 0
+    stream.codec_context.time_base = Fraction(1, 90000)
+    stream.codec_context.bit_rate = 2500000
+
+    return stream
+
+
+def record_pil_rgb(tmp_path, lores_frame: bytes):
+    width, height = Image.open(io.BytesIO(lores_frame)).size
+
+    with av.open(tmp_path / "pil_rgb.mp4", mode="w") as container:
+        stream = _add_stream(container, width, height)
+
+        for i in range(NUMBER_FRAMES):
+            video_frame = av.VideoFrame.from_image(Image.open(io.BytesIO(lores_frame)))
+            video_frame.pts = i * 3600
+
+            for packet in stream.encode(video_frame):
+                container.mux(packet)
+
+        for packet in stream.encode():
+            container.mux(packet)
+
+
+def record_mjpeg_yuv(tmp_path, lores_frame: bytes):
+    decoder = av.CodecContext.create("mjpeg", "r")
+    reformatter = VideoReformatter()
+    width, height = Image.open(io.BytesIO(lores_frame)).size
+
+    with av.open(tmp_path / "mjpeg_yuv.mp4", mode="w") as container:
+        stream = _add_stream(container, width, height)
+
+        for i in range(NUMBER_FRAMES):
+            video_frame = reformatter.reformat(
+                decoder.decode(av.Packet(lores_frame))[0],
+                format="yuv420p",
+                src_color_range=ColorRange.JPEG,
+                dst_color_range=ColorRange.MPEG,
+            )
+            video_frame.pts = i * 3600
+
+            for packet in stream.encode(video_frame):
+                container.mux(packet)
+
+        for packet in stream.encode():
+            container.mux(packet)
+
+
+def _report_fps(benchmark):
+    # achievable recording fps if the recorder is not waiting for frames
+    benchmark.extra_info["recording_fps"] = round(NUMBER_FRAMES / benchmark.stats.stats.mean, 1)
+    logger.info(f"achievable recording fps: {benchmark.extra_info['recording_fps']}")
+
+
+@pytest.mark.benchmark(group="record_lores_to_h264")
+def test_record_pil_rgb(benchmark, tmp_path, lores_frame):
+    benchmark(record_pil_rgb, tmp_path=tmp_path, lores_frame=lores_frame)
+    _report_fps(benchmark)
+
+
+@pytest.mark.benchmark(group="record_lores_to_h264")
+def test_record_mjpeg_yuv(benchmark, tmp_path, lores_frame):
+    benchmark(record_mjpeg_yuv, tmp_path=tmp_path, lores_frame=lores_frame)
+    _report_fps(benchmark)
@@ -1,9 +1,13 @@
 import logging
 
+import numpy as np
 import pilgram2
 import pytest
 from PIL import Image
 
+from photobooth.plugins.filter_pilgram2.config import FilterPilgram2Config
+from photobooth.plugins.filter_pilgram2.filter_pilgram2 import FilterPilgram2
+
 logger = logging.getLogger(name=None)
 
 
@@ -16,3 +20,19 @@ def filter_algo(request):
 def test_pilgram_lores_benchmark(benchmark, filter_algo):
     with Image.open("src/tests/assets/input_lores.jpg") as im:
         benchmark(getattr(pilgram2, filter_algo), im)
+
+
+@pytest.mark.benchmark(group="pilgram2_engine")
+@pytest.mark.parametrize("use_lut_engine", [False, True])
+def test_filter_pilgram2_engine_benchmark(benchmark, filter_algo, use_lut_engine):
+    plgrm2 = FilterPilgram2()
+    plgrm2._config = FilterPilgram2Config(use_lut_engine=use_lut_engine)
+
+    with Image.open("src/tests/assets/input.jpg") as im:
+        image = im.convert("RGB")
+
+    plgrm2.do_filter(image, filter_algo)  # compile lut and gradients once, like in a running app
+    filtered = benchmark(plgrm2.do_filter, image, filter_algo)
+
+    reference = np.asarray(getattr(pilgram2, filter_algo)(image), dtype=np.int16)
+    benchmark.extra_info["max_difference"] = int(np.abs(np.asarray(filtered, dtype=np.int16) - reference).max())
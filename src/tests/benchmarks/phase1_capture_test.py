@@ -0,0 +1,52 @@
+import logging
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from photobooth.database.models import Mediaitem, MediaitemTypes
+from photobooth.services.config.groups.actions import SingleImageProcessing
+from photobooth.services.mediaprocessing.processes import process_phase1images
+from photobooth.utils.media_resizer import resize, resize_jpeg_inmemory
+
+logger = logging.getLogger(name=None)
+
+
+def decode_twice(mediaitem: Mediaitem, full_still_length: int):
+    # previous approach: unprocessed is written to disk and read and decoded again to create processed
+    assert mediaitem.captured_original
+    resize(mediaitem.captured_original, mediaitem.unprocessed, full_still_length)
+    process_phase1images(mediaitem.unprocessed, mediaitem)
+
+
+def decode_once_inmemory(mediaitem: Mediaitem, full_still_length: int):
+    assert mediaitem.captured_original
+    unprocessed_image = resize_jpeg_inmemory(mediaitem.captured_original, mediaitem.unprocessed, full_still_length)
+    process_phase1images(unprocessed_image, mediaitem)
+
+
+@pytest.fixture(params=["decode_twice", "decode_once_inmemory"])
+def library(request):
+    # yield fixture instead return to allow for cleanup:
+    yield request.param
+
+
+@pytest.fixture()
+def mediaitem(tmp_path: Path) -> Mediaitem:
+    return Mediaitem(
+        id=uuid4(),
+        job_identifier=uuid4(),
+        media_type=MediaitemTypes.image,
+        unprocessed=tmp_path / "unprocessed.jpg",
+        processed=tmp_path / "processed.jpg",
+        captured_original=Path("src/tests/assets/input.jpg"),
+        pipeline_config=SingleImageProcessing(image_filter="FilterPilgram2.aden").model_dump(mode="json"),
+    )
+
+
+@pytest.mark.benchmark(group="phase1_capture")
+def test_phase1_capture(library, mediaitem: Mediaitem, benchmark):
+    benchmark(eval(library), mediaitem=mediaitem, full_still_length=1500)
+
+    assert mediaitem.unprocessed.is_file()
+    assert mediaitem.processed.is_file()
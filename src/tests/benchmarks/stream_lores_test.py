@@ -5,11 +5,16 @@ import cv2
 import numpy
 import pytest
 from av import open as av_open
-from av.video.reformatter import Interpolation, VideoReformatter
+from av.video.reformatter import ColorRange, Interpolation, VideoReformatter
 from PIL import Image
 from simplejpeg import decode_jpeg, encode_jpeg, encode_jpeg_yuv_planes
 from turbojpeg import TJFLAG_FASTDCT, TurboJPEG
 
+from photobooth.services.backends.abstractbackend import LoresBroadcastRes
+from photobooth.services.backends.utils.rotate_exif import set_exif_orientation
+from photobooth.services.backends.webcampyav import WebcamPyavBackend
+from photobooth.services.config.groups.cameras import GroupCameraPyav
+
 turbojpeg = TurboJPEG()
 logger = logging.getLogger(__name__)
 
@@ -189,3 +194,65 @@ def test_pyav_pillow_scale(benchmark):
 @pytest.mark.benchmark(group="scale_stream_lores")
 def test_pyav_cv2_scale(benchmark):
     benchmark(pyav_cv2_scale)
+
+
+# simulates several displays and a recording consuming the same lores frame
+NUM_LORES_CLIENTS = 4
+
+
+@pytest.fixture()
+def lores_frame():
+    with open("src/tests/assets/input_lores.jpg", "rb") as f:
+        yield f.read()
+
+
+def orientation_per_client(lores_frame: bytes):
+    lores_res = LoresBroadcastRes()
+    lores_res.publish(lores_frame)
+
+    for _ in range(NUM_LORES_CLIENTS):
+        _ = set_exif_orientation(lores_res.data, "3: 180°")
+
+
+def orientation_once_on_publish(lores_frame: bytes):
+    lores_res = LoresBroadcastRes(orientation="3: 180°")
+    lores_res.publish(lores_frame)
+
+    for _ in range(NUM_LORES_CLIENTS):
+        _ = lores_res.data
+
+
+@pytest.mark.benchmark(group="orientation_stream_lores")
+def test_orientation_per_client(benchmark, lores_frame):
+    benchmark(orientation_per_client, lores_frame)
+
+
+@pytest.mark.benchmark(group="orientation_stream_lores")
+def test_orientation_once_on_publish(benchmark, lores_frame):
+    benchmark(orientation_once_on_publish, lores_frame)
+
+
+@pytest.fixture()
+def hires_packet():
+    # a webcam delivering mjpeg has one baseline jpeg per packet, the asset is progressive so convert first
+    baseline_jpeg = io.BytesIO()
+    Image.open("src/tests/assets/input.jpg").save(baseline_jpeg, format="JPEG", quality=90)
+    baseline_jpeg.seek(0)
+
+    with av_open(baseline_jpeg) as input_device:
+        yield next(input_device.demux(input_device.streams.video[0]))
+
+
+@pytest.fixture()
+def backend_pyav():
+    yield WebcamPyavBackend(GroupCameraPyav())
+
+
+@pytest.mark.benchmark(group="webcampyav_mjpeg_lores")
+def test_webcampyav_lores_full_decode_reformat(benchmark, backend_pyav: WebcamPyavBackend, hires_packet):
+    benchmark(backend_pyav.lores_jpeg_reformatted, VideoReformatter(), hires_packet, ColorRange.JPEG, 4)
+
+
+@pytest.mark.benchmark(group="webcampyav_mjpeg_lores")
+def test_webcampyav_lores_dct_scaled(benchmark, backend_pyav: WebcamPyavBackend, hires_packet):
+    benchmark(backend_pyav.lores_jpeg_dct_scaled, hires_packet, 4)
@@ -0,0 +1,61 @@
+import logging
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from photobooth.utils.multistereo_calibration.algorithms.simple import SimpleCalibrationUtil
+
+logger = logging.getLogger(name=None)
+
+NUMBER_CAMERAS = 4
+MAX_LENGTH = 1500
+
+
+@pytest.fixture()
+def calibrator() -> SimpleCalibrationUtil:
+    calibrator = SimpleCalibrationUtil()
+    calibrator.identity_all(NUMBER_CAMERAS, 3240, 2160)
+    for cam_idx in range(1, NUMBER_CAMERAS):
+        rotation = cv2.getRotationMatrix2D((1620, 1080), cam_idx - 2, 1.0) + [[0, 0, 10 * cam_idx], [0, 0, -5 * cam_idx]]
+        calibrator._caldataalign[cam_idx].H = np.vstack([rotation, [0, 0, 1]])
+
+    return calibrator
+
+
+def warp_full_then_scale(calibrator: SimpleCalibrationUtil):
+    # full resolution warp per camera one after another, scaled to the output size afterwards
+    images = [Image.open("src/tests/assets/input.jpg") for _ in range(NUMBER_CAMERAS)]
+    out = []
+    for caldataalign, image in zip(calibrator._caldataalign, images, strict=True):
+        warped = Image.fromarray(cv2.warpPerspective(np.array(image), caldataalign.H, image.size, flags=cv2.INTER_CUBIC))
+        warped = warped.crop((40, 40, 3200, 2120))
+        warped.thumbnail((MAX_LENGTH, MAX_LENGTH), Image.Resampling.LANCZOS)
+        out.append(warped)
+
+    return out
+
+
+def align_all_output_size(calibrator: SimpleCalibrationUtil):
+    return calibrator.align_all([Image.open("src/tests/assets/input.jpg") for _ in range(NUMBER_CAMERAS)], crop=True, max_length=MAX_LENGTH)
+
+
+def align_all_full_size(calibrator: SimpleCalibrationUtil):
+    return calibrator.align_all([Image.open("src/tests/assets/input.jpg") for _ in range(NUMBER_CAMERAS)], crop=True)
+
+
+@pytest.fixture(
+    params=[
+        "warp_full_then_scale",
+        "align_all_output_size",
+        "align_all_full_size",
+    ]
+)
+def library(request):
+    yield request.param
+
+
+@pytest.mark.benchmark(group="wigglegram_align")
+def test_wigglegram_align(library, calibrator, benchmark):
+    benchmark(eval(library), calibrator=calibrator)
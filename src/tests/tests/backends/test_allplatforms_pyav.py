@@ -1,7 +1,10 @@
 import logging
 from collections.abc import Generator
+from pathlib import Path
 
+import av
 import pytest
+from simplejpeg import decode_jpeg_header
 
 from photobooth.services.backends.webcampyav import WebcamPyavBackend
 from photobooth.services.config.groups.cameras import GroupCameraPyav
@@ -49,3 +52,22 @@ def test_optimize_mode(backend_pyav: WebcamPyavBackend):
 def test_get_images_webcampyav(backend_pyav: WebcamPyavBackend):
     """get lores and hires images from backend and assert"""
     get_images(backend_pyav)
+
+
+@pytest.mark.parametrize("reduce_factor", [1, 2, 4, 8])
+def test_lores_jpeg_dct_scaled(reduce_factor: int):
+    backend = WebcamPyavBackend(GroupCameraPyav())
+
+    jpeg_input = Path("src/tests/assets/input.jpg").read_bytes()
+    packet = av.Packet(jpeg_input)
+    height_input, width_input, _, _ = decode_jpeg_header(jpeg_input)
+
+    jpeg_bytes = backend.lores_jpeg_dct_scaled(packet, reduce_factor)
+
+    if reduce_factor == 1:
+        # passthrough untouched
+        assert jpeg_bytes == jpeg_input
+
+    height, width, _, _ = decode_jpeg_header(jpeg_bytes)
+    assert width == -(-width_input // reduce_factor)
+    assert height == -(-height_input // reduce_factor)
@@ -2,11 +2,20 @@
 Testing VIRTUALCAMERA Backend
 """
 
+import io
 import logging
+import time
 from collections.abc import Generator
+from pathlib import Path
+from unittest import mock
 
+import piexif
 import pytest
+from PIL import Image
 
+from photobooth import PATH_CAMERA_ORIGINAL
+from photobooth.appconfig import appconfig
+from photobooth.services.backends.abstractbackend import LatencySpans, LoresConsumer, LoresController, ModeController
 from photobooth.services.backends.virtualcamera import VirtualCameraBackend
 from photobooth.services.config.groups.cameras import GroupCameraVirtual
 
@@ -41,3 +50,234 @@ def test_get_images_virtualcamera(backend_virtual: VirtualCameraBackend):
 def test_get_images_virtualcamera_hires(backend_virtual: VirtualCameraBackend):
     backend_virtual._config.emulate_hires_static_still = True
     get_images(backend_virtual, multicam_is_error=True)
+
+
+def test_lores_frames_newer_than_seq(backend_virtual: VirtualCameraBackend):
+    consumer = LoresConsumer("pytest")
+
+    frame1 = backend_virtual.wait_for_lores_frame(consumer=consumer)
+    frame2 = backend_virtual.wait_for_lores_frame(consumer=consumer)
+
+    # a consumer never receives the same frame twice and the timestamps are in order
+    assert frame2.seq > frame1.seq
+    assert frame2.timestamp_ns > frame1.timestamp_ns
+    assert consumer.last_seq == frame2.seq
+
+    # frames already in the buffer are returned without waiting
+    lores_data = backend_virtual._lores_data[0]
+    assert lores_data.wait_for_frame(newer_than=0, timeout=0).seq >= 1
+    with pytest.raises(TimeoutError):
+        lores_data.wait_for_frame(newer_than=lores_data.seq + 1, timeout=0.1)
+
+    assert "pytest" in "".join(backend_virtual.get_stats().lores_consumers)
+
+
+def test_still_written_once_to_originals_with_orientation(backend_virtual: VirtualCameraBackend):
+    backend_virtual._orientation = "3: 180°"
+
+    filepath = backend_virtual.wait_for_still_file(destination=PATH_CAMERA_ORIGINAL)
+
+    # handed over in memory, written directly to the originals folder with orientation applied
+    assert filepath.parent.resolve() == Path(PATH_CAMERA_ORIGINAL).resolve()
+    assert piexif.load(str(filepath))["0th"][piexif.ImageIFD.Orientation] == 3
+
+
+def test_still_not_for_job_written_to_tmp(backend_virtual: VirtualCameraBackend):
+    # only jobs write into the originals, other stills are temporary
+    assert backend_virtual.wait_for_still_file().parent.resolve() == Path("tmp").resolve()
+
+
+def test_burst_files_delivered_as_captured(backend_virtual: VirtualCameraBackend):
+    interval = 0.2
+    timestamps = []
+
+    filepaths = []
+    for filepath in backend_virtual.wait_for_burst_files(3, interval=interval):
+        timestamps.append(time.monotonic())
+        filepaths.append(filepath)
+
+    assert len(set(filepaths)) == 3
+    assert all(filepath.parent.resolve() == Path("tmp").resolve() for filepath in filepaths)
+    # paced by the interval, small tolerance for the scheduling
+    assert timestamps[-1] - timestamps[0] >= 2 * interval * 0.9
+
+
+def test_burst_files_same_timestamp_not_overwritten(backend_virtual: VirtualCameraBackend):
+    # captured within the same timestamp, every still is kept
+    with mock.patch("photobooth.services.backends.abstractbackend.filename_str_time", return_value="20250101-120000-000000"):
+        filepaths = list(backend_virtual.wait_for_burst_files(3))
+
+    assert len(set(filepaths)) == 3
+    assert all(filepath.is_file() for filepath in filepaths)
+
+
+def test_burst_cancelled_when_generator_closed(backend_virtual: VirtualCameraBackend):
+    burst = backend_virtual.wait_for_burst_files(10, interval=0.5)
+    next(burst)
+    burst.close()
+
+    # backend is not blocked by the abandoned burst
+    assert backend_virtual.wait_for_still_file().is_file()
+
+
+def test_burst_failure_delivered_to_requester():
+    backend = VirtualCameraBackend(GroupCameraVirtual())
+    backend.start()
+    block_until_device_is_running(backend)
+
+    try:
+        produce_still_bytes = backend._produce_still_bytes
+        with mock.patch.object(backend, "_produce_still_bytes", side_effect=[produce_still_bytes(), RuntimeError("capture failed")]):
+            burst = backend.wait_for_burst_files(3, interval=0.2)
+            assert next(burst).is_file()
+
+            # the error is raised right away, not the timeout waiting for the next capture
+            with pytest.raises(RuntimeError, match="capture failed"):
+                next(burst)
+    finally:
+        backend.stop()
+
+
+def test_lores_controller_backs_off_during_postprocessing(backend_virtual: VirtualCameraBackend):
+    appconfig.backends.livestream_adaptive = True
+
+    backend_virtual.signal_postprocessing(True)
+    backend_virtual.wait_for_lores_image()
+    backend_virtual.wait_for_lores_image()  # second frame ensures the controller evaluated after the signal
+
+    stats = backend_virtual.get_stats().lores_controller
+    assert stats
+    assert stats.reason == "postprocessing"
+    assert stats.fps == appconfig.backends.livestream_framerate_min
+    assert stats.quality == appconfig.backends.livestream_quality_min
+    assert stats.downscale == appconfig.backends.livestream_downscale_max
+
+    backend_virtual.signal_postprocessing(False)
+
+    stats = backend_virtual.get_stats().lores_controller
+    assert stats
+    assert stats.fps == appconfig.backends.livestream_framerate_max
+    assert stats.downscale == 1
+
+
+@pytest.mark.parametrize("timestamp", [False, True])
+def test_synthetic_source(timestamp: bool):
+    backend = VirtualCameraBackend(
+        GroupCameraVirtual(
+            emulate_synthetic_source=True,
+            synthetic_resolution_width=1280,
+            synthetic_resolution_height=720,
+            synthetic_timestamp=timestamp,
+            framerate=30,
+            emulate_multicam_capture_devices=8,
+        )
+    )
+    backend.start()
+    block_until_device_is_running(backend)
+
+    try:
+        for index_subdevice in range(8):
+            with Image.open(io.BytesIO(backend.wait_for_lores_image(index_subdevice))) as img:
+                assert img.size == (1280, 720)
+
+        assert len(backend.wait_for_multicam_files()) == 8
+        with Image.open(backend.wait_for_still_file()) as img:
+            assert img.size == (1280, 720)
+    finally:
+        backend.stop()
+
+
+def test_latency_spans_per_stage(backend_virtual: VirtualCameraBackend):
+    backend_virtual.wait_for_still_file()
+    backend_virtual.wait_for_multicam_files()
+    backend_virtual.wait_for_lores_image()
+
+    latencies = backend_virtual.get_stats().latencies
+
+    for stage in ("still", "multicam"):
+        for span in ("queue", "capture", "notify", "orientation", "total"):
+            assert latencies[f"{stage}_{span}"].count >= 1
+    assert latencies["switchmode_still"].count >= 1
+    assert latencies["lores_delivery"].count >= 1
+
+    still_total = latencies["still_total"]
+    assert 0 <= still_total.p50_ms <= still_total.p95_ms <= still_total.max_ms
+
+
+def test_latency_spans_percentiles():
+    spans = LatencySpans(maxlen=100)
+    for duration_ms in range(1, 101):
+        spans.record("stage", start_ns=0, end_ns=duration_ms * 1_000_000)
+
+    stats = spans.get_stats()["stage"]
+    assert stats.count == 100
+    assert stats.p50_ms == 50
+    assert stats.p95_ms == 95
+    assert stats.max_ms == 100
+
+
+def test_still_mode_held_against_video_requests():
+    mode_controller = ModeController(mock.MagicMock())
+
+    mode_controller.schedule_still(delay=0, hold=5)
+    time.sleep(0.1)
+
+    # livestream requests video every frame, the scheduled still mode is not overridden
+    mode_controller.request_video()
+    assert mode_controller.requested_mode == "still"
+
+    # released after the capture
+    mode_controller.cancel_scheduled_still()
+    mode_controller.request_video()
+    assert mode_controller.requested_mode == "video"
+
+
+def test_schedule_still_mode_by_measured_switch_time(backend_virtual: VirtualCameraBackend):
+    backend_virtual.wait_for_still_file()  # ensure the switch time was measured once
+    estimate = backend_virtual._latencies.percentile("switchmode_still", 0.95)
+    assert estimate is not None
+
+    backend_virtual.schedule_still_mode(countdown=3)
+
+    timer = backend_virtual._mode_machine._still_timer
+    assert timer
+    assert timer.interval == pytest.approx(3 - estimate * 1.2 - 0.1)
+
+    backend_virtual._mode_machine.cancel_scheduled_still()
+
+
+def test_scheduled_still_released_on_failed_capture(backend_virtual: VirtualCameraBackend):
+    backend_virtual.schedule_still_mode(countdown=3)
+    assert backend_virtual._mode_machine._still_timer
+
+    with mock.patch.object(backend_virtual, "_record_request_latencies", side_effect=RuntimeError("failed")):
+        with pytest.raises(RuntimeError):
+            backend_virtual.wait_for_still_file()
+
+    # the still mode is not held against the livestream after the failed capture
+    assert backend_virtual._mode_machine._still_timer is None
+    assert backend_virtual._mode_machine._still_hold_until is None
+
+
+def test_lores_controller_disabled_keeps_backend_defaults():
+    controller = LoresController(default_quality=90)
+
+    controller.update([])
+
+    # the backends keep their own framerate
+    assert controller.reason == "adaptive disabled"
+    assert controller.fps is None
+    assert controller.quality == 90
+    assert controller.downscale == 1
+
+
+def test_lores_controller_restores_framerate_when_demand_returns():
+    appconfig.backends.livestream_adaptive = True
+    controller = LoresController()
+
+    controller.update([])  # no client requested the livestream yet
+    assert controller.reason == "no demand"
+    assert controller.fps == appconfig.backends.livestream_framerate_min
+
+    controller.demand()
+    assert controller.fps == appconfig.backends.livestream_framerate_max
@@ -0,0 +1,52 @@
+"""
+Testing the software video recorder
+"""
+
+import io
+import logging
+import subprocess
+from unittest import mock
+
+import pytest
+from PIL import Image
+
+from photobooth.services.backends.encoder.video import SoftwareVideoRecorder, _ffmpeg_passthrough_option
+
+from ..util import get_jpeg
+
+logger = logging.getLogger(name=None)
+
+
+def test_fit_jpeg_same_size_unchanged():
+    jpeg_bytes = get_jpeg((640, 480)).getvalue()
+
+    assert SoftwareVideoRecorder._fit_jpeg(jpeg_bytes, (640, 480)) is jpeg_bytes
+
+
+def test_fit_jpeg_scaled_to_stream_size():
+    # frames produced after the adaptive livestream reduced the resolution during a recording
+    jpeg_bytes = get_jpeg((320, 240)).getvalue()
+
+    with Image.open(io.BytesIO(SoftwareVideoRecorder._fit_jpeg(jpeg_bytes, (640, 480)))) as image:
+        assert image.format == "JPEG"
+        assert image.size == (640, 480)
+
+
+@pytest.mark.parametrize(
+    "version_output,expected",
+    [
+        ("ffmpeg version 4.4.2-0ubuntu0.22.04.1 Copyright (c) 2000-2021", "-vsync"),
+        ("ffmpeg version n5.0.3 Copyright (c) 2000-2022", "-vsync"),
+        ("ffmpeg version 5.1.6-0+deb12u1 Copyright (c) 2000-2024", "-fps_mode"),
+        ("ffmpeg version 7.1 Copyright (c) 2000-2024", "-fps_mode"),
+        ("ffmpeg version N-118315-g4f3c9f2f03-20250201 Copyright (c) 2000-2025", "-fps_mode"),
+    ],
+)
+def test_ffmpeg_passthrough_option(version_output: str, expected: str):
+    _ffmpeg_passthrough_option.cache_clear()
+
+    try:
+        with mock.patch.object(subprocess, "run", return_value=subprocess.CompletedProcess([], 0, stdout=version_output)):
+            assert _ffmpeg_passthrough_option() == expected
+    finally:
+        _ffmpeg_passthrough_option.cache_clear()
@@ -0,0 +1,83 @@
+"""
+Testing cache for decoded image assets
+"""
+
+import logging
+import os
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from photobooth.services.mediaprocessing.assetcache import AssetCache
+
+logger = logging.getLogger(name=None)
+
+
+@pytest.fixture()
+def frame_file(tmp_path: Path) -> Path:
+    frame = Image.new("RGBA", (400, 300), (255, 0, 0, 255))
+    frame.paste((0, 0, 0, 0), (50, 40, 250, 200))
+    frame.save(tmp_path / "frame.png")
+
+    return tmp_path / "frame.png"
+
+
+def test_assetcache_reuse(frame_file: Path):
+    cache = AssetCache(max_bytes=10 * 1024 * 1024)
+
+    rgba = cache.get_rgba(frame_file)
+    assert rgba.mode == "RGBA"
+    assert cache.get_rgba(frame_file) is rgba
+
+    assert cache.get_transparent_bbox(frame_file) == (50, 40, 250, 200)
+    assert cache.get_transparent_bbox(frame_file) == (50, 40, 250, 200)
+
+    fitted = cache.get_fitted(frame_file, (200, 200))
+    assert fitted.size == (200, 200)
+    assert cache.get_fitted(frame_file, (200, 200)) is fitted
+    assert cache.get_fitted(frame_file, (100, 100)) is not fitted
+
+    stats = cache.get_stats()
+    assert stats.entries == 4
+    assert stats.hits == 6  # rgba is also used to derive bbox and fitted versions
+    assert stats.misses == 4
+
+
+def test_assetcache_invalidate_on_change(frame_file: Path):
+    cache = AssetCache(max_bytes=10 * 1024 * 1024)
+
+    assert cache.get_transparent_bbox(frame_file) == (50, 40, 250, 200)
+
+    frame = Image.new("RGBA", (400, 300), (255, 0, 0, 255))
+    frame.paste((0, 0, 0, 0), (10, 10, 20, 20))
+    frame.save(frame_file)
+    stat = frame_file.stat()
+    os.utime(frame_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.get_transparent_bbox(frame_file) == (10, 10, 20, 20)
+
+
+def test_assetcache_lru_eviction(frame_file: Path):
+    # room for about 2 fitted versions only
+    cache = AssetCache(max_bytes=2 * 100 * 100 * 4 + 100)
+
+    cache.get_fitted(frame_file, (100, 100))  # too big to keep the rgba decoded version
+    cache.get_fitted(frame_file, (100, 99))
+    cache.get_fitted(frame_file, (100, 100))  # refresh lru
+    cache.get_fitted(frame_file, (100, 98))  # evicts (100, 99)
+
+    stats = cache.get_stats()
+    assert stats.entries == 2
+    assert stats.size_bytes <= cache.max_bytes
+
+    misses_before = stats.misses
+    cache.get_fitted(frame_file, (100, 100))
+    assert cache.get_stats().misses == misses_before
+
+
+def test_assetcache_filenotfound(tmp_path: Path):
+    cache = AssetCache(max_bytes=10 * 1024 * 1024)
+
+    with pytest.raises(FileNotFoundError):
+        cache.get_rgba(tmp_path / "nonexistent.png")
@@ -0,0 +1,136 @@
+"""
+Testing precompiled collage templates
+"""
+
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image, ImageOps
+
+from photobooth.appconfig import appconfig
+from photobooth.services.config.groups.actions import CollageMergeDefinition, CollageProcessing
+from photobooth.services.mediaprocessing.collagetemplate import CaptureSlot, get_collage_template, open_reduced, rotate
+from photobooth.services.mediaprocessing.context import ImageContext
+from photobooth.services.mediaprocessing.pipeline import Pipeline
+from photobooth.services.mediaprocessing.steps.image import ImageMountStep, PluginFilterStep
+
+logger = logging.getLogger(name=None)
+
+
+@pytest.fixture()
+def config() -> CollageProcessing:
+    return appconfig.actions.collage[0].processing.model_copy(deep=True)
+
+
+def test_static_content_merged(config: CollageProcessing):
+    template = get_collage_template(config)
+
+    # left capture, middle predefined, right capture, front image on top
+    assert [type(layer) for layer in template.layers] == [CaptureSlot, Image.Image, CaptureSlot, Image.Image]
+    assert [layer.index for layer in template.layers if isinstance(layer, CaptureSlot)] == [0, 1]
+    assert template.number_captures == 2
+
+
+def test_static_layers_below_merged(config: CollageProcessing):
+    config.canvas_fill_background_enable = True
+    config.merge_definition[1].pos_z = 0
+    config.merge_definition[0].pos_z = 1
+    config.merge_definition[2].pos_z = 1
+
+    template = get_collage_template(config)
+
+    # fill color and predefined image below all captures are one layer
+    assert [type(layer) for layer in template.layers] == [Image.Image, CaptureSlot, CaptureSlot, Image.Image]
+
+
+def reference_collage(config: CollageProcessing, files_in: list[Path]) -> Image.Image:
+    # every image fully decoded and pasted onto the canvas one after another
+    captures = iter(files_in)
+    canvas = Image.new("RGBA", (config.canvas_width, config.canvas_height))
+
+    for merge_def in sorted(config.merge_definition, key=lambda merge_def: merge_def.pos_z):
+        image = Image.open(merge_def.predefined_image or next(captures))
+        if merge_def.predefined_image and merge_def.image_filter:
+            context = ImageContext(image)
+            Pipeline[ImageContext](PluginFilterStep(merge_def.image_filter))(context)
+            image = context.image
+
+        image = ImageOps.fit(image, (merge_def.width, merge_def.height), method=Image.Resampling.LANCZOS)
+        image, offset_x, offset_y = rotate(image, merge_def.rotate)
+        canvas.paste(image, (merge_def.pos_x - offset_x, merge_def.pos_y - offset_y), image)
+
+    return canvas
+
+
+def test_render_same_as_reference(config: CollageProcessing):
+    files_in = [Path("src/tests/assets/input.jpg"), Path("src/tests/assets/input.jpg")]
+
+    canvas = get_collage_template(config).render(files_in)
+
+    image_context = ImageContext(reference_collage(config, files_in))
+    assert config.canvas_img_front_file
+    Pipeline[ImageContext](ImageMountStep(config.canvas_img_front_file, reverse=True))(image_context)
+
+    difference = np.abs(np.asarray(canvas, dtype=np.int16) - np.asarray(image_context.image, dtype=np.int16))
+
+    assert canvas.mode == "RGBA"
+    assert canvas.size == (config.canvas_width, config.canvas_height)
+    assert difference.mean() < 1.0
+
+
+def test_render_wrong_number_captures(config: CollageProcessing):
+    with pytest.raises(RuntimeError):
+        get_collage_template(config).render([Path("src/tests/assets/input.jpg")])
+
+
+def test_render_slot_outside_canvas(config: CollageProcessing):
+    config.merge_definition = [CollageMergeDefinition(pos_x=1800, pos_y=1200, rotate=30)]
+
+    canvas = get_collage_template(config).render([Path("src/tests/assets/input.jpg")])
+
+    assert canvas.size == (config.canvas_width, config.canvas_height)
+
+
+def test_template_cached(config: CollageProcessing):
+    assert get_collage_template(config) is get_collage_template(config)
+
+    config.canvas_width = 1000
+    assert get_collage_template(config).size == (1000, config.canvas_height)
+
+
+def test_template_recompiled_on_asset_change(config: CollageProcessing, tmp_path: Path):
+    assert config.canvas_img_front_file
+    front_file = Path(shutil.copy2(config.canvas_img_front_file, tmp_path / "front.png"))
+    config.canvas_img_front_file = front_file
+
+    template = get_collage_template(config)
+
+    os.utime(front_file, ns=(front_file.stat().st_atime_ns, front_file.stat().st_mtime_ns + 1_000_000_000))
+
+    assert get_collage_template(config) is not template
+
+
+def test_rotate():
+    image = Image.new("RGB", (200, 100))
+
+    rotated, offset_x, offset_y = rotate(image)
+    assert rotated.mode == "RGBA"
+    assert (rotated.size, offset_x, offset_y) == ((200, 100), 0, 0)
+
+    # expanded around the center
+    rotated, offset_x, offset_y = rotate(image, 90)
+    assert (rotated.size, offset_x, offset_y) == ((100, 200), -50, 50)
+
+
+def test_open_reduced():
+    with open_reduced(Path("src/tests/assets/input.jpg"), (510, 725)) as image:
+        image.load()
+
+        # decoded at reduced size, still covering the slot when fitted
+        assert image.width < 3240
+        assert image.width / image.height * 725 >= 510
+        assert image.height >= 725
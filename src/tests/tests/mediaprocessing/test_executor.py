@@ -0,0 +1,119 @@
+"""
+Testing mediaprocessing executor running phase-1 in worker processes
+"""
+
+import logging
+import os
+import shutil
+from collections.abc import Generator
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+from photobooth import PATH_PROCESSED, PATH_UNPROCESSED
+from photobooth.database.models import Mediaitem, MediaitemTypes
+from photobooth.services.config.groups.actions import SingleImageProcessing
+from photobooth.services.mediaprocessing.executor import MediaprocessingExecutor, process_phase1capture
+
+logger = logging.getLogger(name=None)
+
+
+@pytest.fixture(params=[0, 2])
+def executor(request) -> Generator[MediaprocessingExecutor, None, None]:
+    executor = MediaprocessingExecutor()
+    executor.start(request.param)
+
+    yield executor
+
+    executor.stop()
+
+
+def _mediaitem(tmp_path: Path) -> Mediaitem:
+    name = f"{uuid4()}.jpg"
+    captured_original = shutil.copy2("src/tests/assets/input.jpg", tmp_path / name)
+
+    return Mediaitem(
+        id=uuid4(),
+        job_identifier=uuid4(),
+        media_type=MediaitemTypes.image,
+        unprocessed=Path(PATH_UNPROCESSED, name),
+        processed=Path(PATH_PROCESSED, name),
+        captured_original=Path(captured_original),
+        pipeline_config=SingleImageProcessing(image_filter="FilterPilgram2.aden").model_dump(mode="json"),
+    )
+
+
+def test_executor_phase1_fanout(executor: MediaprocessingExecutor, tmp_path: Path):
+    mediaitems = [_mediaitem(tmp_path) for _ in range(3)]
+
+    executor.map(process_phase1capture, [(mediaitem, 1000) for mediaitem in mediaitems])
+
+    for mediaitem in mediaitems:
+        assert mediaitem.unprocessed.is_file()
+        assert mediaitem.processed.is_file()
+
+    stats = executor.get_stats()
+    assert stats.last_batch_size == 3
+    assert stats.last_batch_duration
+    assert sum(worker.tasks for worker in stats.per_worker) == 3
+    assert all(worker.last_task == process_phase1capture.__name__ for worker in stats.per_worker)
+
+    if stats.workers == 0:
+        assert [worker.pid for worker in stats.per_worker] == [os.getpid()]
+    else:
+        assert os.getpid() not in [worker.pid for worker in stats.per_worker]
+
+
+def test_executor_error_propagates(executor: MediaprocessingExecutor, tmp_path: Path):
+    mediaitem = _mediaitem(tmp_path)
+    mediaitem.captured_original = tmp_path / "nonexistent.jpg"
+
+    with pytest.raises(FileNotFoundError):
+        executor.submit(process_phase1capture, mediaitem, 1000).result()
+
+
+def test_executor_cancel_queued(executor: MediaprocessingExecutor, tmp_path: Path):
+    if not executor.is_parallel:
+        pytest.skip("tasks are finished on submit without worker processes")
+
+    mediaitems = [_mediaitem(tmp_path) for _ in range(6)]
+    futures = [executor.submit(process_phase1capture, mediaitem, 1000) for mediaitem in mediaitems]
+
+    # the last one is still queued and never starts
+    assert futures[-1].cancel()
+    assert futures[-1].cancelled()
+
+    executor.gather(futures[:-1])
+
+    assert not mediaitems[-1].processed.exists()
+    assert all(mediaitem.processed.is_file() for mediaitem in mediaitems[:-1])
+
+
+def test_executor_preload_model(tmp_path: Path):
+    executor = MediaprocessingExecutor()
+    executor.start(1, preload_model="modnet")
+
+    try:
+        # processing is not affected by preloading, even if the model fails to load
+        executor.submit(process_phase1capture, _mediaitem(tmp_path), 1000).result()
+    finally:
+        executor.stop()
+
+
+def test_executor_broken_pool_restarted(tmp_path: Path):
+    executor = MediaprocessingExecutor()
+    executor.start(1)
+
+    try:
+        broken_pool = executor._pool
+
+        # the worker dies during the task like killed due to out of memory
+        with pytest.raises(BrokenProcessPool):
+            executor.submit(os._exit, 1).result()
+
+        assert executor._pool is not broken_pool
+        executor.submit(process_phase1capture, _mediaitem(tmp_path), 1000).result()
+    finally:
+        executor.stop()
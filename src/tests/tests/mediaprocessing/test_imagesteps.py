@@ -22,6 +22,7 @@ from photobooth.services.mediaprocessing.steps.image import (
     PluginFilterStep,
     RemovebgStep,
     TextStep,
+    draw_rotated_text,
     get_plugin_avail_filters,
     get_plugin_userselectable_filters,
 )
@@ -120,6 +121,41 @@ def test_text_stage(pil_image: Image.Image):
     assert pil_image is not stage_output
 
 
+def test_text_stage_static_text_cached(pil_image: Image.Image):
+    textconfig = [TextsConfig(text="static text", pos_x=1500, pos_y=1000, rotate=20, font=Path("userdata/demoassets/fonts/Roboto-Bold.ttf"))]
+
+    assert TextStep.is_static_text("static text")
+    assert not TextStep.is_static_text("{date} {time}")
+
+    outputs = []
+    for _ in range(2):
+        context = ImageContext(pil_image)
+        pipeline = Pipeline[ImageContext](TextStep(textconfig))
+        pipeline(context)
+        outputs.append(context.image)
+
+    assert not is_same(pil_image, outputs[0])
+    assert is_same(outputs[0], outputs[1])
+
+
+def test_draw_rotated_text_region_same_as_fullcanvas():
+    font = TextStep.get_font(Path("userdata/demoassets/fonts/Roboto-Bold.ttf"), 60)
+
+    for angle in (0, 90, 33):
+        # reference: draw into a full canvas mask and rotate the whole canvas around its center
+        mask = Image.new("L", (800, 600), 0)
+        ImageDraw.Draw(mask).text((100, 150), "Hello\nWorld", 255, font=font)
+        reference = mask.rotate(angle, expand=False, resample=Image.Resampling.BICUBIC)
+
+        result = Image.new("RGB", (800, 600), (0, 0, 0))
+        draw_rotated_text(result, angle, (100, 150), "Hello\nWorld", (255, 255, 255), font=font)
+        result = result.convert("L")
+
+        # allow small deviations at the antialiased edges due to subpixel positioning
+        diff = [abs(a - b) for a, b in zip(result.getdata(), reference.getdata(), strict=True)]
+        assert sum(d > 96 for d in diff) < 20
+
+
 def test_text_stage_fontnotavail(pil_image: Image.Image):
     textconfig = [TextsConfig(text="asdf", font=None)]
 
@@ -8,7 +8,14 @@ from PIL import Image, ImageDraw
 
 from photobooth.services.mediaprocessing.context import MulticameraContext
 from photobooth.services.mediaprocessing.pipeline import Pipeline
-from photobooth.services.mediaprocessing.steps.multicamera import AutoPivotPointStep, CropCommonAreaStep, OffsetPerOpticalFlowStep
+from photobooth.services.mediaprocessing.steps.multicamera import (
+    AlignAsPerCalibrationStep,
+    AutoPivotPointStep,
+    CropCommonAreaStep,
+    OffsetPerOpticalFlowStep,
+    get_calibration_util,
+)
+from photobooth.utils.multistereo_calibration.algorithms.simple import SimpleCalibrationUtil
 
 logger = logging.getLogger(name=None)
 
@@ -76,3 +83,31 @@ def test_pipeline_multicamera(dummy_images: list[Image.Image], tmp_path: Path):
         loop=0,  # loop forever
     )
     # assert False
+
+
+def test_calibration_loaded_once(tmp_path: Path):
+    calibrator = SimpleCalibrationUtil()
+    calibrator.identity_all(2, 400, 250)
+    calibrator.save_calibration_data(tmp_path)
+
+    cal_util = get_calibration_util(tmp_path)
+    assert get_calibration_util(tmp_path) is cal_util
+
+    # recalibrated data is loaded again
+    calibrator.identity_all(3, 400, 250)
+    calibrator.save_calibration_data(tmp_path)
+    assert len(get_calibration_util(tmp_path)._caldataalign) == 3
+
+
+def test_align_as_per_calibration_no_data(dummy_images: list[Image.Image], tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("photobooth.services.mediaprocessing.steps.multicamera.CALIBRATION_DATA_PATH", tmp_path)
+
+    sizes_before = [image.size for image in dummy_images[:3]]
+
+    context = MulticameraContext(dummy_images[:3])
+    Pipeline[MulticameraContext](AlignAsPerCalibrationStep(max_length=200))(context)
+
+    # unaligned images passed through, but scaled to the output size
+    assert context.images == dummy_images[:3]
+    assert all(max(image.size) == 200 for image in context.images)
+    assert [image.width / image.height for image in context.images] == pytest.approx([width / height for width, height in sizes_before], rel=0.01)
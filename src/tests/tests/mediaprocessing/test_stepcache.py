@@ -0,0 +1,154 @@
+"""
+Testing persistent cache for results of expensive steps
+"""
+
+import logging
+import shutil
+import threading
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from PIL import Image
+
+from photobooth.database.models import Mediaitem, MediaitemTypes
+from photobooth.services.config.groups.actions import SingleImageProcessing
+from photobooth.services.config.models.models import PluginFilters
+from photobooth.services.mediaprocessing import processes
+from photobooth.services.mediaprocessing.context import ImageContext
+from photobooth.services.mediaprocessing.pipeline import NextStep
+from photobooth.services.mediaprocessing.stepcache import StepCache
+from photobooth.services.mediaprocessing.steps.image import FillBackgroundStep, PluginFilterStep, RemovebgStep, TextStep
+
+logger = logging.getLogger(name=None)
+
+
+@pytest.fixture()
+def cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> StepCache:
+    cache = StepCache(tmp_path / "steps")
+    monkeypatch.setattr(processes, "step_cache", cache)
+
+    return cache
+
+
+@pytest.fixture()
+def removebg_calls(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    # no model needed, just make the image transparent and count the calls
+    calls = []
+
+    def fake_removebg(self, context: ImageContext, next_step: NextStep):
+        calls.append(1)
+        cutout = context.image.convert("RGBA")
+        cutout.putalpha(0)
+        cutout.paste((0, 0, 0, 255), (10, 10, 50, 50))
+        context.image = cutout
+        next_step(context)
+
+    monkeypatch.setattr(RemovebgStep, "__call__", fake_removebg)
+
+    return calls
+
+
+@pytest.fixture()
+def mediaitem(tmp_path: Path) -> Mediaitem:
+    shutil.copy2("src/tests/assets/input_lores.jpg", tmp_path / "unprocessed.jpg")
+
+    return Mediaitem(
+        id=uuid4(),
+        job_identifier=uuid4(),
+        media_type=MediaitemTypes.image,
+        unprocessed=tmp_path / "unprocessed.jpg",
+        processed=tmp_path / "processed.jpg",
+        pipeline_config=SingleImageProcessing(remove_background=True, fill_background_enable=True).model_dump(mode="json"),
+    )
+
+
+def test_chain_keys():
+    removebg = RemovebgStep("modnet")
+    keys = StepCache.chain_keys("input", [removebg, FillBackgroundStep("red")])
+
+    # upstream keys don't depend on later steps
+    assert keys[0] == StepCache.chain_keys("input", [removebg, FillBackgroundStep("blue")])[0]
+    assert keys[1] != StepCache.chain_keys("input", [removebg, FillBackgroundStep("blue")])[1]
+
+    # depend on the input and parameters
+    assert keys[0] != StepCache.chain_keys("other_input", [removebg])[0]
+    assert keys[0] != StepCache.chain_keys("input", [RemovebgStep("u2netp")])[0]
+
+    # no reuse after a step that cannot be identified
+    assert StepCache.chain_keys("input", [TextStep([]), removebg]) == [None, None]
+
+
+def test_refilter_resumes_after_removebg(cache: StepCache, removebg_calls: list[int], mediaitem: Mediaitem):
+    processes.process_phase1images(mediaitem.unprocessed, mediaitem)
+    cache.flush()
+    assert len(removebg_calls) == 1
+    assert len(list((cache.path / mediaitem.id.hex).glob("*.webp"))) == 1
+
+    # changing the filter resumes from the stored cutout
+    mediaitem.pipeline_config = mediaitem.pipeline_config | {"image_filter": PluginFilters("FilterPilgram2.aden").value}
+    processes.process_phase1images(mediaitem.unprocessed, mediaitem)
+    assert len(removebg_calls) == 1
+    assert mediaitem.processed.is_file()
+
+    # changed input is computed again
+    Image.open(mediaitem.unprocessed).rotate(90).save(mediaitem.unprocessed)
+    processes.process_phase1images(mediaitem.unprocessed, mediaitem)
+    assert len(removebg_calls) == 2
+
+
+def test_resumed_result_same(cache: StepCache, removebg_calls: list[int], mediaitem: Mediaitem):
+    processes.process_phase1images(mediaitem.unprocessed, mediaitem)
+    cache.flush()
+    with Image.open(mediaitem.processed) as img:
+        computed = list(img.getdata())
+
+    processes.process_phase1images(mediaitem.unprocessed, mediaitem)
+    with Image.open(mediaitem.processed) as img:
+        resumed = list(img.getdata())
+
+    assert len(removebg_calls) == 1
+    assert computed == resumed
+
+
+def test_failed_step_not_stored(cache: StepCache, monkeypatch: pytest.MonkeyPatch, mediaitem: Mediaitem):
+    def failing_session(*args, **kwargs):
+        raise RuntimeError("model not avail")
+
+    monkeypatch.setattr("photobooth.services.mediaprocessing.steps.image.get_rembg_session", failing_session)
+
+    processes.process_phase1images(mediaitem.unprocessed, mediaitem)
+    cache.flush()
+
+    assert not (cache.path / mediaitem.id.hex).exists()
+
+
+def test_delete_item(cache: StepCache, removebg_calls: list[int], mediaitem: Mediaitem):
+    processes.process_phase1images(mediaitem.unprocessed, mediaitem)
+
+    cache.delete_item(mediaitem.id)
+
+    assert not (cache.path / mediaitem.id.hex).exists()
+
+
+def test_delete_item_while_written_by_other_process(cache: StepCache):
+    item_id = uuid4()
+    writing = threading.Event()
+
+    # hold the background writer, like a worker process still writing after its task finished
+    cache._writer.submit(writing.wait)
+    cache.store(item_id, "key", Image.new("RGB", (10, 10)))
+
+    # the app process has its own cache instance on the same folder
+    StepCache(cache.path).delete_item(item_id)
+    writing.set()
+    cache.flush()
+
+    assert list(cache.path.iterdir()) == []
+
+
+def test_nothing_stored_not_resumed(cache: StepCache):
+    steps = [RemovebgStep("modnet"), PluginFilterStep(PluginFilters("original"))]
+    keys = StepCache.chain_keys("input", steps)
+
+    assert cache.resume(uuid4(), steps, keys) == (0, None)
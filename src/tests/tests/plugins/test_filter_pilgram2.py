@@ -1,9 +1,14 @@
 import logging
+from typing import get_args
 
+import numpy as np
+import pilgram2
 import pytest
+from PIL import Image
 
-from photobooth.plugins.filter_pilgram2.config import FilterPilgram2Config
+from photobooth.plugins.filter_pilgram2.config import FilterPilgram2Config, available_filter
 from photobooth.plugins.filter_pilgram2.filter_pilgram2 import FilterPilgram2
+from photobooth.plugins.filter_pilgram2.lut import get_lut
 
 logger = logging.getLogger(name=None)
 
@@ -16,3 +21,47 @@ def filter_pilgram2_plugin():
     plgrm2._config = FilterPilgram2Config()
 
     yield plgrm2
+
+
+def _max_difference(image1: Image.Image, image2: Image.Image) -> int:
+    return int(np.abs(np.asarray(image1, dtype=np.int16) - np.asarray(image2, dtype=np.int16)).max())
+
+
+@pytest.mark.parametrize("filter", get_args(available_filter))
+def test_lut_engine_same_as_pilgram2(filter_pilgram2_plugin: FilterPilgram2, filter):
+    with Image.open("src/tests/assets/input_lores.jpg") as im:
+        image = im.convert("RGB")
+
+    filter_pilgram2_plugin._config.use_lut_engine = False
+    reference = filter_pilgram2_plugin.do_filter(image, filter)
+    filter_pilgram2_plugin._config.use_lut_engine = True
+    filtered = filter_pilgram2_plugin.do_filter(image, filter)
+
+    if get_lut(filter):
+        assert _max_difference(reference, filtered) <= 10
+    else:
+        # spatial filters are not compiled, cached gradients give the exact result
+        assert _max_difference(reference, getattr(pilgram2, filter)(image)) == 0
+        assert _max_difference(reference, filtered) == 0
+
+
+@pytest.mark.parametrize("filter", ["clarendon", "mayfair"])
+def test_lut_engine_keeps_transparency(filter_pilgram2_plugin: FilterPilgram2, filter):
+    image = Image.new("RGBA", (64, 48), (200, 100, 50, 255))
+    image.paste((0, 0, 0, 0), (10, 10, 30, 30))
+
+    filtered = filter_pilgram2_plugin.do_filter(image, filter)
+
+    assert filtered.mode == "RGBA"
+    assert filtered.getchannel("A").tobytes() == image.getchannel("A").tobytes()
+
+
+def test_lut_engine_other_modes(filter_pilgram2_plugin: FilterPilgram2):
+    filtered = filter_pilgram2_plugin.do_filter(Image.new("L", (64, 48), 128), "clarendon")
+
+    assert filtered.mode == "RGB"
+
+
+def test_lut_spatial_filter_not_compiled():
+    assert get_lut("clarendon") is not None
+    assert get_lut("mayfair") is None  # radial gradient
@@ -1,5 +1,6 @@
 import io
 import logging
+import os
 from unittest import mock
 from unittest.mock import patch
 from uuid import uuid4
@@ -11,6 +12,7 @@ import photobooth.routers.api.filter
 import photobooth.services
 import photobooth.services.mediaprocessing.steps.image
 from photobooth.container import container
+from photobooth.services.mediaprocessing.previewcache import filter_preview_cache
 
 from ...util import is_same
 
@@ -72,6 +74,7 @@ def test_preview_otherexception(client: TestClient):
     error_mock.side_effect = Exception("mock error")
 
     mediaitem = container.mediacollection_service.get_item_latest()
+    filter_preview_cache.delete_item(mediaitem.id)  # otherwise served from cache without processing
 
     # https://docs.python.org/3/library/unittest.mock.html#where-to-patch
     with patch.object(photobooth.routers.api.filter, "process_image_inner", error_mock):
@@ -80,6 +83,82 @@ def test_preview_otherexception(client: TestClient):
     assert response.status_code == 500
 
 
+def test_preview_filter_cached(client: TestClient):
+    mediaitem = container.mediacollection_service.get_item_latest()
+    filter_preview_cache.delete_item(mediaitem.id)
+
+    response = client.get(f"/filter/{mediaitem.id}?filter=FilterPilgram2.aden")
+    assert response.status_code == 200
+
+    # second request is served from cache without processing
+    with patch.object(photobooth.routers.api.filter, "process_image_inner", side_effect=RuntimeError("mock")):
+        response_cached = client.get(f"/filter/{mediaitem.id}?filter=FilterPilgram2.aden")
+
+    assert response_cached.status_code == 200
+    assert response_cached.content == response.content
+
+
+def test_preview_filter_rendered_again_after_update(client: TestClient):
+    mediaitem = container.mediacollection_service.get_item_latest()
+    filter_preview_cache.delete_item(mediaitem.id)
+
+    response = client.get(f"/filter/{mediaitem.id}?filter=FilterPilgram2.aden")
+    assert response.status_code == 200
+
+    # unprocessed file written again within the same second, the cached preview is outdated
+    stat = mediaitem.unprocessed.stat()
+    os.utime(mediaitem.unprocessed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    with patch.object(photobooth.routers.api.filter, "process_image_inner", side_effect=RuntimeError("mock")) as mock_process:
+        response_updated = client.get(f"/filter/{mediaitem.id}?filter=FilterPilgram2.aden")
+
+    mock_process.assert_called()
+    assert response_updated.status_code == 500
+
+
+def test_preview_filter_cached_after_processed_update(client: TestClient):
+    mediaitem = container.mediacollection_service.get_item_latest()
+    filter_preview_cache.delete_item(mediaitem.id)
+
+    response = client.get(f"/filter/{mediaitem.id}?filter=FilterPilgram2.aden")
+    assert response.status_code == 200
+
+    # applying a filter writes the processed file only, previews are rendered from unprocessed and still valid
+    stat = mediaitem.processed.stat()
+    os.utime(mediaitem.processed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    with patch.object(photobooth.routers.api.filter, "process_image_inner", side_effect=RuntimeError("mock")):
+        response_cached = client.get(f"/filter/{mediaitem.id}?filter=FilterPilgram2.aden")
+
+    assert response_cached.status_code == 200
+
+
+def test_preview_filters_batch(client: TestClient):
+    mediaitem = container.mediacollection_service.get_item_latest()
+    filter_preview_cache.delete_item(mediaitem.id)
+
+    response = client.get(f"/filter/{mediaitem.id}/previews")
+    assert response.status_code == 200
+
+    previews = response.json()
+    assert [preview["filter"] for preview in previews] == client.get("/filter/").json()
+
+    # all urls are cache hits now
+    with patch.object(photobooth.routers.api.filter, "process_image_inner", side_effect=RuntimeError("mock")):
+        for preview in previews[:3]:
+            response_preview = client.get(preview["url"])
+            assert response_preview.status_code == 200
+
+            with Image.open(io.BytesIO(response_preview.content)) as img:
+                img.verify()
+
+
+def test_preview_filters_batch_nonexistentitem(client: TestClient):
+    response = client.get(f"/filter/{uuid4()}/previews")
+
+    assert response.status_code == 404
+
+
 def test_preview_filter_nonexistentfilter(client: TestClient):
     # get the newest mediaitem
     mediaitem = container.mediacollection_service.get_item_latest()
@@ -45,6 +45,15 @@ def test_get_multicam_files(_acqs: AcquisitionService):
             img.verify()
 
 
+def test_get_burst_files(_acqs: AcquisitionService):
+    images = list(_acqs.wait_for_burst_files(2))
+
+    assert len(images) == 2
+    for image in images:
+        with Image.open(image) as img:
+            img.verify()
+
+
 def test_getvideo(_acqs: AcquisitionService):
     """get video from service"""
     videopath = _acqs.start_recording()
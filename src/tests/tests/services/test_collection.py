@@ -5,10 +5,13 @@ from unittest.mock import patch
 from uuid import uuid4
 
 import pytest
+from PIL import Image
 from sqlalchemy.orm.attributes import flag_modified
 
-from photobooth.database.models import Mediaitem, MediaitemTypes
+from photobooth.appconfig import appconfig
+from photobooth.database.models import DimensionTypes, Mediaitem, MediaitemTypes
 from photobooth.services.collection import MediacollectionService
+from photobooth.services.mediaprocessing.processes import generate_renditions
 from tests.tests.util import dummy_mediaitem
 
 logger = logging.getLogger(name=None)
@@ -77,6 +80,58 @@ def test_add_item_filedoesntexist(cs: MediacollectionService):
     assert count_before == cs.count()
 
 
+def test_add_item_with_renditions_cache_hit(cs: MediacollectionService):
+    dummy_item = dummy_mediaitem()
+    dummy_item.id = uuid4()
+    appconfig.mediaprocessing.thumbnail_still_length = 300
+
+    with Image.open(dummy_item.processed) as image:
+        renditions = generate_renditions([image], dummy_item)
+
+    cs.add_item(dummy_item, renditions)
+
+    with patch("photobooth.services.collection.resize") as mock:
+        for rendition in renditions:
+            cacheditem = cs.cache.get_cached_repr(dummy_item, rendition.dimension)
+            assert cacheditem.id == rendition.id
+
+        mock.assert_not_called()
+
+    with Image.open(cs.cache.get_cached_repr(dummy_item, DimensionTypes.thumbnail).filepath) as thumbnail:
+        assert thumbnail.size == (300, 200)
+
+
+def test_update_item_renditions_replaced(cs: MediacollectionService):
+    dummy_item = dummy_mediaitem()
+    cs.add_item(dummy_item)
+    cacheditem_before = cs.cache.get_cached_repr(dummy_item, DimensionTypes.preview)
+
+    with Image.open(dummy_item.processed) as image:
+        renditions = generate_renditions([image], dummy_item)
+
+    flag_modified(dummy_item, "pipeline_config")
+    cs.update_item(dummy_item, renditions)
+
+    cacheditem_after = cs.cache.get_cached_repr(dummy_item, DimensionTypes.preview)
+    assert cacheditem_after.id != cacheditem_before.id
+    assert cacheditem_after.id in [rendition.id for rendition in renditions]
+    assert not cacheditem_before.filepath.exists()
+
+
+def test_update_item_without_renditions_invalidates_cache(cs: MediacollectionService):
+    dummy_item = dummy_mediaitem()
+    cs.add_item(dummy_item)
+    cacheditem_before = cs.cache.get_cached_repr(dummy_item, DimensionTypes.preview)
+
+    # updated within the same second the cached item was created
+    flag_modified(dummy_item, "pipeline_config")
+    cs.update_item(dummy_item)
+
+    cacheditem_after = cs.cache.get_cached_repr(dummy_item, DimensionTypes.preview)
+    assert cacheditem_after.id != cacheditem_before.id
+    assert not cacheditem_before.filepath.exists()
+
+
 def test_update_item(cs: MediacollectionService):
     dummy_item = dummy_mediaitem()
     cs.add_item(dummy_item)
@@ -1,12 +1,16 @@
 import logging
 import time
 from collections.abc import Generator
+from pathlib import Path
+from unittest import mock
 
+import av
 import pytest
 from PIL import Image
 
 from photobooth.appconfig import appconfig
 from photobooth.container import Container, container
+from photobooth.services.mediaprocessing.stepcache import step_cache
 
 from ..util import block_until_device_is_running, video_duration
 
@@ -79,6 +83,33 @@ def test_collage_auto_approval(_container: Container):
         img.verify()
 
 
+def test_collage_burst(_container: Container, monkeypatch: pytest.MonkeyPatch):
+    # without countdown and approval in between, all captures are taken in one burst request
+    monkeypatch.setattr(appconfig.actions.collage[0].jobcontrol, "ask_approval_each_capture", False)
+    monkeypatch.setattr(appconfig.actions.collage[0].jobcontrol, "countdown_capture_second_following", 0)
+    before_count = _container.mediacollection_service.count()
+
+    acquisition_service = _container.acquisition_service
+    with (
+        mock.patch.object(acquisition_service, "wait_for_burst_files", wraps=acquisition_service.wait_for_burst_files) as mock_burst,
+        mock.patch.object(acquisition_service, "wait_for_still_file", wraps=acquisition_service.wait_for_still_file) as mock_still,
+    ):
+        _container.processing_service.trigger_action("collage", 0)
+        jobmodel = _container.processing_service._workflow_jobmodel
+        assert jobmodel is not None
+        _container.processing_service.wait_until_job_finished()
+
+    mock_burst.assert_called_once()
+    assert mock_burst.call_args.args[0] == jobmodel.total_captures_to_take
+    mock_still.assert_not_called()
+
+    assert _container.mediacollection_service.count() == before_count + jobmodel.total_captures_to_take + 1
+
+    phase2_item = _container.mediacollection_service.get_item_latest()
+    with Image.open(phase2_item.unprocessed, formats=["JPEG"]) as img:
+        img.verify()
+
+
 def test_collage_manual_approval(_container: Container):
     before_count = _container.mediacollection_service.count()
     correct_after_count = before_count + 3  # there are 2 captures plus final collage, one image is rejected, that shall be deleted again
@@ -128,6 +159,43 @@ def test_collage_manual_abort(_container: Container):
     assert correct_after_count == _container.mediacollection_service.count()
 
 
+def test_collage_phase1_pipelined_cancel(_container: Container):
+    appconfig.actions.collage[0].jobcontrol.ask_approval_each_capture = True
+
+    _container.processing_service.trigger_action("collage", 0)
+
+    jobmodel = _container.processing_service._workflow_jobmodel
+    assert jobmodel is not None
+
+    # the capture is processed in background while waiting for approval already
+    wait_for_user_input_requested()
+    assert len(jobmodel._phase1_pending) == 1
+    rejected_mediaitem, _ = next(iter(jobmodel._phase1_pending.values()))
+    step_cache.store(rejected_mediaitem.id, "dummy", Image.new("RGB", (10, 10)))
+    step_cache.flush()
+
+    _container.processing_service.reject_capture()
+    wait_for_user_input_requested()
+    assert not (step_cache.path / rejected_mediaitem.id.hex).exists()
+
+    assert rejected_mediaitem.captured_original and not rejected_mediaitem.captured_original.exists()
+    assert not rejected_mediaitem.unprocessed.exists()
+    assert not rejected_mediaitem.processed.exists()
+
+    assert len(jobmodel._phase1_pending) == 1
+    aborted_mediaitem, _ = next(iter(jobmodel._phase1_pending.values()))
+    step_cache.store(aborted_mediaitem.id, "dummy", Image.new("RGB", (10, 10)))
+    step_cache.flush()
+
+    _container.processing_service.abort_process()
+    _container.processing_service.wait_until_job_finished()
+    assert not (step_cache.path / aborted_mediaitem.id.hex).exists()
+
+    assert len(jobmodel._phase1_pending) == 0
+    assert not aborted_mediaitem.unprocessed.exists()
+    assert not aborted_mediaitem.processed.exists()
+
+
 def test_animation(_container: Container):
     _container.processing_service.trigger_action("animation", 0)
 
@@ -169,6 +237,50 @@ def test_video(_container: Container):
     assert out_dur == pytest.approx(desired_video_duration, abs=0.5)
 
 
+def test_video_passthrough_recording(_container: Container):
+    appconfig.mediaprocessing.video_passthrough_recording = True
+    appconfig.actions.video[0].processing.video_duration = 2
+    number_of_images_before = _container.mediacollection_service.count()
+
+    _container.processing_service.trigger_action("video", 0)
+    _container.processing_service.wait_until_job_finished()
+
+    assert _container.mediacollection_service.count() == number_of_images_before + 1
+
+    video_item = _container.mediacollection_service.get_item_latest()
+    assert video_item.unprocessed.suffix.lower() == ".mp4"
+
+    # transcoded to h264, the intermediate mjpeg recording is removed
+    with av.open(video_item.unprocessed) as container:
+        assert container.streams.video[0].codec_context.name == "h264"
+    assert not list(Path("tmp").glob("*.mkv"))
+
+    desired_video_duration = appconfig.actions.video[0].processing.video_duration
+    if appconfig.actions.video[0].processing.boomerang:
+        desired_video_duration *= 2
+        desired_video_duration /= appconfig.actions.video[0].processing.boomerang_speed
+    assert video_duration(video_item.unprocessed) == pytest.approx(desired_video_duration, abs=0.5)
+
+
+def test_video_passthrough_aborted_transcode_discarded(_container: Container):
+    appconfig.mediaprocessing.video_passthrough_recording = True
+    recordings_before = set(Path("tmp").glob("*.mkv"))
+
+    with mock.patch("photobooth.services.backends.encoder.video.subprocess.Popen") as popen:
+        popen.return_value.poll.return_value = None  # transcode is still running when the job is aborted
+
+        _container.processing_service.trigger_action("video", 0)
+        time.sleep(1)
+        _container.processing_service.abort_process()
+        _container.processing_service.wait_until_job_finished()
+
+    # the transcode is stopped and the mjpeg recording removed, nothing waits for them anymore
+    popen.return_value.kill.assert_called_once()
+    assert _container.acquisition_service._recorder
+    assert not _container.acquisition_service._recorder._transcodes
+    assert set(Path("tmp").glob("*.mkv")) == recordings_before
+
+
 def test_video_stop_early(_container: Container):
     _container.processing_service.trigger_action("video", 0)
 
@@ -1,11 +1,14 @@
 import logging
+import shutil
 import time
 from collections.abc import Generator
+from pathlib import Path
 
 import pytest
 
 from photobooth.services.acquisition import AcquisitionService
 from photobooth.services.config.groups.actions import SingleImageConfigurationSet, SingleImageJobControl, SingleImageProcessing, Trigger
+from photobooth.services.processor.base import Capture
 from photobooth.services.processor.image import JobModelImage
 
 logger = logging.getLogger(name=None)
@@ -117,3 +120,29 @@ def test_jobmodel_start_count_bigger_offset(_acqs: AcquisitionService):
     actual_blocking_time = (end_time - start_time) - expected_blocking_time
 
     assert abs(actual_blocking_time) < (0.1)  # 0.1 is acceptable tolerance for any inaccuracies
+
+
+def test_jobmodel_complete_phase1images_failed_capture_cleanup(_acqs: AcquisitionService, tmp_path: Path):
+    jm = JobModelImage(
+        SingleImageConfigurationSet(
+            jobcontrol=SingleImageJobControl(),
+            processing=SingleImageProcessing(),
+            trigger=Trigger(),
+        ),
+        _acqs,
+    )
+
+    capture_ok = Capture(Path(shutil.copy("src/tests/assets/input.jpg", tmp_path / "ok.jpg")))
+    capture_broken = Capture(tmp_path / "broken.jpg")
+    capture_broken.filepath.write_bytes(b"no jpeg")
+
+    jm.start_phase1image(capture_ok, False, SingleImageProcessing())
+    mediaitem_ok, _ = jm._phase1_pending[capture_ok.uuid]
+
+    with pytest.raises(OSError):
+        jm.complete_phase1images([(capture_ok, False, SingleImageProcessing()), (capture_broken, False, SingleImageProcessing())])
+
+    # the capture that succeeded is cleaned up also and nothing is left pending
+    assert jm._phase1_pending == {}
+    assert not mediaitem_ok.unprocessed.exists()
+    assert not mediaitem_ok.processed.exists()
@@ -6,6 +6,7 @@ import numpy as np
 import pytest
 from PIL import Image
 
+from photobooth.utils.multistereo_calibration.algorithms import simple
 from photobooth.utils.multistereo_calibration.algorithms.simple import SimpleCalibrationUtil
 from photobooth.utils.multistereo_calibration.charuco_board import generate_board, get_detector
 
@@ -83,3 +84,82 @@ def test_calibration_util_calibrate(tmp_path: Path, dummy_charuco_images):
     calibrator2 = SimpleCalibrationUtil()
     calibrator2.load_calibration_data(tmp_path)
     _ = calibrator2.align_all([Image.open(item[0]) for item in cameras], True)
+
+
+@pytest.fixture
+def homography_calibrator() -> SimpleCalibrationUtil:
+    # calibrated at another resolution than the images aligned later, small rotations and translations
+    calibrator = SimpleCalibrationUtil()
+    calibrator.identity_all(3, 1620, 1080)
+    calibrator._caldataalign[1].H = np.vstack([cv2.getRotationMatrix2D((810, 540), 2, 1.0) + [[0, 0, 12], [0, 0, -8]], [0, 0, 1]])
+    calibrator._caldataalign[2].H = np.vstack([cv2.getRotationMatrix2D((810, 540), -3, 1.01), [0, 0, 1]])
+
+    return calibrator
+
+
+def _reference_align(calibrator: SimpleCalibrationUtil, image: Image.Image, cam_idx: int) -> np.ndarray:
+    # plain full resolution warp as it was done before warp maps
+    H = calibrator._caldataalign[cam_idx].H
+    S = np.diag([image.width / 1620, image.height / 1080, 1.0])
+    return cv2.warpPerspective(np.array(image), S @ H @ np.linalg.inv(S), image.size, flags=cv2.INTER_CUBIC)
+
+
+def test_align_same_as_warp(homography_calibrator: SimpleCalibrationUtil):
+    with Image.open("src/tests/assets/input_lores.jpg") as im:
+        image = im.convert("RGB")
+
+    aligned = homography_calibrator.align_all([image, image, image], crop=False)
+
+    for cam_idx, aligned_image in enumerate(aligned):
+        assert aligned_image.size == image.size
+        difference = np.abs(np.asarray(aligned_image, dtype=np.int16) - _reference_align(homography_calibrator, image, cam_idx))
+        assert difference[10:-10, 10:-10].mean() < 1.0  # borders might differ by interpolation
+
+
+def test_align_crop_even(homography_calibrator: SimpleCalibrationUtil):
+    images = [Image.open("src/tests/assets/input_lores.jpg") for _ in range(3)]
+
+    aligned = homography_calibrator.align_all(images, crop=True)
+
+    assert all(img.size == aligned[0].size for img in aligned)
+    assert aligned[0].width % 2 == 0 and aligned[0].height % 2 == 0
+    assert aligned[0].width < images[0].width
+
+
+def test_align_max_length(homography_calibrator: SimpleCalibrationUtil):
+    aligned_full = homography_calibrator.align_all([Image.open("src/tests/assets/input.jpg") for _ in range(3)], crop=True)
+    aligned = homography_calibrator.align_all([Image.open("src/tests/assets/input.jpg") for _ in range(3)], crop=True, max_length=500)
+
+    assert max(aligned[0].size) <= 500
+    assert aligned[0].width % 2 == 0 and aligned[0].height % 2 == 0
+
+    for aligned_full_image, aligned_image in zip(aligned_full, aligned, strict=True):
+        # scaling while warping is about the same as scaling afterwards
+        reference = np.asarray(aligned_full_image.resize(aligned_image.size, Image.Resampling.LANCZOS), dtype=np.int16)
+        assert np.abs(np.asarray(aligned_image, dtype=np.int16) - reference).mean() < 3.0
+
+
+def test_align_warp_maps_reused(homography_calibrator: SimpleCalibrationUtil):
+    images = [Image.open("src/tests/assets/input_lores.jpg") for _ in range(3)]
+
+    homography_calibrator.align_all(images, crop=True, max_length=500)
+    warp_maps = dict(homography_calibrator._warp_maps)
+    homography_calibrator.align_all(images, crop=True, max_length=500)
+
+    assert len(warp_maps) == 3
+    assert all(homography_calibrator._warp_maps[key] is value for key, value in warp_maps.items())
+
+
+def test_align_warp_maps_bounded(homography_calibrator: SimpleCalibrationUtil, monkeypatch: pytest.MonkeyPatch):
+    images = [Image.open("src/tests/assets/input_lores.jpg") for _ in range(3)]
+
+    homography_calibrator.align_all(images, crop=True, max_length=500)
+    map1, map2 = list(homography_calibrator._warp_maps.values())[-1]
+    monkeypatch.setattr(simple, "MAX_WARP_MAPS_BYTES", map1.nbytes + map2.nbytes)
+
+    homography_calibrator.align_all(images, crop=True, max_length=400)
+
+    # only the most recently used maps are kept within the limit
+    assert len(homography_calibrator._warp_maps) == 1
+    map1, _ = next(iter(homography_calibrator._warp_maps.values()))
+    assert max(map1.shape[:2]) <= 400
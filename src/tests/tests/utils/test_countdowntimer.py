@@ -42,3 +42,14 @@ def test_countdowntimer_accuracy():
     actual = end_time - start_time
     assert pytest.approx(DURATION, abs=0.2) == actual  # 0.2 is acceptable tolerance for any inaccuracies
     # macos has higher inaccuracy than linux/windows. 0.1 is too tight for mac.
+
+
+def test_countdowntimer_duration():
+    ct = CountdownTimer()
+    assert ct.duration == 0
+
+    ct.start(0.5)
+    assert ct.duration == 0.5
+
+    ct.wait_countdown_finished()
+    assert ct.duration == 0
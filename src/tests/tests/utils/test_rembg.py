@@ -3,9 +3,12 @@ import tracemalloc
 from collections.abc import Generator
 from pathlib import Path
 
+import numpy as np
 import pytest
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFilter
 
+from photobooth.utils.rembg.guidedfilter import guided_upsample
+from photobooth.utils.rembg.inference_process import InferenceProcessSession
 from photobooth.utils.rembg.rembg import remove
 from photobooth.utils.rembg.session_factory import new_session
 from photobooth.utils.rembg.sessions import sessions_names
@@ -48,3 +51,83 @@ def test_pilgram_memconsumption(_session: BaseSession):
     logger.info(f"Peak memory usage = {peak_mib:.2f} MiB")
 
     assert peak_mib < 100  # Set reasonable memory threshold
+
+
+def test_optimized_model_persisted():
+    session = new_session("modnet")
+    optimized_path = BaseSession.optimized_model_path(session.download_models(), session.inner_session.get_providers())
+
+    assert optimized_path.is_file()
+
+    # second load uses the optimized graph and gives same results
+    session_optimized = new_session("modnet", intra_op_num_threads=1, inter_op_num_threads=1)
+    input_image = Image.open("src/tests/assets/input_lores.jpg")
+
+    assert list(session.predict(input_image).getdata()) == list(session_optimized.predict(input_image).getdata())
+
+
+def test_inference_process_same_result():
+    input_image = Image.open("src/tests/assets/input_lores.jpg")
+    session = new_session("modnet")
+    session_process = InferenceProcessSession("modnet")
+
+    try:
+        assert list(session.predict(input_image).getdata()) == list(session_process.predict(input_image).getdata())
+
+        # used transparently by remove()
+        output = remove(input_image, session=session_process)
+        assert output.mode == "RGBA"
+        assert output.size == input_image.size
+    finally:
+        session_process.close()
+
+
+def test_inference_process_restart_on_crash():
+    input_image = Image.open("src/tests/assets/input_lores.jpg")
+    session_process = InferenceProcessSession("modnet")
+
+    try:
+        assert session_process._process
+        session_process._process.kill()
+        session_process._process.join()
+
+        # restarted automatically on next request
+        mask = session_process.predict(input_image)
+        assert mask.size == input_image.size
+    finally:
+        session_process.close()
+
+
+def test_inference_process_unknown_model():
+    with pytest.raises(RuntimeError):
+        InferenceProcessSession("nonexistentmodel")
+
+
+def test_guided_upsample_sharper_than_resampling():
+    size = (1200, 800)
+    shape = (300, 200, 900, 650)
+
+    image = Image.new("RGB", size, (30, 90, 30))
+    ImageDraw.Draw(image).ellipse(shape, fill=(230, 200, 180))
+    ground_truth = Image.new("L", size, 0)
+    ImageDraw.Draw(ground_truth).ellipse(shape, fill=255)
+
+    # what a model delivers: low resolution and soft edges
+    mask_lowres = ground_truth.resize((300, 200), Image.Resampling.LANCZOS).filter(ImageFilter.GaussianBlur(1.5))
+
+    mask_guided = guided_upsample(mask_lowres, image)
+    mask_resampled = mask_lowres.resize(size, Image.Resampling.LANCZOS)
+
+    assert mask_guided.mode == "L"
+    assert mask_guided.size == size
+
+    def error(mask: Image.Image) -> float:
+        return float(np.abs(np.asarray(mask, dtype=np.int16) - np.asarray(ground_truth, dtype=np.int16)).mean())
+
+    assert error(mask_guided) < error(mask_resampled)
+
+
+def test_guided_upsample_same_size_unchanged():
+    mask = Image.new("L", (100, 50), 128)
+
+    assert guided_upsample(mask, Image.new("RGB", (100, 50))) is mask
@@ -49,6 +49,37 @@ def test_resize_jpg_force_pillow(tmp_path):
         img.verify()
 
 
+def test_resize_jpg_inmemory(tmp_path):
+    input = tmp_path / "input_oriented.jpg"
+    output = tmp_path / "output.jpg"
+    input.write_bytes(get_exiforiented_jpeg(get_jpeg((1600, 800)), 5).getvalue())
+
+    image = mr.resize_jpeg_inmemory(filepath_in=input, filepath_out=output, scaled_min_length=400)
+
+    # scaled in dct domain by 1/4 and not transposed yet
+    assert image.size == (400, 200)
+    assert image.getexif().get(0x0112) == 5
+
+    with Image.open(output) as img:
+        img.verify()
+
+    with Image.open(output) as img:
+        assert img.size == (400, 200)
+        assert img.getexif().get(0x0112) == 5  # orientation kept in the file written
+
+
+def test_resize_jpg_inmemory_no_upscale(tmp_path):
+    input = tmp_path / "input_oriented.jpg"
+    output = tmp_path / "output.jpg"
+    input.write_bytes(get_exiforiented_jpeg(get_jpeg((1600, 800)), 5).getvalue())
+
+    image = mr.resize_jpeg_inmemory(filepath_in=input, filepath_out=output, scaled_min_length=2000)
+
+    # not scaled, the original is written unchanged instead of encoded again
+    assert image.size == (1600, 800)
+    assert output.read_bytes() == input.read_bytes()
+
+
 def test_resize_gif(tmp_path):
     input = tmp_path / "anim.gif"
     output = tmp_path / "animation.gif"